@@ -4,6 +4,8 @@ from .views import get_admin_api_schema_view
 
 api_urlpatterns = [
     path("", include(("chat.admin_urls", "admin_chats"), namespace="admin_chats")),
+    path("", include(("products.admin_urls", "admin_products"), namespace="admin_products")),
+    path("", include(("ai.admin_urls", "admin_ai"), namespace="admin_ai")),
 ]
 
 schema_view = get_admin_api_schema_view([path("api/admin/", include(api_urlpatterns))])
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from ai.views import VectorIndexStatusView
+
+urlpatterns = [
+    path("ai/index/", VectorIndexStatusView.as_view(), name="vector-index-status"),
+]
@@ -1,9 +1,14 @@
 import datetime
 import logging
+import os
+import threading
+import time
 from dataclasses import dataclass
 from enum import Enum
 from typing import List
 
+import httpx
+import openai
 from django.conf import settings
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import Document
@@ -11,7 +16,8 @@ from langchain_community.chat_models import ChatOpenAI
 from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 
-from ai.utils import get_products_index_path
+from ai.index_store import sync_index
+from ai.utils import get_products_index_path, get_products_index_version
 from products.models import Product
 from products.tasks import rebuild_product_index_task
 
@@ -20,6 +26,12 @@ from .embed import format_product_info
 # Set up the logger
 logger = logging.getLogger(__name__)
 
+# Seconds between two checks for a newer vector index
+INDEX_CHECK_INTERVAL = 30
+# Connections kept open to the OpenAI API, shared by the LLM and the embeddings
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
 
 class CreatedByType(Enum):
     CLIENT = "client"
@@ -34,21 +46,88 @@ class ChatHistoryMessage:
     created_at: datetime
 
 
+def create_openai_client() -> openai.OpenAI:
+    """OpenAI client over one pooled HTTP client, so connections are kept alive."""
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE
+        ),
+        timeout=HTTP_TIMEOUT,
+    )
+    return openai.OpenAI(api_key=settings.OPENAI_API_KEY or None, http_client=http_client)
+
+
 class ProductAssistant:
-    def __init__(self):
-        self.embeddings = OpenAIEmbeddings()
+    """
+    Answers product questions from the vector index. Meant to live as long as
+    the process (see `get_product_assistant()`): the OpenAI clients are created
+    once, and the index is loaded once then reloaded when a newer one is saved
+    or pulled from the shared index store.
+    """
+
+    index_check_interval = INDEX_CHECK_INTERVAL
+
+    def __init__(self, client: openai.OpenAI = None):
+        self.client = client or create_openai_client()
+        self.embeddings = OpenAIEmbeddings(
+            client=self.client.embeddings, openai_api_key=settings.OPENAI_API_KEY
+        )
         self.llm = ChatOpenAI(
-            model="gpt-4-turbo-preview", temperature=0.7, openai_api_key=settings.OPENAI_API_KEY
+            model="gpt-4-turbo-preview",
+            temperature=0.7,
+            openai_api_key=settings.OPENAI_API_KEY,
+            client=self.client.chat.completions,
         )
-        self.vectorstore = self._load_vectorstore()
+        self.vectorstore = None
+        self.index_version = None
+        self._checked_at = None
+        self._reload_lock = threading.Lock()
+        self.refresh_vectorstore()
+
+    def get_vectorstore(self) -> FAISS:
+        """The current vector store, after checking for a newer index when it is time."""
+        if time.monotonic() - self._checked_at >= self.index_check_interval:
+            self.refresh_vectorstore()
+        return self.vectorstore
+
+    def refresh_vectorstore(self):
+        """
+        Loads the index when it changed since it was loaded. The new store is
+        built aside and swapped in with one assignment, requests in flight keep
+        the store they started with. Only one thread reloads, the others go on
+        with the current store meanwhile.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = time.monotonic()
+            path = get_products_index_path()
+            # Activates the version built on another node, if any
+            sync_index(path)
+            version = get_products_index_version(path)
+            if self.vectorstore is not None and version == self.index_version:
+                return
+            vectorstore = self._load_vectorstore()
+            if vectorstore is None:
+                return
+            # Published again while loading, which one was loaded is unknown: load next check
+            if get_products_index_version(path) != version:
+                version = None
+            self.vectorstore, self.index_version = vectorstore, version
+            logger.info("Vector store loaded, version %s", version)
+        finally:
+            self._reload_lock.release()
 
     def _load_vectorstore(self) -> FAISS:
         """
         Tries to load the vector store. If it fails, schedules a rebuild task.
         """
         try:
+            # Resolved once, so both files come from the same published version
             return FAISS.load_local(
-                get_products_index_path(), self.embeddings, allow_dangerous_deserialization=True
+                os.path.realpath(get_products_index_path()),
+                self.embeddings,
+                allow_dangerous_deserialization=True,
             )
         except Exception as e:
             logger.warning(f"Vector store failed to load: {e}. Scheduling rebuild.")
@@ -60,12 +139,13 @@ class ProductAssistant:
         Retrieve relevant product documents based on the chat context.
         This helps identify products mentioned in the conversation.
         """
-        if not self.vectorstore:
+        vectorstore = self.get_vectorstore()
+        if not vectorstore:
             logger.warning("Vectorstore is not loaded. Skipping similarity search.")
             return []
 
         try:
-            results = self.vectorstore.similarity_search(chat_context, k=k)
+            results = vectorstore.similarity_search(chat_context, k=k)
             return results
         except Exception as e:
             logger.error(f"Error during similarity search: {e}")
@@ -158,3 +238,23 @@ class ProductAssistant:
             context_lines.append(f"{role} ({msg.created_at}): {msg.content}")
 
         return "\n".join(context_lines)
+
+
+_assistant = None
+_assistant_pid = None
+_assistant_lock = threading.Lock()
+
+
+def get_product_assistant() -> ProductAssistant:
+    """
+    The assistant of this process, created on first use. A forked process (e.g.
+    a Celery or Gunicorn worker) creates its own, connections are not shared.
+    """
+    global _assistant, _assistant_pid
+    pid = os.getpid()
+    if _assistant is None or _assistant_pid != pid:
+        with _assistant_lock:
+            if _assistant is None or _assistant_pid != pid:
+                _assistant = ProductAssistant()
+                _assistant_pid = pid
+    return _assistant
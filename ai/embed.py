@@ -1,13 +1,20 @@
 import logging
-from typing import Dict, Tuple
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
 
-from django.utils.html import strip_tags
+from django.db.models import Max
 from langchain.schema import Document
 from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from rest_framework.test import APIRequestFactory
 
-from ai.utils import get_products_index_path
+from ai.embedding_cache import CachedEmbeddings, EmbeddingCache
+from ai.index_store import pull_current_version, share_version
+from ai.index_versions import UPDATE, publish_vectorstore
+from ai.models import PendingIndexUpdate
+from ai.utils import get_embedding_cache_path, get_products_index_path
 from products.models import Product
 from products.serializers import ProductSerializer
 
@@ -31,8 +38,8 @@ def format_product_info(product: Product) -> Tuple[str, Dict]:
     serializer = ProductSerializer(product, context={"request": request})
     product_data = serializer.data
 
-    # Clean the description HTML
-    clean_description = strip_tags(product_data["description_html"])
+    # Plain-text description rendered at save time
+    clean_description = product.description_text
 
     # Convert current_price to float
     current_price = float(product_data["current_price"])
@@ -74,8 +81,8 @@ def get_product_signature(product: Product) -> str:
     serializer = ProductSerializer(product, context={"request": request})
     product_data = serializer.data
 
-    # Clean the description HTML for the signature
-    clean_description = strip_tags(product_data["description_html"])
+    # Plain-text description rendered at save time
+    clean_description = product.description_text
 
     # Convert current_price to float
     current_price = float(product_data["current_price"])
@@ -88,32 +95,151 @@ def get_product_signature(product: Product) -> str:
     )
 
 
-def build_product_documents():
+def get_document_id(product_id) -> str:
+    """Vectors are keyed by product id, so a product's vector can be replaced or removed."""
+    return str(product_id)
+
+
+def build_product_documents(products=None):
     """
-    Converts all products from the DB into LangChain Documents.
-    These will be used to build a searchable vector index.
+    Converts all products from the DB, or the given `products` queryset, into
+    LangChain Documents. These will be used to build a searchable vector index.
     """
     docs = []
-    products = Product.objects.select_related("category").all()
+    if products is None:
+        products = Product.objects.all()
+    products = (
+        products.select_related("category", "discount")
+        .prefetch_related("files")
+        .defer("description", "search_vector")
+    )
 
     for product in products:
         content, metadata = format_product_info(product)
+        metadata["product_id"] = product.id
         docs.append(Document(page_content=content, metadata=metadata))
 
     return docs
 
 
-def create_vector_indexes():
+def get_document_ids(documents) -> List[str]:
+    return [get_document_id(document.metadata["product_id"]) for document in documents]
+
+
+@contextmanager
+def get_document_embeddings():
+    """OpenAI embeddings behind the local embedding cache, closed on exit."""
+    cache = EmbeddingCache(get_embedding_cache_path())
+    try:
+        yield CachedEmbeddings(OpenAIEmbeddings(), cache)
+    finally:
+        cache.close()
+
+
+def log_cache_usage(embeddings: CachedEmbeddings):
+    logger.info(
+        "Embedding cache: %s hits, %s misses (%.0f%% hit rate)",
+        embeddings.hits,
+        embeddings.misses,
+        embeddings.hit_rate * 100,
+    )
+
+
+def create_vector_indexes() -> Dict:
     """
     Builds a FAISS vector index from product documents and saves it locally.
+    Only the documents whose content is not in the embedding cache are sent to
+    OpenAI, then the cached vectors no product uses anymore are dropped.
+    Returns the number of documents and the cache hits and misses.
     """
+    started_at = time.time()
     documents = build_product_documents()
 
-    # Create OpenAI embeddings for semantic similarity
-    embeddings = OpenAIEmbeddings()
+    # Create OpenAI embeddings for semantic similarity, reusing the cached ones
+    with get_document_embeddings() as embeddings:
+        # Convert documents into a FAISS vector index
+        vectorstore = FAISS.from_documents(documents, embeddings, ids=get_document_ids(documents))
+
+        # Save the index to disk as a new version, switch readers to it and share it
+        manifest = publish_vectorstore(vectorstore, embeddings.model, get_products_index_path())
+        share_version(manifest["version"], get_products_index_path())
+
+        # Every current document was looked up during this rebuild
+        pruned = embeddings.cache.prune(used_before=started_at)
+    log_cache_usage(embeddings)
+    logger.info("Embedding cache: %s unused vectors pruned", pruned)
+    return {"documents": len(documents), "hits": embeddings.hits, "misses": embeddings.misses}
 
-    # Convert documents into a FAISS vector index
-    vectorstore = FAISS.from_documents(documents, embeddings)
 
-    # Save the index to disk
-    vectorstore.save_local(get_products_index_path())
+def update_vector_indexes(product_ids) -> bool:
+    """
+    Brings the vectors of `product_ids` in line with the DB: the vectors of these
+    products are removed and the products still existing are embedded again, so
+    only changed products are embedded, and the result is published as a new
+    version. Falls back to `create_vector_indexes()` when there is no index yet,
+    or one built before vectors were keyed by product. Returns False when a full
+    rebuild was done instead. Raises when the new version could not be pushed to
+    the index store.
+    """
+    # Applied to the version current on every node, not to a stale local one
+    pull_current_version(get_products_index_path())
+    with get_document_embeddings() as embeddings:
+        try:
+            # The active version, even if another one is published meanwhile
+            vectorstore = FAISS.load_local(
+                os.path.realpath(get_products_index_path()),
+                embeddings,
+                allow_dangerous_deserialization=True,
+            )
+        except Exception as e:
+            logger.warning("Vector store failed to load: %s. Rebuilding it.", e)
+            vectorstore = None
+
+        stored_ids = (
+            set(vectorstore.index_to_docstore_id.values()) if vectorstore is not None else set()
+        )
+        if vectorstore is not None and not all(document_id.isdigit() for document_id in stored_ids):
+            logger.info("Vector store is not keyed by product id. Rebuilding it.")
+            vectorstore = None
+
+        if vectorstore is not None:
+            document_ids = {get_document_id(product_id) for product_id in product_ids}
+            stale_ids = list(document_ids & stored_ids)
+            if stale_ids:
+                vectorstore.delete(stale_ids)
+            documents = build_product_documents(Product.objects.filter(id__in=product_ids))
+            if documents:
+                vectorstore.add_documents(documents, ids=get_document_ids(documents))
+            manifest = publish_vectorstore(
+                vectorstore, embeddings.model, get_products_index_path(), kind=UPDATE
+            )
+            # Raised so the changes are applied again, to this version, once the store is back
+            share_version(manifest["version"], get_products_index_path(), fail_silently=False)
+            logger.info(
+                "Vector store updated: %s products removed, %s embedded",
+                len(stale_ids),
+                len(documents),
+            )
+            log_cache_usage(embeddings)
+
+    if vectorstore is None:
+        create_vector_indexes()
+        return False
+    return True
+
+
+def update_pending_vector_indexes() -> int:
+    """
+    Applies the pending index updates recorded so far as one update, published
+    and shared once, then deletes them. They are kept when the update fails,
+    its push included. Returns the number of products updated.
+    """
+    last_id = PendingIndexUpdate.objects.aggregate(last_id=Max("id"))["last_id"]
+    if last_id is None:
+        return 0
+    # Changes recorded meanwhile are left to the next update
+    pending = PendingIndexUpdate.objects.filter(id__lte=last_id)
+    product_ids = sorted(set(pending.values_list("product_id", flat=True)))
+    update_vector_indexes(product_ids)
+    pending.delete()
+    return len(product_ids)
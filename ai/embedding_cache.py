@@ -0,0 +1,114 @@
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Keys looked up per query, below SQLite's bound parameters limit
+LOOKUP_CHUNK_SIZE = 500
+
+
+def get_embedding_key(model: str, text: str) -> str:
+    """Vectors depend on the text and the model that embedded it."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Vectors by content hash in a local SQLite file, stored as float32 bytes.
+    Several workers may share the file: writes are short transactions and WAL
+    lets readers go on while one writes.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, used_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Cached vectors of `keys`, marked as used now."""
+        vectors = {}
+        now = time.time()
+        with self.connection:
+            for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+                chunk = keys[start : start + LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                )
+                for key, vector in rows:
+                    vectors[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+                self.connection.execute(
+                    f"UPDATE embeddings SET used_at = ? WHERE key IN ({placeholders})",
+                    [now, *chunk],
+                )
+        return vectors
+
+    def set_many(self, vectors: Dict[str, List[float]]):
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, used_at) VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in vectors.items()
+                ],
+            )
+
+    def prune(self, used_before: float) -> int:
+        """Deletes the vectors not used since `used_before`, returns their number."""
+        with self.connection:
+            cursor = self.connection.execute(
+                "DELETE FROM embeddings WHERE used_at < ?", [used_before]
+            )
+        return cursor.rowcount
+
+    def close(self):
+        self.connection.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps `embeddings` so documents are only embedded when their content, for
+    this model, is not in the `cache` yet. Queries are not cached. `hits` and
+    `misses` count the documents found in and missing from the cache.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model: str = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model or getattr(embeddings, "model", type(embeddings).__name__)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [get_embedding_key(self.model, text) for text in texts]
+        vectors = self.cache.get_many(list(dict.fromkeys(keys)))
+        # Same contents are embedded once
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            embedded = self.embeddings.embed_documents(list(missing.values()))
+            # Rounded as stored, a content gets the same vector from the cache or not
+            embedded = np.asarray(embedded, dtype=np.float32).tolist()
+            new_vectors = dict(zip(missing, embedded))
+            self.cache.set_many(new_vectors)
+            vectors.update(new_vectors)
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
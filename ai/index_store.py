@@ -0,0 +1,323 @@
+"""
+Distribution of the published vector index versions to every node.
+
+The process that builds an index pushes the version, as a tar.gz blob with its
+manifest, to a shared store and marks it current. Every process answering
+questions checks the current version of the store before looking for a newer
+local index, and pulls and activates it when it changed. Without a store
+configured (`VECTOR_INDEX_STORE_URL`), nodes only see the indexes built locally.
+"""
+
+import io
+import json
+import logging
+import os
+import shutil
+import socket
+import tarfile
+from datetime import datetime
+from functools import lru_cache
+from urllib.parse import urlparse
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+
+from ai.index_versions import (
+    INDEX_FILES,
+    KEEP_INDEX_VERSIONS,
+    MANIFEST_NAME,
+    activate_version,
+    compute_checksum,
+    get_active_version,
+    get_versions_dir,
+    prune_versions,
+    read_manifest,
+)
+from ai.utils import get_products_index_path
+
+logger = logging.getLogger(__name__)
+
+# Last distribution events of this process, reported by `get_index_status()`
+node_status = {
+    "checked_at": None,
+    "pulled_at": None,
+    "pushed_at": None,
+    "pull_error": None,
+    "push_error": None,
+}
+# Largest value Redis accepts
+REDIS_MAX_BLOB_SIZE = 512 * 1024 * 1024
+
+
+class RedisIndexStore:
+    """
+    Blobs and the current manifest under `prefix` keys, the last `keep` blobs
+    kept. A blob is a single Redis value, so indexes whose archive exceeds
+    512 MB need a `DirectoryIndexStore`.
+    """
+
+    def __init__(self, url, prefix="vector_index:products", keep=KEEP_INDEX_VERSIONS):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.keep = keep
+
+    def get_current(self):
+        manifest = self.client.get(f"{self.prefix}:current")
+        return json.loads(manifest) if manifest else None
+
+    def get_blob(self, version):
+        return self.client.get(f"{self.prefix}:blob:{version}")
+
+    def put(self, manifest, blob):
+        version = manifest["version"]
+        if len(blob) > REDIS_MAX_BLOB_SIZE:
+            raise ValueError(
+                f"Vector index version {version} is {len(blob)} bytes, over the Redis value "
+                "limit: use a file:// vector index store"
+            )
+        versions_key = f"{self.prefix}:versions"
+        # The blob is stored before the version becomes current
+        self.client.set(f"{self.prefix}:blob:{version}", blob)
+        pipeline = self.client.pipeline()
+        pipeline.set(f"{self.prefix}:current", json.dumps(manifest))
+        pipeline.lrem(versions_key, 0, version)
+        pipeline.lpush(versions_key, version)
+        pipeline.execute()
+        stale = self.client.lrange(versions_key, self.keep, -1)
+        if stale:
+            self.client.ltrim(versions_key, 0, self.keep - 1)
+            self.client.delete(*[f"{self.prefix}:blob:{v.decode()}" for v in stale])
+
+
+class DirectoryIndexStore:
+    """
+    Blobs and the current manifest as files of `path`, e.g. a mounted network
+    share. Files are written aside then renamed, readers never see partial ones.
+    """
+
+    current_name = "current.json"
+
+    def __init__(self, path, keep=KEEP_INDEX_VERSIONS):
+        self.path = path
+        self.keep = keep
+
+    def get_current(self):
+        try:
+            with open(os.path.join(self.path, self.current_name)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def get_blob(self, version):
+        try:
+            with open(os.path.join(self.path, f"{version}.tar.gz"), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, manifest, blob):
+        os.makedirs(self.path, exist_ok=True)
+        self.write(f"{manifest['version']}.tar.gz", blob)
+        self.write(self.current_name, json.dumps(manifest).encode("utf-8"))
+        blobs = sorted(
+            (name for name in os.listdir(self.path) if name.endswith(".tar.gz")), reverse=True
+        )
+        current_blob = f"{manifest['version']}.tar.gz"
+        for name in blobs[self.keep :]:
+            if name != current_blob:
+                os.remove(os.path.join(self.path, name))
+
+    def write(self, name, content):
+        temporary_path = os.path.join(self.path, f".{name}.{os.getpid()}.tmp")
+        with open(temporary_path, "wb") as file:
+            file.write(content)
+        os.replace(temporary_path, os.path.join(self.path, name))
+
+
+@lru_cache(maxsize=None)
+def create_index_store(url):
+    scheme = urlparse(url).scheme
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisIndexStore(url)
+    if scheme == "file":
+        return DirectoryIndexStore(urlparse(url).path)
+    raise ValueError(f"Unsupported vector index store {url}")
+
+
+def get_index_store():
+    """The store configured by `VECTOR_INDEX_STORE_URL`, None when not set."""
+    url = settings.VECTOR_INDEX_STORE_URL
+    return create_index_store(url) if url else None
+
+
+def pack_version(version_dir):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name in (*INDEX_FILES, MANIFEST_NAME):
+            archive.add(os.path.join(version_dir, name), arcname=name)
+    return buffer.getvalue()
+
+
+def unpack_version(blob, directory):
+    os.makedirs(directory)
+    with tarfile.open(fileobj=io.BytesIO(blob), mode="r:gz") as archive:
+        for name in (*INDEX_FILES, MANIFEST_NAME):
+            # Only the expected files are extracted, whatever the archive holds
+            with archive.extractfile(name) as source, open(
+                os.path.join(directory, name), "wb"
+            ) as target:
+                shutil.copyfileobj(source, target)
+
+
+def push_version(version, index_path=None, store=None):
+    """
+    Pushes the published `version` to the store and makes it current there, its
+    manifest stamped with the push time.
+    """
+    index_path = index_path or get_products_index_path()
+    store = store or get_index_store()
+    if store is None:
+        return False
+    version_dir = os.path.join(get_versions_dir(index_path), version)
+    pushed_at = timezone.now()
+    manifest = {**read_manifest(version_dir), "pushed_at": pushed_at.isoformat()}
+    store.put(manifest, pack_version(version_dir))
+    node_status["pushed_at"] = pushed_at
+    logger.info("Vector index version %s pushed", version)
+    return True
+
+
+def share_version(version, index_path=None, fail_silently=True):
+    """
+    `push_version()`, errors logged and recorded, then raised unless
+    `fail_silently`: the version stays active here either way.
+    """
+    try:
+        pushed = push_version(version, index_path)
+    except Exception as e:
+        node_status["push_error"] = f"{timezone.now().isoformat()}: {e}"
+        logger.error("Vector index push of %s failed: %s", version, e)
+        if not fail_silently:
+            raise
+        return False
+    node_status["push_error"] = None
+    return pushed
+
+
+def pull_current_version(index_path=None, store=None):
+    """
+    Activates the current version of the store when it is not the active one,
+    downloading it first unless this node already has it. An active version
+    built here after the current one was pushed, whose own push failed, is kept:
+    the store is behind it, and it is shared by the next push. Returns the
+    version activated, None when nothing changed.
+    """
+    index_path = index_path or get_products_index_path()
+    store = store or get_index_store()
+    if store is None:
+        return None
+    node_status["checked_at"] = timezone.now()
+    manifest = store.get_current()
+    active = get_active_version(index_path)
+    if manifest is None or manifest["version"] == active:
+        return None
+    # Pushed after the active version was built, rollbacks included
+    local = read_manifest(os.path.realpath(index_path)) if active else None
+    if local and get_pushed_at(manifest) < get_built_at(local):
+        logger.warning(
+            "Vector index version %s is newer than the current version %s, not pulled",
+            active,
+            manifest["version"],
+        )
+        return None
+
+    version = manifest["version"]
+    versions_dir = get_versions_dir(index_path)
+    version_dir = os.path.join(versions_dir, version)
+    if not os.path.isdir(version_dir):
+        blob = store.get_blob(version)
+        if blob is None:
+            raise ValueError(f"Vector index version {version} is missing from the store")
+        # Other processes of the node may download the same version
+        download_dir = os.path.join(versions_dir, f".{version}.{os.getpid()}.download")
+        shutil.rmtree(download_dir, ignore_errors=True)
+        unpack_version(blob, download_dir)
+        if compute_checksum(download_dir) != manifest["checksum"]:
+            shutil.rmtree(download_dir)
+            raise ValueError(f"Vector index version {version} does not match its checksum")
+        try:
+            os.rename(download_dir, version_dir)
+        except OSError:
+            if not os.path.isdir(version_dir):
+                raise
+            shutil.rmtree(download_dir)
+
+    activate_version(version, index_path, verify=False)
+    prune_versions(index_path)
+    node_status["pulled_at"] = timezone.now()
+    logger.info("Vector index version %s pulled", version)
+    return version
+
+
+def sync_index(index_path=None):
+    """`pull_current_version()`, errors logged and recorded instead of raised."""
+    try:
+        version = pull_current_version(index_path)
+    except Exception as e:
+        node_status["pull_error"] = f"{timezone.now().isoformat()}: {e}"
+        logger.error("Vector index pull failed: %s", e)
+        return None
+    node_status["pull_error"] = None
+    return version
+
+
+def get_built_at(manifest):
+    return datetime.fromisoformat(manifest["built_at"]) if manifest else None
+
+
+def get_pushed_at(manifest):
+    # Versions pushed before push times were recorded
+    return datetime.fromisoformat(manifest.get("pushed_at", manifest["built_at"]))
+
+
+def format_datetime(value):
+    return value.isoformat() if value else None
+
+
+def get_index_status(index_path=None):
+    """
+    Index distribution metrics of this node: the active and current versions,
+    how long the active version has been behind the current one
+    (`staleness_seconds`, 0 when up to date), its age, the last events, and the
+    last pull and push errors, each cleared by the next success of its kind.
+    """
+    index_path = index_path or get_products_index_path()
+    store = get_index_store()
+    active = get_active_version(index_path)
+    local = read_manifest(os.path.realpath(index_path)) if active else None
+    current = store.get_current() if store else local
+    now = timezone.now()
+    local_built_at, current_built_at = get_built_at(local), get_built_at(current)
+
+    stale = current is not None and (local is None or current["version"] != local["version"])
+    staleness = 0.0
+    if stale and current_built_at:
+        # Behind since the current version was built
+        staleness = max(0.0, (now - current_built_at).total_seconds())
+    return {
+        "node": socket.gethostname(),
+        "pid": os.getpid(),
+        "store": type(store).__name__ if store else None,
+        "active_version": active,
+        "active_documents": local["documents"] if local else None,
+        "current_version": current["version"] if current else None,
+        "stale": stale,
+        "staleness_seconds": staleness,
+        "age_seconds": (now - local_built_at).total_seconds() if local_built_at else None,
+        "checked_at": format_datetime(node_status["checked_at"]),
+        "pulled_at": format_datetime(node_status["pulled_at"]),
+        "pushed_at": format_datetime(node_status["pushed_at"]),
+        "pull_error": node_status["pull_error"],
+        "push_error": node_status["push_error"],
+    }
@@ -0,0 +1,182 @@
+"""
+Versioned publishing of the products vector index.
+
+Each build is saved into its own directory under `<index path>_versions`, with
+a manifest, then published by pointing the index path, a symlink, to it. The
+symlink is replaced with a rename, so readers see either the previous or the
+new index, never a half-written one. The last full rebuilds, and every version
+of the last hour, are kept for rollback.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from ai.utils import get_products_index_path
+
+logger = logging.getLogger(__name__)
+
+# Newest full rebuilds kept by `prune_versions()`, besides the active version
+KEEP_INDEX_VERSIONS = 3
+# Versions younger than this are kept too: incremental updates publish one per
+# product change, and other processes may still be loading a recent one
+KEEP_INDEX_VERSIONS_MIN_AGE = 60 * 60  # 1 hour
+VERSION_FORMAT = "%Y%m%dT%H%M%S%fZ"
+LEGACY_PREFIX = ".legacy-"
+# Kinds of versions: built from the whole catalog, or from the previous version
+REBUILD = "rebuild"
+UPDATE = "update"
+MANIFEST_NAME = "manifest.json"
+INDEX_FILES = ("index.faiss", "index.pkl")
+
+
+def get_versions_dir(index_path):
+    return f"{index_path}_versions"
+
+
+def compute_checksum(directory):
+    """sha256 of the index files of `directory`."""
+    digest = hashlib.sha256()
+    for name in INDEX_FILES:
+        digest.update(name.encode("utf-8"))
+        with open(os.path.join(directory, name), "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(version_dir):
+    with open(os.path.join(version_dir, MANIFEST_NAME)) as file:
+        return json.load(file)
+
+
+def get_active_version(index_path=None):
+    """Version the index path points to, None without a published version."""
+    index_path = index_path or get_products_index_path()
+    if not os.path.islink(index_path):
+        return None
+    return os.path.basename(os.readlink(index_path))
+
+
+def list_versions(index_path=None):
+    """Manifests of the saved versions, newest first, flagged `active` or not."""
+    index_path = index_path or get_products_index_path()
+    versions_dir = get_versions_dir(index_path)
+    if not os.path.isdir(versions_dir):
+        return []
+    active = get_active_version(index_path)
+    manifests = []
+    for version in sorted(os.listdir(versions_dir), reverse=True):
+        version_dir = os.path.join(versions_dir, version)
+        # Builds in progress are hidden
+        if version.startswith(".") or not os.path.isfile(os.path.join(version_dir, MANIFEST_NAME)):
+            continue
+        manifests.append({**read_manifest(version_dir), "active": version == active})
+    return manifests
+
+
+def publish_vectorstore(vectorstore, model, index_path=None, kind=REBUILD):
+    """
+    Saves `vectorstore` as a new version of `kind`, activates it and prunes the
+    old versions. Returns the manifest of the new version.
+    """
+    index_path = index_path or get_products_index_path()
+    versions_dir = get_versions_dir(index_path)
+    os.makedirs(versions_dir, exist_ok=True)
+    built_at = timezone.now()
+    version = built_at.strftime(VERSION_FORMAT)
+
+    # Written under a hidden name, then renamed once complete
+    build_dir = os.path.join(versions_dir, f".{version}")
+    vectorstore.save_local(build_dir)
+    manifest = {
+        "version": version,
+        "documents": len(vectorstore.index_to_docstore_id),
+        "model": model,
+        "kind": kind,
+        "built_at": built_at.isoformat(),
+        "checksum": compute_checksum(build_dir),
+    }
+    with open(os.path.join(build_dir, MANIFEST_NAME), "w") as file:
+        json.dump(manifest, file, indent=2)
+    os.rename(build_dir, os.path.join(versions_dir, version))
+
+    activate_version(version, index_path, verify=False)
+    prune_versions(index_path)
+    return manifest
+
+
+def activate_version(version, index_path=None, verify=True):
+    """
+    Points the index path to `version`, checking first that its files match the
+    manifest checksum unless `verify` is False. Raises ValueError otherwise.
+    """
+    index_path = index_path or get_products_index_path()
+    versions_dir = get_versions_dir(index_path)
+    version_dir = os.path.join(versions_dir, version)
+    if version.startswith(".") or not os.path.isfile(os.path.join(version_dir, MANIFEST_NAME)):
+        raise ValueError(f"Unknown vector index version {version}")
+    if verify and compute_checksum(version_dir) != read_manifest(version_dir)["checksum"]:
+        raise ValueError(f"Vector index version {version} does not match its checksum")
+
+    if os.path.isdir(index_path) and not os.path.islink(index_path):
+        # Index saved in place before versions, kept aside as it was
+        legacy_dir = os.path.join(versions_dir, f"{LEGACY_PREFIX}{version}")
+        os.rename(index_path, legacy_dir)
+        logger.info("Unversioned vector index moved to %s", legacy_dir)
+
+    # Relative, the directory may be mounted elsewhere
+    target = os.path.relpath(version_dir, os.path.dirname(index_path))
+    temporary_link = f"{index_path}.{os.getpid()}.tmp"
+    os.symlink(target, temporary_link)
+    os.replace(temporary_link, index_path)
+    logger.info("Vector index version %s activated", version)
+
+
+def get_previous_version(index_path=None):
+    """Newest version older than the active one, to roll back to."""
+    index_path = index_path or get_products_index_path()
+    active = get_active_version(index_path)
+    versions = [manifest["version"] for manifest in list_versions(index_path)]
+    older = [version for version in versions if active is None or version < active]
+    return older[0] if older else None
+
+
+def prune_versions(index_path=None, keep=KEEP_INDEX_VERSIONS, min_age=KEEP_INDEX_VERSIONS_MIN_AGE):
+    """
+    Deletes the versions that are neither among the newest `keep` full rebuilds
+    nor younger than `min_age` seconds, and the unversioned indexes moved aside
+    more than `min_age` ago. The active version is never deleted, whatever its
+    age. Returns the deleted versions.
+    """
+    index_path = index_path or get_products_index_path()
+    versions_dir = get_versions_dir(index_path)
+    manifests = list_versions(index_path)
+    cutoff = timezone.now() - timedelta(seconds=min_age)
+    # Manifests written before kinds were recorded are full rebuilds
+    rebuilds = [
+        manifest["version"] for manifest in manifests if manifest.get("kind", REBUILD) == REBUILD
+    ]
+    kept = set(rebuilds[: max(keep, 0)]) | {get_active_version(index_path)}
+    kept |= {
+        manifest["version"]
+        for manifest in manifests
+        if datetime.fromisoformat(manifest["built_at"]) > cutoff
+    }
+    deleted = [manifest["version"] for manifest in manifests if manifest["version"] not in kept]
+    for version in deleted:
+        shutil.rmtree(os.path.join(versions_dir, version))
+
+    # Named after the version that replaced them, which tells when
+    cutoff_version = cutoff.strftime(VERSION_FORMAT)
+    for name in os.listdir(versions_dir) if os.path.isdir(versions_dir) else []:
+        if name.startswith(LEGACY_PREFIX) and name[len(LEGACY_PREFIX) :] < cutoff_version:
+            shutil.rmtree(os.path.join(versions_dir, name))
+            deleted.append(name)
+    logger.info("Vector index versions pruned: %s", deleted)
+    return deleted
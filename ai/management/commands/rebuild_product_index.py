@@ -8,5 +8,11 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         self.stdout.write("Rebuilding product vector index...")
-        create_vector_indexes()
+        stats = create_vector_indexes()
+        looked_up = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / looked_up * 100 if looked_up else 0
+        self.stdout.write(
+            f"{stats['documents']} documents, {stats['misses']} embedded, "
+            f"{stats['hits']} from the embedding cache ({hit_rate:.0f}% hit rate)"
+        )
         self.stdout.write(self.style.SUCCESS("Successfully rebuilt product vector index"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from ai.embed import update_pending_vector_indexes, update_vector_indexes
+
+
+class Command(BaseCommand):
+    help = (
+        "Updates the vectors of the given products in the product vector index, "
+        "or of the products with pending updates"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "product_ids",
+            nargs="*",
+            type=int,
+            help="Ids of the changed products, the pending updates when omitted",
+        )
+
+    def handle(self, *args, **options):
+        product_ids = options["product_ids"]
+        if not product_ids:
+            self.stdout.write("Applying the pending updates of the product vector index...")
+            updated = update_pending_vector_indexes()
+            self.stdout.write(self.style.SUCCESS(f"{updated} products updated"))
+            return
+        self.stdout.write(f"Updating {len(product_ids)} products in the product vector index...")
+        if update_vector_indexes(product_ids):
+            self.stdout.write(self.style.SUCCESS("Successfully updated product vector index"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Successfully rebuilt product vector index"))
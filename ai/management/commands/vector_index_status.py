@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from ai.index_store import get_index_status, sync_index
+
+
+class Command(BaseCommand):
+    help = "Shows the vector index version of this node against the shared index store"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pull", action="store_true", help="Pull the current version first if it changed"
+        )
+
+    def handle(self, *args, **options):
+        if options["pull"]:
+            version = sync_index()
+            if version:
+                self.stdout.write(self.style.SUCCESS(f"Version {version} pulled"))
+        for key, value in get_index_status().items():
+            self.stdout.write(f"{key}: {value}")
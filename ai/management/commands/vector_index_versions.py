@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.index_store import push_version
+from ai.index_versions import (
+    KEEP_INDEX_VERSIONS,
+    KEEP_INDEX_VERSIONS_MIN_AGE,
+    REBUILD,
+    activate_version,
+    get_previous_version,
+    list_versions,
+    prune_versions,
+)
+
+
+class Command(BaseCommand):
+    help = "Lists, activates, rolls back and prunes the versions of the product vector index"
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="action", required=True)
+        subparsers.add_parser("list", help="List the versions, newest first")
+        activate = subparsers.add_parser("activate", help="Activate a version")
+        activate.add_argument("version")
+        subparsers.add_parser("rollback", help="Activate the version before the active one")
+        prune = subparsers.add_parser("prune", help="Delete the oldest versions")
+        prune.add_argument(
+            "--keep",
+            type=int,
+            default=KEEP_INDEX_VERSIONS,
+            help="Number of full rebuilds kept, besides the active version",
+        )
+        prune.add_argument(
+            "--min-age",
+            type=int,
+            default=KEEP_INDEX_VERSIONS_MIN_AGE,
+            help="Versions younger than this many seconds are kept",
+        )
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(**options)
+
+    def handle_list(self, **options):
+        versions = list_versions()
+        if not versions:
+            self.stdout.write("No published version")
+        for manifest in versions:
+            marker = "*" if manifest["active"] else " "
+            self.stdout.write(
+                f"{marker} {manifest['version']}  {manifest.get('kind', REBUILD)}  "
+                f"{manifest['documents']} documents  "
+                f"{manifest['model']}  built {manifest['built_at']}  {manifest['checksum'][:12]}"
+            )
+
+    def handle_activate(self, version, **options):
+        try:
+            activate_version(version)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Version {version} activated"))
+        # Other nodes follow the version current in the shared store
+        if push_version(version):
+            self.stdout.write(self.style.SUCCESS(f"Version {version} pushed to the index store"))
+
+    def handle_rollback(self, **options):
+        version = get_previous_version()
+        if version is None:
+            raise CommandError("No version older than the active one")
+        self.handle_activate(version)
+
+    def handle_prune(self, keep, min_age, **options):
+        deleted = prune_versions(keep=keep, min_age=min_age)
+        self.stdout.write(self.style.SUCCESS(f"{len(deleted)} versions deleted"))
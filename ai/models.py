@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class PendingIndexUpdate(models.Model):
+    """
+    Product whose vector is replaced by the next batched update of the product
+    index. Recorded in the transaction changing the product, so no change is
+    lost if the update fails; deleted once the update is published. Not a
+    foreign key: the vectors of deleted products are removed too.
+    """
+
+    product_id = models.BigIntegerField()
+    reason = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Index update of {self.product_id}"
@@ -1,11 +1,13 @@
 import logging
 
+from django.db import transaction
 from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 from ai.embed import get_product_signature
+from ai.models import PendingIndexUpdate
 from products.models import Category, Discount, Product
-from products.tasks import rebuild_product_index_task
+from products.tasks import schedule_product_index_update
 
 logger = logging.getLogger(__name__)
 
@@ -25,34 +27,46 @@ def handle_product_pre_save(sender, instance, **kwargs):
 
 @receiver([post_save, post_delete], sender=Product)
 def handle_product_change(sender, instance, **kwargs):
-    """Handle product changes by scheduling a rebuild"""
+    """Handle product changes by scheduling an update of the product's vector"""
     if kwargs.get("created", False):
-        schedule_rebuild(f"Product {instance.name} created")
+        schedule_update([instance.pk], f"Product {instance.name} created")
     elif kwargs.get("raw", False):
-        schedule_rebuild(f"Product {instance.name} updated via raw save")
+        schedule_update([instance.pk], f"Product {instance.name} updated via raw save")
     elif hasattr(instance, "_content_changed") and instance._content_changed:
-        schedule_rebuild(f"Product {instance.name} content changed")
+        schedule_update([instance.pk], f"Product {instance.name} content changed")
     elif kwargs.get("signal") == post_delete:
-        schedule_rebuild(f"Product {instance.name} deleted")
+        schedule_update([instance.pk], f"Product {instance.name} deleted")
 
 
 @receiver(post_save, sender=Category)
 def handle_category_change(sender, instance, **kwargs):
     """Handle category changes that affect products"""
-    if instance.products.exists():
-        schedule_rebuild(f"Category {instance.name} changed affecting products")
+    product_ids = list(instance.products.values_list("id", flat=True))
+    if product_ids:
+        schedule_update(product_ids, f"Category {instance.name} changed affecting products")
 
 
 @receiver(post_save, sender=Discount)
 def handle_discount_change(sender, instance, **kwargs):
     """Handle discount changes that affect products"""
-    if instance.products.exists():
-        schedule_rebuild(f"Discount {instance.name} changed affecting products")
-
-
-def schedule_rebuild(reason: str):
-    """Schedule a delayed rebuild with logging"""
-    rebuild_product_index_task.delay(reason)
+    product_ids = list(instance.products.values_list("id", flat=True))
+    if product_ids:
+        schedule_update(product_ids, f"Discount {instance.name} changed affecting products")
+
+
+def schedule_update(product_ids, reason: str):
+    """
+    Record the products whose vectors are to be updated along with the change,
+    and schedule the batched update once the change is committed, the task
+    reads the products from the DB
+    """
+    PendingIndexUpdate.objects.bulk_create(
+        [
+            PendingIndexUpdate(product_id=product_id, reason=reason[:255])
+            for product_id in product_ids
+        ]
+    )
+    transaction.on_commit(lambda: schedule_product_index_update(reason))
 
 
 def register_product_signals():
@@ -0,0 +1,454 @@
+import json
+import os
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+from rest_framework import status
+
+from ai import assistant, embed, index_store, index_versions
+from ai.assistant import ProductAssistant, get_product_assistant
+from ai.embed import create_vector_indexes, update_vector_indexes
+from ai.embedding_cache import CachedEmbeddings, EmbeddingCache
+from ai.index_store import (
+    DirectoryIndexStore,
+    RedisIndexStore,
+    create_index_store,
+    get_index_status,
+    pull_current_version,
+    push_version,
+    share_version,
+    sync_index,
+)
+from ai.index_versions import (
+    KEEP_INDEX_VERSIONS,
+    compute_checksum,
+    get_active_version,
+    get_versions_dir,
+    list_versions,
+    prune_versions,
+)
+from ai.models import PendingIndexUpdate
+from products.models import Product
+from products.tests.factories import ProductFactory
+
+# Documents embedded by `CountingEmbeddings`
+embedded = []
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    """Random vectors, recording the embedded documents."""
+
+    def embed_documents(self, texts):
+        embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def index_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "products")
+    monkeypatch.setattr(embed, "get_products_index_path", lambda: path)
+    cache_path = str(tmp_path / "embeddings.sqlite3")
+    monkeypatch.setattr(embed, "get_embedding_cache_path", lambda: cache_path)
+    monkeypatch.setattr(embed, "OpenAIEmbeddings", lambda: CountingEmbeddings(size=8))
+    embedded.clear()
+    return path
+
+
+def load_index(path):
+    return FAISS.load_local(path, FakeEmbeddings(size=8), allow_dangerous_deserialization=True)
+
+
+def get_names(path):
+    vectorstore = load_index(path)
+    return sorted(
+        vectorstore.docstore.search(document_id).page_content.split("\n")[0]
+        for document_id in vectorstore.index_to_docstore_id.values()
+    )
+
+
+@pytest.mark.django_db
+class TestUpdateVectorIndexes:
+    def test_embeds_only_the_changed_products(self, index_path):
+        kettle, cup, plate = ProductFactory.create_batch(3)
+        create_vector_indexes()
+        assert len(embedded) == 3
+
+        Product.objects.filter(pk=kettle.pk).update(name="Steel Kettle")
+        plate_id = plate.pk
+        plate.delete()
+        embedded.clear()
+        assert update_vector_indexes([kettle.pk, plate_id])
+
+        assert len(embedded) == 1
+        assert get_names(index_path) == sorted([cup.name, "Steel Kettle"])
+        vectorstore = load_index(index_path)
+        assert set(vectorstore.index_to_docstore_id.values()) == {str(kettle.pk), str(cup.pk)}
+
+    def test_adds_new_products(self, index_path):
+        ProductFactory()
+        create_vector_indexes()
+        product = ProductFactory(name="Teapot")
+        assert update_vector_indexes([product.pk])
+        assert "Teapot" in get_names(index_path)
+
+    def test_rebuilds_missing_or_legacy_indexes(self, index_path):
+        products = ProductFactory.create_batch(2)
+        assert not update_vector_indexes([products[0].pk])
+        assert len(load_index(index_path).index_to_docstore_id) == 2
+
+        # Indexes built before vectors were keyed by product id
+        documents = embed.build_product_documents()
+        FAISS.from_documents(documents, FakeEmbeddings(size=8)).save_local(index_path)
+        assert not update_vector_indexes([products[0].pk])
+        vectorstore = load_index(index_path)
+        assert set(vectorstore.index_to_docstore_id.values()) == {str(p.pk) for p in products}
+
+
+class TestCachedEmbeddings:
+    def test_embeds_missing_contents_once(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+        embeddings = CachedEmbeddings(CountingEmbeddings(size=8), cache, model="model-a")
+        embedded.clear()
+        first = embeddings.embed_documents(["kettle", "cup", "kettle"])
+        assert embedded == ["kettle", "cup"]
+        assert first[0] == first[2]
+
+        second = embeddings.embed_documents(["cup", "kettle", "plate"])
+        assert embedded == ["kettle", "cup", "plate"]
+        assert second[:2] == [first[1], first[0]]
+        assert (embeddings.hits, embeddings.misses) == (3, 3)
+
+        # Vectors of another model are not reused
+        other = CachedEmbeddings(CountingEmbeddings(size=8), cache, model="model-b")
+        other.embed_documents(["cup"])
+        assert other.misses == 1
+        cache.close()
+
+    def test_prune(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+        cache.set_many({"old": [1.0], "new": [2.0]})
+        cache.connection.execute("UPDATE embeddings SET used_at = 0 WHERE key = 'old'")
+        assert cache.prune(used_before=1) == 1
+        assert cache.get_many(["old", "new"]) == {"new": [2.0]}
+        cache.close()
+
+
+@pytest.mark.django_db
+class TestRebuildCache:
+    def test_rebuilds_embed_only_new_contents(self, index_path):
+        kettle, _ = ProductFactory.create_batch(2)
+        assert create_vector_indexes() == {"documents": 2, "hits": 0, "misses": 2}
+        assert create_vector_indexes() == {"documents": 2, "hits": 2, "misses": 0}
+
+        Product.objects.filter(pk=kettle.pk).update(name="Steel Kettle")
+        ProductFactory()
+        embedded.clear()
+        assert create_vector_indexes() == {"documents": 3, "hits": 1, "misses": 2}
+        assert len(embedded) == 2
+
+    def test_unused_vectors_are_pruned(self, index_path, tmp_path):
+        kettle = ProductFactory()
+        create_vector_indexes()
+        Product.objects.filter(pk=kettle.pk).update(name="Steel Kettle")
+        create_vector_indexes()
+        cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+        assert cache.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone() == (1,)
+        cache.close()
+
+
+@pytest.mark.django_db
+class TestProductAssistant:
+    @pytest.fixture
+    def product_assistant(self, index_path, monkeypatch, settings):
+        settings.OPENAI_API_KEY = "test"
+        monkeypatch.setattr(assistant, "get_products_index_path", lambda: index_path)
+        ProductFactory()
+        create_vector_indexes()
+        product_assistant = ProductAssistant()
+        product_assistant.index_check_interval = 0
+        return product_assistant
+
+    def test_reloads_newer_indexes_only(self, product_assistant, index_path):
+        vectorstore = product_assistant.get_vectorstore()
+        assert len(vectorstore.index_to_docstore_id) == 1
+        assert product_assistant.get_vectorstore() is vectorstore
+
+        ProductFactory()
+        create_vector_indexes()
+        reloaded = product_assistant.get_vectorstore()
+        assert reloaded is not vectorstore
+        assert len(reloaded.index_to_docstore_id) == 2
+        # Requests holding the previous store can still use it
+        assert len(vectorstore.index_to_docstore_id) == 1
+
+    def test_keeps_the_loaded_store_when_the_index_is_missing(self, product_assistant, tmp_path):
+        vectorstore = product_assistant.get_vectorstore()
+        missing_path = str(tmp_path / "missing")
+        with patch.object(assistant, "get_products_index_path", lambda: missing_path), patch.object(
+            assistant, "rebuild_product_index_task"
+        ) as task:
+            assert product_assistant.get_vectorstore() is vectorstore
+        task.delay.assert_called_once()
+
+    def test_shares_the_http_client(self, product_assistant):
+        http_client = product_assistant.client._client
+        assert product_assistant.llm.client._client._client is http_client
+        assert product_assistant.embeddings.client._client._client is http_client
+
+
+@pytest.mark.django_db
+class TestIndexVersions:
+    def test_publishes_versions(self, index_path):
+        ProductFactory.create_batch(2)
+        create_vector_indexes()
+        assert os.path.islink(index_path)
+        versions = list_versions(index_path)
+        assert len(versions) == 1
+        manifest = versions[0]
+        assert manifest["active"]
+        assert manifest["version"] == get_active_version(index_path)
+        assert (manifest["documents"], manifest["model"]) == (2, "CountingEmbeddings")
+        assert manifest["checksum"] == compute_checksum(os.path.realpath(index_path))
+
+    def test_keeps_the_last_rebuilds_and_the_recent_versions(self, index_path):
+        product = ProductFactory()
+        for _ in range(KEEP_INDEX_VERSIONS + 1):
+            create_vector_indexes()
+        update_vector_indexes([product.pk])
+        update_vector_indexes([product.pk])
+        # Every version is recent
+        versions = [manifest["version"] for manifest in list_versions(index_path)]
+        assert len(versions) == KEEP_INDEX_VERSIONS + 3
+
+        prune_versions(index_path, min_age=0)
+        manifests = list_versions(index_path)
+        assert [manifest["kind"] for manifest in manifests] == ["update", *["rebuild"] * 3]
+        assert [manifest["version"] for manifest in manifests] == [versions[0], *versions[2:5]]
+        assert sorted(os.listdir(get_versions_dir(index_path)), reverse=True) == [
+            manifest["version"] for manifest in manifests
+        ]
+
+    def test_legacy_index_is_moved_aside(self, index_path):
+        ProductFactory()
+        documents = embed.build_product_documents()
+        FAISS.from_documents(documents, FakeEmbeddings(size=8)).save_local(index_path)
+        create_vector_indexes()
+        assert os.path.islink(index_path)
+        assert any(name.startswith(".legacy-") for name in os.listdir(get_versions_dir(index_path)))
+
+        prune_versions(index_path, min_age=0)
+        assert not any(
+            name.startswith(".legacy-") for name in os.listdir(get_versions_dir(index_path))
+        )
+
+    def test_command(self, index_path, monkeypatch):
+        monkeypatch.setattr(index_versions, "get_products_index_path", lambda: index_path)
+        ProductFactory()
+        create_vector_indexes()
+        create_vector_indexes()
+        newest, previous = [manifest["version"] for manifest in list_versions(index_path)]
+
+        call_command("vector_index_versions", "rollback", stdout=StringIO())
+        assert get_active_version(index_path) == previous
+        with pytest.raises(CommandError):
+            call_command("vector_index_versions", "rollback", stdout=StringIO())
+        out = StringIO()
+        call_command("vector_index_versions", "list", stdout=out)
+        assert f"* {previous}" in out.getvalue()
+
+        # Corrupted versions are not activated
+        with open(os.path.join(get_versions_dir(index_path), newest, "index.pkl"), "ab") as file:
+            file.write(b"corrupted")
+        with pytest.raises(CommandError, match="checksum"):
+            call_command("vector_index_versions", "activate", newest, stdout=StringIO())
+
+        call_command(
+            "vector_index_versions", "prune", "--keep", "0", "--min-age", "0", stdout=StringIO()
+        )
+        assert [manifest["version"] for manifest in list_versions(index_path)] == [previous]
+
+
+@pytest.mark.django_db
+class TestIndexStore:
+    @pytest.fixture
+    def store_path(self, tmp_path, settings):
+        path = tmp_path / "store"
+        settings.VECTOR_INDEX_STORE_URL = f"file://{path}"
+        yield path
+        create_index_store.cache_clear()
+
+    def test_nodes_pull_the_published_version(self, index_path, store_path, tmp_path):
+        ProductFactory.create_batch(2)
+        create_vector_indexes()
+        version = get_active_version(index_path)
+        assert (store_path / f"{version}.tar.gz").exists()
+
+        node_path = str(tmp_path / "node" / "products")
+        os.makedirs(os.path.dirname(node_path))
+        assert get_index_status(node_path)["stale"]
+        assert pull_current_version(node_path) == version
+        assert pull_current_version(node_path) is None
+        assert get_names(node_path) == get_names(index_path)
+        node_status = get_index_status(node_path)
+        assert (node_status["active_version"], node_status["current_version"]) == (version, version)
+        assert (node_status["stale"], node_status["staleness_seconds"]) == (False, 0.0)
+        assert node_status["active_documents"] == 2
+
+    def test_updates_apply_to_the_current_version(self, index_path, store_path, tmp_path):
+        builder_path = index_path
+        worker_path = str(tmp_path / "worker" / "products")
+        os.makedirs(os.path.dirname(worker_path))
+        kettle = ProductFactory()
+        create_vector_indexes()
+
+        # Another worker publishes an update, the builder's local index is behind
+        with patch.object(embed, "get_products_index_path", lambda: worker_path):
+            cup = ProductFactory()
+            update_vector_indexes([cup.pk])
+        plate = ProductFactory()
+        update_vector_indexes([plate.pk])
+
+        assert get_names(builder_path) == sorted([kettle.name, cup.name, plate.name])
+        store = create_index_store(f"file://{store_path}")
+        assert store.get_current()["version"] == get_active_version(builder_path)
+
+    def test_updates_whose_push_failed_are_kept(self, index_path, store_path):
+        kettle = ProductFactory()
+        create_vector_indexes()
+        PendingIndexUpdate.objects.all().delete()
+        pushed = get_active_version(index_path)
+
+        cup = ProductFactory()
+        with patch.object(DirectoryIndexStore, "put", side_effect=OSError("store down")):
+            with pytest.raises(OSError):
+                call_command("update_product_index", stdout=StringIO())
+        assert PendingIndexUpdate.objects.filter(product_id=cup.pk).exists()
+        # The store is behind the local version, which is not reverted
+        assert pull_current_version(index_path) is None
+        assert get_active_version(index_path) != pushed
+
+        plate = ProductFactory()
+        call_command("update_product_index", stdout=StringIO())
+        assert get_names(index_path) == sorted([kettle.name, cup.name, plate.name])
+        store = create_index_store(f"file://{store_path}")
+        assert store.get_current()["version"] == get_active_version(index_path)
+        assert not PendingIndexUpdate.objects.exists()
+
+    def test_nodes_follow_rollbacks(self, index_path, store_path, tmp_path, monkeypatch):
+        monkeypatch.setattr(index_versions, "get_products_index_path", lambda: index_path)
+        monkeypatch.setattr(index_store, "get_products_index_path", lambda: index_path)
+        ProductFactory()
+        create_vector_indexes()
+        first = get_active_version(index_path)
+        create_vector_indexes()
+        node_path = str(tmp_path / "node" / "products")
+        os.makedirs(os.path.dirname(node_path))
+        pull_current_version(node_path)
+
+        call_command("vector_index_versions", "rollback", stdout=StringIO())
+        assert pull_current_version(node_path) == first
+
+    def test_redis_store_size_limit(self, monkeypatch):
+        monkeypatch.setattr(index_store, "REDIS_MAX_BLOB_SIZE", 4)
+        store = RedisIndexStore("redis://localhost:6379/15")
+        with pytest.raises(ValueError, match="file://"):
+            store.put({"version": "20260101T000000000000Z"}, b"12345")
+
+    def test_push_and_pull_errors_are_kept_apart(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(index_store, "node_status", dict(index_store.node_status))
+        with patch.object(index_store, "push_version", side_effect=ValueError("store down")):
+            assert not share_version("20260101T000000000000Z")
+        with patch.object(index_store, "pull_current_version", return_value=None):
+            sync_index()
+        node_status = get_index_status(str(tmp_path / "products"))
+        assert "store down" in node_status["push_error"]
+        assert node_status["pull_error"] is None
+
+    def test_corrupted_blobs_are_not_activated(self, index_path, tmp_path):
+        ProductFactory()
+        create_vector_indexes()
+        version = get_active_version(index_path)
+        store = DirectoryIndexStore(str(tmp_path / "store"))
+        push_version(version, index_path, store)
+        manifest = store.get_current()
+        store.write("current.json", json.dumps({**manifest, "checksum": "0"}).encode())
+
+        node_path = str(tmp_path / "node")
+        with pytest.raises(ValueError, match="checksum"):
+            pull_current_version(node_path, store)
+        assert get_active_version(node_path) is None
+        assert os.listdir(get_versions_dir(node_path)) == []
+
+    def test_rollback_is_pushed(self, index_path, store_path, monkeypatch):
+        monkeypatch.setattr(index_versions, "get_products_index_path", lambda: index_path)
+        monkeypatch.setattr(index_store, "get_products_index_path", lambda: index_path)
+        ProductFactory()
+        create_vector_indexes()
+        create_vector_indexes()
+        call_command("vector_index_versions", "rollback", stdout=StringIO())
+        store = create_index_store(f"file://{store_path}")
+        assert store.get_current()["version"] == get_active_version(index_path)
+
+    def test_status_endpoint(self, api_client):
+        url = reverse("admin_ai:vector-index-status")
+        assert api_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+        admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+        api_client.force_authenticate(admin)
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["pid"] == os.getpid()
+
+
+def test_one_assistant_per_process(monkeypatch):
+    monkeypatch.setattr(assistant, "_assistant", None)
+    with patch.object(assistant, "ProductAssistant") as product_assistant:
+        assert get_product_assistant() is get_product_assistant()
+        product_assistant.assert_called_once_with()
+
+        monkeypatch.setattr(assistant, "_assistant_pid", -1)
+        get_product_assistant()
+        assert product_assistant.call_count == 2
+
+
+@pytest.mark.django_db
+class TestSignals:
+    def test_product_changes_record_a_pending_update(self, django_capture_on_commit_callbacks):
+        with patch("ai.signals.schedule_product_index_update") as schedule:
+            with django_capture_on_commit_callbacks(execute=True):
+                product = ProductFactory()
+            schedule.assert_called_once_with(f"Product {product.name} created")
+
+            schedule.reset_mock()
+            with django_capture_on_commit_callbacks(execute=True):
+                product.category.name = "Renamed"
+                product.category.save()
+            schedule.assert_called_once_with("Category Renamed changed affecting products")
+        pending = PendingIndexUpdate.objects.order_by("id").values_list("product_id", "reason")
+        assert list(pending) == [
+            (product.pk, f"Product {product.name} created"),
+            (product.pk, "Category Renamed changed affecting products"),
+        ]
+
+    def test_pending_updates_are_applied_at_once(self, index_path):
+        kettle, cup = ProductFactory.create_batch(2)
+        create_vector_indexes()
+        PendingIndexUpdate.objects.all().delete()
+        Product.objects.filter(pk=kettle.pk).update(name="Steel Kettle")
+        Product.objects.filter(pk=cup.pk).update(name="Tea Cup")
+        PendingIndexUpdate.objects.bulk_create(
+            PendingIndexUpdate(product_id=product_id) for product_id in [kettle.pk, cup.pk, cup.pk]
+        )
+        versions = len(list_versions(index_path))
+        embedded.clear()
+
+        call_command("update_product_index", stdout=StringIO())
+        assert len(embedded) == 2
+        assert len(list_versions(index_path)) == versions + 1
+        assert get_names(index_path) == ["Steel Kettle", "Tea Cup"]
+        assert not PendingIndexUpdate.objects.exists()
@@ -2,9 +2,12 @@
 Utility functions for AI-related operations.
 """
 
+import os
+
 # Vector index paths
 VECTOR_INDEXES_DIR = "/vector_indexes"
 PRODUCTS_INDEX_PATH = f"{VECTOR_INDEXES_DIR}/products"
+EMBEDDING_CACHE_PATH = f"{VECTOR_INDEXES_DIR}/embeddings.sqlite3"
 
 
 def get_products_index_path():
@@ -12,3 +15,26 @@ def get_products_index_path():
     Returns the path to the products vector index.
     """
     return PRODUCTS_INDEX_PATH
+
+
+def get_embedding_cache_path():
+    """
+    Returns the path to the SQLite cache of the product document embeddings.
+    """
+    return EMBEDDING_CACHE_PATH
+
+
+def get_products_index_version(path):
+    """
+    Returns the version of the vector index saved at `path`, which changes each
+    time it is saved: the published version the path links to, or for an index
+    saved in place, the modification times and sizes of its files. None if it
+    is missing.
+    """
+    if os.path.islink(path):
+        return os.readlink(path)
+    try:
+        stats = [os.stat(os.path.join(path, name)) for name in ("index.faiss", "index.pkl")]
+    except FileNotFoundError:
+        return None
+    return tuple((stat.st_mtime_ns, stat.st_size) for stat in stats)
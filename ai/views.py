@@ -0,0 +1,14 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ai.index_store import get_index_status
+
+
+class VectorIndexStatusView(APIView):
+    """Vector index version of the node serving the request, and its staleness."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_index_status())
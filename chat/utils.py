@@ -1,7 +1,7 @@
 from django.contrib.auth.models import User
 from django.db import transaction
 
-from ai.assistant import ChatHistoryMessage, CreatedByType, ProductAssistant
+from ai.assistant import ChatHistoryMessage, CreatedByType, get_product_assistant
 from authentication.models import GuestUser, UserProfile
 from chat.models import Chat, Message
 from chat.signals import update_latest_message
@@ -184,7 +184,7 @@ def get_ai_response_from_chat(chat):
         # Get chatbot user
         chatbot_user = get_or_create_chatbot_user()
         # Get AI response
-        assistant = ProductAssistant()
+        assistant = get_product_assistant()
         ai_response = assistant.answer_question(chat_history)
         # Create AI message
         return Message.objects.create(chat=chat, created_by=chatbot_user, content=ai_response)
@@ -1,7 +1,22 @@
 import pytest
+from django.core.cache import cache
+from django.test import override_settings
 from rest_framework.test import APIClient
 
 
+def pytest_configure(config):
+    # Tests never touch the Redis cache of the environment they run in
+    override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    ).enable()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # The local memory cache outlives the test database, don't leak cached responses
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -0,0 +1,61 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from chat.views import AdminChatViewSet
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from products.views import CategoryViewSet, ProductViewSet
+
+RENDERERS = [
+    ("json", JSONRenderer),
+    ("orjson", ORJSONRenderer),
+    ("msgpack", MessagePackRenderer),
+]
+
+
+class Command(BaseCommand):
+    help = "Compare the render time and payload size of the API renderers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100, help="Products per page")
+        parser.add_argument("--repeat", type=int, default=20, help="Renders per renderer")
+
+    def handle(self, *args, **options):
+        repeat = max(1, options["repeat"])
+        endpoints = [
+            ("products", ProductViewSet, {"page_size": options["page_size"]}),
+            ("categories", CategoryViewSet, {}),
+            ("admin chats", AdminChatViewSet, {}),
+        ]
+        for name, viewset, params in endpoints:
+            data = self.get_data(viewset, params)
+            self.stdout.write(f"{name}:")
+            baseline = None
+            for renderer_name, renderer_class in RENDERERS:
+                elapsed, size = self.measure(renderer_class(), data, repeat)
+                baseline = baseline or elapsed
+                self.stdout.write(
+                    f"  {renderer_name:<8} {elapsed * 1000:8.2f} ms  {size:>9} bytes  "
+                    f"x{baseline / elapsed:.1f}"
+                )
+
+    def get_data(self, viewset, params):
+        """Response data of the `list` action of `viewset`, before rendering."""
+        request = APIRequestFactory().get("/", params)
+        # Admin endpoints only check `is_staff`, nothing is written
+        force_authenticate(request, user=User(username="benchmark", is_staff=True))
+        response = viewset.as_view({"get": "list"})(request)
+        return response.data
+
+    def measure(self, renderer, data, repeat):
+        """Best render time of `repeat` runs and the payload size."""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rendered = renderer.render(data)
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(rendered)
@@ -8,6 +8,8 @@ class Command(BaseCommand):
 
     scripts = [
         Script("create_rebuild_task"),
+        Script("create_popularity_task"),
+        Script("record_co_purchases"),
     ]
 
     def handle(self, *args, **options):
@@ -1 +1,87 @@
-# Create your tests here.
+import datetime
+import uuid
+from decimal import Decimal
+from io import StringIO
+
+import msgpack
+import orjson
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from djmoney.money import Money
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from products.tests.factories import ProductFactory
+
+
+class TestORJSONRenderer:
+    def test_renders_like_the_json_renderer(self):
+        data = {"id": 1, "name": "Kettle", "price": "12.5000", "tags": ["a", "é"], "ok": True}
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_native_and_fallback_types(self):
+        identifier = uuid.uuid4()
+        data = {
+            "uuid": identifier,
+            "at": datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            "amount": Decimal("12.50"),
+            "price": Money("9.99", "USD"),
+            1: "non string key",
+        }
+        assert orjson.loads(ORJSONRenderer().render(data)) == {
+            "uuid": str(identifier),
+            "at": "2025-01-02T03:04:05Z",
+            "amount": 12.5,
+            "price": 9.99,
+            "1": "non string key",
+        }
+
+    def test_indent(self):
+        rendered = ORJSONRenderer().render({"a": 1}, "application/json; indent=4")
+        assert rendered == b'{\n  "a": 1\n}'
+
+    def test_empty(self):
+        assert ORJSONRenderer().render(None) == b""
+
+
+class TestMessagePackRenderer:
+    def test_render(self):
+        data = {"amount": Decimal("1.5"), "names": ["a", "b"]}
+        assert msgpack.unpackb(MessagePackRenderer().render(data)) == {
+            "amount": 1.5,
+            "names": ["a", "b"],
+        }
+
+
+@pytest.mark.django_db
+class TestContentNegotiation:
+    def test_json_by_default(self, api_client):
+        ProductFactory()
+        response = api_client.get(reverse("products:product-list"))
+        assert response["Content-Type"] == "application/json"
+        assert orjson.loads(response.content)["results"]
+
+    def test_msgpack_through_accept(self, api_client):
+        product = ProductFactory()
+        url = reverse("products:product-detail", kwargs={"slug": product.slug})
+        json_response = api_client.get(url)
+        response = api_client.get(url, HTTP_ACCEPT="application/msgpack")
+        assert response["Content-Type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content) == orjson.loads(json_response.content)
+        # Both representations are validated separately
+        assert response["ETag"] != json_response["ETag"]
+
+    def test_unsupported_media_type(self, api_client):
+        response = api_client.get(reverse("products:product-list"), HTTP_ACCEPT="text/csv")
+        assert response.status_code == 406
+
+
+@pytest.mark.django_db
+def test_benchmark_renderers_command():
+    ProductFactory.create_batch(3)
+    stdout = StringIO()
+    call_command("benchmark_renderers", repeat=1, stdout=stdout)
+    output = stdout.getvalue()
+    for name in ("products:", "categories:", "admin chats:", "orjson", "msgpack"):
+        assert name in output
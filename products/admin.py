@@ -3,7 +3,16 @@ from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
 
-from products.models import Category, Discount, File, Order, OrderAddress, OrderItems, Product
+from products.models import (
+    Category,
+    Discount,
+    File,
+    Order,
+    OrderAddress,
+    OrderItems,
+    Product,
+    ProductPopularity,
+)
 
 admin.site.site_header = "Shoppingify Admin"
 admin.site.site_title = "Shoppingify Admin Portal"
@@ -25,7 +34,21 @@ class ProductAdmin(admin.ModelAdmin):
     inlines = [
         FileInline,
     ]
-    search_fields = ["name", "description"]
+    search_fields = ["name"]
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text `search_vector` instead of `icontains` on each search field
+        if not search_term:
+            return queryset, False
+        return queryset.search(search_term), False
+
+
+@admin.register(ProductPopularity)
+class ProductPopularityAdmin(admin.ModelAdmin):
+    list_display = ["product", "quantity", "score", "updated_at"]
+    list_select_related = ["product"]
+    ordering = ["-score"]
+    readonly_fields = ["product", "quantity", "score", "updated_at"]
 
 
 @admin.register(Category)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from products.views import CatalogCacheStatsView
+
+urlpatterns = [
+    path("catalog/cache/", CatalogCacheStatsView.as_view(), name="catalog-cache"),
+]
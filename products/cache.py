@@ -0,0 +1,129 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOG_VERSION_KEY = "catalog:version"
+# Version of the product popularity, which moves far more often than the catalog
+POPULARITY_VERSION_KEY = "catalog:popularity:version"
+CATALOG_CACHE_HITS_KEY = "catalog:cache:hits"
+CATALOG_CACHE_MISSES_KEY = "catalog:cache:misses"
+CATALOG_CACHE_TIMEOUT = 60 * 60  # 1 hour
+
+
+def _initial_version():
+    # Derived from the clock so a version lost on eviction never comes back
+    return int(time.time() * 1000)
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _incr_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+        return cache.get(key)
+
+
+def get_catalog_version():
+    return _get_version(CATALOG_VERSION_KEY)
+
+
+def _incr_catalog_version():
+    return _incr_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """
+    Invalidates every cached catalog response in O(1) by moving to a new version.
+
+    The version is bumped right away so the writer sees its own changes, and once
+    more on commit so responses cached meanwhile from uncommitted data are dropped.
+    """
+    _incr_catalog_version()
+    transaction.on_commit(_incr_catalog_version)
+
+
+def get_popularity_version():
+    return _get_version(POPULARITY_VERSION_KEY)
+
+
+def bump_popularity_version():
+    """
+    Invalidates the cached responses depending on the product popularity only,
+    see `build_catalog_cache_key()`. Bumped once the popularity is committed.
+    """
+    transaction.on_commit(lambda: _incr_version(POPULARITY_VERSION_KEY))
+
+
+def _incr_counter(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def record_cache_hit():
+    _incr_counter(CATALOG_CACHE_HITS_KEY)
+
+
+def record_cache_miss():
+    _incr_counter(CATALOG_CACHE_MISSES_KEY)
+
+
+def get_catalog_cache_stats():
+    hits = cache.get(CATALOG_CACHE_HITS_KEY, 0)
+    misses = cache.get(CATALOG_CACHE_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "version": get_catalog_version(),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else None,
+    }
+
+
+def normalize_query_params(query_params):
+    """Sorted `(key, values)` pairs of a QueryDict, ignoring empty values."""
+    normalized = []
+    for key, values in sorted(query_params.lists()):
+        values = sorted(value for value in values if value != "")
+        if values:
+            normalized.append((key, values))
+    return normalized
+
+
+def build_etag(*parts):
+    """Strong ETag derived from the given parts instead of the rendered body."""
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:40]}"'
+
+
+def build_catalog_cache_key(request, view_name, action, kwargs, popularity=False):
+    """
+    Cache key of a catalog response under the current catalog version, and
+    under the popularity version too for `popularity` dependent responses.
+    """
+    # Responses embed absolute URLs, so the scheme and host are part of the key
+    parts = [
+        request.scheme,
+        request.get_host(),
+        view_name,
+        action,
+        sorted(kwargs.items()),
+        normalize_query_params(request.query_params),
+    ]
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+    version = get_catalog_version()
+    if popularity:
+        version = f"{version}:{get_popularity_version()}"
+    return f"catalog:{version}:{digest}"
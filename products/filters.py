@@ -1,4 +1,4 @@
-from django.db.models import Q
+from django.db.models import F
 from django_filters import rest_framework as filters
 
 from .models import Product
@@ -15,16 +15,32 @@ class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
     pass
 
 
+class ProductOrderingFilter(filters.OrderingFilter):
+    """
+    Orders by `current_price`, `name` or `popularity`. The popularity is read from
+    the `ProductPopularity` rows, joined and annotated as `popularity_score` only
+    when asked for, so the other orderings do not pay for the join.
+    """
+
+    def filter(self, qs, value):
+        if any(param.lstrip("-") == "popularity" for param in value or []):
+            qs = qs.filter(popularity__isnull=False).annotate(
+                popularity_score=F("popularity__score")
+            )
+        return super().filter(qs, value)
+
+
 class ProductFilter(filters.FilterSet):
     category = filters.CharFilter(field_name="category__slug")
-    search = filters.CharFilter(method="filter_search", label="Search In Name/Description")
+    search = filters.CharFilter(method="filter_search", label="Search In Name/Category/Description")
     current_price = filters.RangeFilter(label="Current Price")
     discount = DiscountFilter(field_name="discount__percent")
     id_in = NumberInFilter(field_name="id", lookup_expr="in")
-    ordering = filters.OrderingFilter(
+    ordering = ProductOrderingFilter(
         fields=(
             ("current_price", "current_price"),
             ("name", "name"),
+            ("popularity_score", "popularity"),
         ),
     )
 
@@ -35,4 +51,4 @@ class ProductFilter(filters.FilterSet):
     def filter_search(self, queryset, name, value):
         if not value:
             return queryset
-        return queryset.filter(Q(name__icontains=value) | Q(description__icontains=value))
+        return queryset.search(value)
@@ -1,23 +1,12 @@
-import json
-
-from django.core.management.base import BaseCommand
-
 from products.management.commands.utils.add_products_from_dummyjson.productMap import (
     ProductMapSerializer,
 )
+from products.management.commands.utils.import_products import ImportProductsCommand
 
 
-class Command(BaseCommand):
+class Command(ImportProductsCommand):
     help = "Command to products to database from dummyjson"
-
-    def handle(self, *args, **options):
-        self.stdout.write("adding products from dummyjson...")
-        with open(
-            "products/management/commands/utils/add_products_from_dummyjson/data.json"
-        ) as json_file:
-            data = json.load(json_file)
-            for productData in data["products"]:
-                productMap = ProductMapSerializer(data=productData)
-                if productMap.is_valid():
-                    productMap.save()
-        self.stdout.write("Products were added successfully from dummyjson")
+    source = "dummyjson"
+    data_path = "products/management/commands/utils/add_products_from_dummyjson/data.json"
+    data_key = "products"
+    serializer_class = ProductMapSerializer
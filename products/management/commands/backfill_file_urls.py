@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from products.cache import bump_catalog_version
+from products.models import File
+from products.utils.files import build_file_urls
+
+
+class Command(BaseCommand):
+    help = "Store the delivery URL and the variant URLs of product files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Number of files updated per query"
+        )
+        parser.add_argument(
+            "--all", action="store_true", help="Rebuild the URLs of files that already have them"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        files = File.objects.order_by("id").only("id", "file")
+        if not options["all"]:
+            files = files.filter(url="")
+
+        updated, last_id = 0, 0
+        while True:
+            batch = list(files.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            for file in batch:
+                file.url, file.variants = build_file_urls(file.file)
+            File.objects.bulk_update(batch, ["url", "variants"])
+            updated += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f"Updated {updated} files")
+
+        if updated:
+            # bulk_update skips the signals invalidating the cached catalog responses
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"Stored the URLs of {updated} files"))
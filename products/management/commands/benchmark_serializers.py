@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from products.serializers import CategorySerializer, ProductSerializer
+from products.values_serializers import CategoryValuesSerializer, ProductValuesSerializer
+from products.views import CategoryViewSet, ProductViewSet
+
+
+class Command(BaseCommand):
+    help = "Compare the catalog list serializers with their values() fast path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Number of rows serialized")
+        parser.add_argument("--repeat", type=int, default=10, help="Runs per serializer")
+
+    def handle(self, *args, **options):
+        limit, repeat = options["limit"], max(1, options["repeat"])
+        context = {"request": Request(APIRequestFactory().get("/"))}
+        # The querysets of the list endpoints, ordered to compare the same rows
+        cases = [
+            (
+                "products",
+                ProductSerializer,
+                ProductValuesSerializer,
+                ProductViewSet.queryset.order_by("-id"),
+            ),
+            (
+                "categories",
+                CategorySerializer,
+                CategoryValuesSerializer,
+                CategoryViewSet.queryset.order_by("id"),
+            ),
+        ]
+        for name, serializer_class, values_class, queryset in cases:
+
+            def serialize():
+                serializer = serializer_class(queryset[:limit], many=True, context=context)
+                return JSONRenderer().render(serializer.data)
+
+            def serialize_values():
+                values_serializer = values_class(serializer_class(context=context))
+                rows = values_serializer.get_values(queryset)[:limit]
+                return JSONRenderer().render(values_serializer.serialize(rows))
+
+            slow_time, slow = self.measure(serialize, repeat)
+            fast_time, fast = self.measure(serialize_values, repeat)
+            if fast != slow:
+                raise CommandError(f"The {name} fast path output differs from the serializer")
+            self.stdout.write(
+                f"{name}: serializer {slow_time * 1000:.1f} ms, values {fast_time * 1000:.1f} ms, "
+                f"x{slow_time / fast_time:.1f} ({len(fast)} identical bytes)"
+            )
+
+    def measure(self, serialize, repeat):
+        """Best time of `repeat` runs, and the rendered output."""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = serialize()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
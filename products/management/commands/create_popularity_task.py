@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+TASK_NAME = "Update Product Popularity"
+
+
+class Command(BaseCommand):
+    help = f"Create periodic task '{TASK_NAME}' if it does not exist."
+
+    def handle(self, *args, **kwargs):
+        # Orders leaving draft reach the popularity within 15 minutes
+        interval_schedule, created = IntervalSchedule.objects.get_or_create(
+            every=15, period=IntervalSchedule.MINUTES
+        )
+        if created:
+            self.stdout.write(self.style.SUCCESS("15 minutes interval schedule created."))
+
+        if PeriodicTask.objects.filter(name=TASK_NAME).exists():
+            self.stdout.write(self.style.WARNING("Periodic task already exists. No action taken."))
+            return
+
+        PeriodicTask.objects.create(
+            name=TASK_NAME,
+            task="products.tasks.update_product_popularity_task",
+            interval=interval_schedule,
+            enabled=True,
+        )
+
+        self.stdout.write(self.style.SUCCESS("Periodic task for the product popularity created."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from products.utils.co_purchases import CO_PURCHASE_BATCH_SIZE, record_pending_co_purchases
+
+
+class Command(BaseCommand):
+    help = "Command to add the orders past draft not recorded yet to the product co-purchases"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=CO_PURCHASE_BATCH_SIZE,
+            help="Number of orders looked up per query",
+        )
+
+    def handle(self, *args, **options):
+        recorded = record_pending_co_purchases(max(1, options["batch_size"]))
+        self.stdout.write(f"Co-purchases were recorded for {recorded} orders")
@@ -1,16 +1,35 @@
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 
+from products.cache import bump_catalog_version
 from products.models import Product
-from products.utils.slugify import unique_slugify
+from products.utils.slugify import save_with_unique_slug
 
 
 class Command(BaseCommand):
     help = "Command to add slugs to products with no slugs"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Number of products slugified per query"
+        )
+
     def handle(self, *args, **options):
-        products = Product.objects.all()
-        for product in products:
-            if not product.slug:
-                unique_slugify(product, product.name)
-                product.save()
-        self.stdout.write("Slugs were added successfully to products with no slugs")
+        batch_size = max(1, options["batch_size"])
+        products = Product.objects.filter(Q(slug__isnull=True) | Q(slug="")).only("id", "name")
+        updated = 0
+        while True:
+            # Slugified products leave the filter, so the next batch is always the first one
+            batch = list(products.order_by("id")[:batch_size])
+            if not batch:
+                break
+            save_with_unique_slug(
+                batch,
+                [product.name for product in batch],
+                lambda: Product.objects.bulk_update(batch, ["slug"]),
+            )
+            updated += len(batch)
+        if updated:
+            # bulk_update skips the signals invalidating the cached catalog responses
+            bump_catalog_version()
+        self.stdout.write(f"Slugs were added successfully to {updated} products with no slugs")
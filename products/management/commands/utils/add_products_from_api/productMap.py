@@ -1,32 +1,65 @@
 import json
 
-import cloudinary
-import cloudinary.uploader
 from djmoney.money import Money
 from rest_framework import serializers
 
 from products.models import Category, Discount, File, Product
-from products.serializers import CategoryProductSerializer, DiscountSerializer, FileSerializer
+from products.serializers import CategoryProductSerializer, DiscountSerializer
+from products.utils.images import ImageIngestor
+
+
+class FileMapSerializer(serializers.Serializer):
+    # The `url` of the API's FileSerializer is read only
+    url = serializers.URLField()
 
 
 class ProductMapSerializer(serializers.Serializer):
+    name_field = "name"
+
     name = serializers.CharField(max_length=200)
-    files = FileSerializer(many=True)
+    files = FileMapSerializer(many=True)
     price = serializers.DecimalField(max_digits=19, decimal_places=4)
     discount = DiscountSerializer(required=False, allow_null=True)
     category = CategoryProductSerializer()
     description_html = serializers.CharField(allow_blank=True)
 
     def validate_name(self, name):
-        qs = Product.objects.filter(name=name)
-        if len(qs) > 0:
+        # Bulk imports look the names of a whole batch up beforehand
+        existing_names = self.context.get("existing_names")
+        if existing_names is None:
+            exists = Product.objects.filter(name=name).exists()
+        else:
+            exists = name in existing_names
+        if exists:
             raise serializers.ValidationError({"name": "Product with this name already exist"})
         return name
 
+    def get_image_urls(self, validated_data):
+        return [file["url"] for file in validated_data["files"]]
+
+    def to_ingest_item(self, validated_data):
+        discount = validated_data.get("discount")
+        return {
+            "name": validated_data["name"],
+            "description_html": validated_data["description_html"],
+            "price": validated_data["price"],
+            "category": {"name": validated_data["category"]["name"]},
+            "discount": (
+                {
+                    "percent": discount["percent"],
+                    "name": discount["name"],
+                    "active": discount["active"],
+                }
+                if discount
+                else None
+            ),
+            "image_urls": self.get_image_urls(validated_data),
+        }
+
     def create(self, validated_data):
-        validated_discount = validated_data["discount"]
+        validated_discount = validated_data.get("discount")
         discount = None
-        if discount:
+        if validated_discount:
             discount, created = Discount.objects.get_or_create(
                 percent=validated_discount["percent"],
                 defaults={
@@ -46,8 +79,12 @@ class ProductMapSerializer(serializers.Serializer):
             category=category,
         )
         product.save()
-        for file in validated_data["files"]:
-            response = cloudinary.uploader.upload(file["url"])
-            public_id = response["public_id"]
-            File.objects.create(file=public_id, product=product)
+        image_urls = self.get_image_urls(validated_data)
+        # Already done for the whole batch when the ingestor comes from the import
+        image_ingestor = self.context.get("image_ingestor") or ImageIngestor()
+        image_ingestor.ingest(image_urls)
+        for url in image_urls:
+            public_id = image_ingestor.get(url)
+            if public_id:
+                File.objects.create(file=public_id, product=product)
         return product
@@ -1,14 +1,16 @@
 import json
+from decimal import Decimal
 
-import cloudinary
-import cloudinary.uploader
 from djmoney.money import Money
 from rest_framework import serializers
 
 from products.models import Category, Discount, File, Product
+from products.utils.images import ImageIngestor
 
 
 class ProductMapSerializer(serializers.Serializer):
+    name_field = "title"
+
     title = serializers.CharField(max_length=200)
     description = serializers.CharField(max_length=500)
     category = serializers.CharField(max_length=200)
@@ -17,11 +19,41 @@ class ProductMapSerializer(serializers.Serializer):
     discountPercentage = serializers.FloatField()
 
     def validate_title(self, title):
-        qs = Product.objects.filter(name=title)
-        if len(qs) > 0:
+        # Bulk imports look the names of a whole batch up beforehand
+        existing_names = self.context.get("existing_names")
+        if existing_names is None:
+            exists = Product.objects.filter(name=title).exists()
+        else:
+            exists = title in existing_names
+        if exists:
             raise serializers.ValidationError({"title": "Product with this name already exist"})
         return title
 
+    def get_image_urls(self, validated_data):
+        return validated_data["images"]
+
+    def to_ingest_item(self, validated_data):
+        percent = validated_data["discountPercentage"]
+        return {
+            "name": validated_data["title"],
+            "description_html": validated_data["description"],
+            "price": Decimal(str(validated_data["price"])),
+            "category": {
+                "slug": validated_data["category"],
+                "name": validated_data["category"].capitalize(),
+            },
+            "discount": (
+                {
+                    "percent": Decimal(str(percent)).quantize(Decimal("0.01")),
+                    "name": f"{percent} %",
+                    "active": True,
+                }
+                if percent
+                else None
+            ),
+            "image_urls": self.get_image_urls(validated_data),
+        }
+
     def create(self, validated_data):
         discount = None
         if validated_data["discountPercentage"]:
@@ -41,8 +73,12 @@ class ProductMapSerializer(serializers.Serializer):
             category=category,
         )
         product.save()
-        for img_url in validated_data["images"]:
-            response = cloudinary.uploader.upload(img_url)
-            public_id = response["public_id"]
-            File.objects.create(file=public_id, product=product)
+        image_urls = self.get_image_urls(validated_data)
+        # Already done for the whole batch when the ingestor comes from the import
+        image_ingestor = self.context.get("image_ingestor") or ImageIngestor()
+        image_ingestor.ingest(image_urls)
+        for url in image_urls:
+            public_id = image_ingestor.get(url)
+            if public_id:
+                File.objects.create(file=public_id, product=product)
         return product
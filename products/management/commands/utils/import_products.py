@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from products.utils.images import ImageIngestor
+from products.utils.ingest import IMPORT_BATCH_SIZE, ingest_products, iter_json_array
+
+
+class ImportProductsCommand(BaseCommand):
+    """
+    Imports the products of a JSON feed with `serializer_class`, the array of
+    products being the whole document or found under `data_key`. The feed is
+    parsed incrementally and written in batches, the images are uploaded
+    concurrently and the `--checkpoint` file lets a crashed import resume
+    without uploading the same images again.
+    """
+
+    source = ""
+    data_path = ""
+    data_key = None
+    serializer_class = None
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", default=self.data_path, help="JSON feed imported")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent image uploads")
+        parser.add_argument("--retries", type=int, default=3, help="Retries of a failed upload")
+        parser.add_argument("--checkpoint", help="JSON file of the uploaded images, to resume")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"adding products from {self.source}...")
+        image_ingestor = ImageIngestor(
+            max_workers=max(1, options["workers"]),
+            retries=max(0, options["retries"]),
+            checkpoint_path=options["checkpoint"],
+        )
+        with open(options["file"]) as json_file:
+            report = ingest_products(
+                iter_json_array(json_file, self.data_key),
+                self.serializer_class,
+                image_ingestor,
+                max(1, options["batch_size"]),
+            )
+        for url in image_ingestor.failed:
+            self.stderr.write(f"Image could not be uploaded: {url}")
+        self.stdout.write(f"Products were added successfully from {self.source}: {report}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Compare the stored current_price of products with the price computed from discounts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix", action="store_true", help="Recompute current_price for mismatched products"
+        )
+
+    def handle(self, *args, **options):
+        stale = Product.objects.all().with_stale_current_price()
+        stale_ids = list(stale.values_list("id", flat=True))
+        if not stale_ids:
+            self.stdout.write(self.style.SUCCESS("All current prices are up to date"))
+            return
+        self.stdout.write(self.style.WARNING(f"{len(stale_ids)} products have a stale price"))
+        if options["fix"]:
+            Product.objects.filter(id__in=stale_ids).refresh_current_price()
+            self.stdout.write(self.style.SUCCESS(f"Recomputed {len(stale_ids)} current prices"))
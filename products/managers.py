@@ -1,11 +1,49 @@
-from django.db import models
-from django.db.models import Case, DecimalField, F, When
+from decimal import Decimal
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Round
+
+from products.cache import bump_catalog_version
+from products.utils.search import build_search_query, build_search_rank, build_search_vector
+
+# Fields whose changes require the stored `current_price` to be recomputed
+PRICE_FIELDS = {"price", "discount", "discount_id"}
+DISCOUNT_PRICE_FIELDS = {"percent", "active"}
+
+
+def build_current_price_expression(Discount):
+    """
+    Expression computing the current price of each product from its own row,
+    usable in `QuerySet.update()` where joined field references are not allowed.
+    """
+    active_percent = Discount.objects.filter(pk=OuterRef("discount_id"), active=True).values(
+        "percent"
+    )[:1]
+    return ExpressionWrapper(
+        F("price") * (1 - Coalesce(Subquery(active_percent), Value(Decimal(0))) / 100),
+        output_field=DecimalField(max_digits=19, decimal_places=4),
+    )
 
 
 class ProductQuerySet(models.QuerySet):
-    def with_current_price(self):
+    def with_computed_current_price(self):
+        """
+        Annotates `computed_current_price`, the current price computed from the
+        price and the discount at query time. Used to verify the stored column.
+        """
         return self.annotate(
-            current_price=Case(
+            computed_current_price=Case(
                 When(
                     discount__isnull=False,
                     discount__active=True,
@@ -16,10 +54,100 @@ class ProductQuerySet(models.QuerySet):
             )
         )
 
+    def with_stale_current_price(self):
+        """Products whose stored `current_price` does not match the computed one."""
+        return self.with_computed_current_price().exclude(
+            current_price=Round("computed_current_price", 4)
+        )
+
+    def refresh_current_price(self):
+        Discount = self.model._meta.get_field("discount").related_model
+        return super().update(current_price=build_current_price_expression(Discount))
+
+    def refresh_search_vector(self):
+        """Rebuilds the stored `search_vector` of the products in a single UPDATE."""
+        Category = self.model._meta.get_field("category").related_model
+        category_name = Category.objects.filter(pk=OuterRef("category_id")).values("name")[:1]
+        return super().update(
+            search_vector=build_search_vector(
+                F("name"), Subquery(category_name), F("description_text")
+            )
+        )
+
+    def update(self, **kwargs):
+        # Bulk updates skip the post_save signal that invalidates the catalog cache
+        bump_catalog_version()
+        if PRICE_FIELDS.isdisjoint(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list("pk", flat=True))
+            rows = super().update(**kwargs)
+            self.model._default_manager.filter(pk__in=ids).refresh_current_price()
+        return rows
+
+    def search(self, value):
+        """
+        Full-text search on the stored `search_vector`, annotating each product
+        with its `search_rank`.
+        """
+        query = build_search_query(value)
+        return self.filter(search_vector=query).annotate(search_rank=build_search_rank(query))
+
+    def suggest(self, value, limit):
+        """
+        Typo-tolerant prefix matching for the search box, backed by the `pg_trgm`
+        indexes on the product and category names: the `limit` best products whose
+        own name matches, topped up with the latest products of the best matching
+        categories. Each source is bounded by `limit`, so a short prefix matching a
+        large category never sorts the whole category.
+        """
+        ids = list(
+            self.filter(name__trigram_word_similar=value)
+            .annotate(similarity=TrigramWordSimilarity(value, "name"))
+            .order_by("-similarity", "-id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if len(ids) < limit:
+            Category = self.model._meta.get_field("category").related_model
+            categories = (
+                Category.objects.filter(name__trigram_word_similar=value)
+                .annotate(similarity=TrigramWordSimilarity(value, "name"))
+                .order_by("-similarity", "id")
+                .values_list("id", flat=True)[:limit]
+            )
+            for category_id in categories:
+                # Read from the (category, -id) index, stopping after the missing rows
+                ids += (
+                    self.filter(category_id=category_id)
+                    .exclude(pk__in=ids)
+                    .order_by("-id")
+                    .values_list("id", flat=True)[: limit - len(ids)]
+                )
+                if len(ids) >= limit:
+                    break
+        if not ids:
+            return self.none()
+        return self.filter(pk__in=ids).order_by(
+            Case(*(When(pk=pk, then=Value(rank)) for rank, pk in enumerate(ids)))
+        )
+
 
 class ProductManager(models.Manager):
     def get_queryset(self):
         return ProductQuerySet(
             model=self.model,
             using=self._db,
-        ).with_current_price()
+        )
+
+
+class DiscountQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        bump_catalog_version()
+        if DISCOUNT_PRICE_FIELDS.isdisjoint(kwargs):
+            return super().update(**kwargs)
+        Product = self.model._meta.get_field("products").related_model
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list("pk", flat=True))
+            rows = super().update(**kwargs)
+            Product._default_manager.filter(discount__in=ids).refresh_current_price()
+        return rows
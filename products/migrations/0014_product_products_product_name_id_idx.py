@@ -0,0 +1,17 @@
+# Generated by Django 4.2.19 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0013_alter_discount_options_alter_orderitems_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["name", "id"], name="products_product_name_id_idx"),
+        ),
+    ]
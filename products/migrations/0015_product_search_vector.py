@@ -0,0 +1,40 @@
+# Generated by Django 4.2.19 on 2026-10-18 10:03
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from products.utils.search import build_search_vector
+
+
+def populate_search_vector(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    for product in Product.objects.select_related("category").iterator(chunk_size=500):
+        category_name = product.category.name if product.category else ""
+        Product.objects.filter(pk=product.pk).update(
+            search_vector=build_search_vector(
+                product.name, category_name, product.description.plain
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0014_product_products_product_name_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="products_product_search_gin"
+            ),
+        ),
+    ]
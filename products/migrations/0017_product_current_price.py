@@ -0,0 +1,39 @@
+# Generated by Django 4.2.19 on 2026-10-18 12:41
+
+from django.db import migrations, models
+
+from products.managers import build_current_price_expression
+
+
+def populate_current_price(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    Discount = apps.get_model("products", "Discount")
+    Product.objects.update(current_price=build_current_price_expression(Discount))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0016_pg_trgm_name_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="current_price",
+            field=models.DecimalField(
+                decimal_places=4,
+                default=0,
+                editable=False,
+                max_digits=19,
+                verbose_name="Current Price",
+            ),
+        ),
+        migrations.RunPython(populate_current_price, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["current_price", "id"], name="products_product_price_id_idx"
+            ),
+        ),
+    ]
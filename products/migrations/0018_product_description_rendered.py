@@ -0,0 +1,61 @@
+# Generated by Django 4.2.19 on 2026-10-18 14:20
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+from products.utils.description import hash_description, render_description
+from products.utils.search import build_search_vector
+
+
+def populate_rendered_description(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    Category = apps.get_model("products", "Category")
+    batch = []
+    rows = Product.objects.values_list("id", "description").iterator(chunk_size=500)
+    for product_id, json_string in rows:
+        html, text = render_description(json_string)
+        batch.append(
+            Product(
+                id=product_id,
+                description_html=html,
+                description_text=text,
+                description_hash=hash_description(json_string),
+            )
+        )
+        if len(batch) >= 500:
+            Product.objects.bulk_update(
+                batch, ["description_html", "description_text", "description_hash"]
+            )
+            batch = []
+    Product.objects.bulk_update(batch, ["description_html", "description_text", "description_hash"])
+
+    category_name = Category.objects.filter(pk=OuterRef("category_id")).values("name")[:1]
+    Product.objects.update(
+        search_vector=build_search_vector(F("name"), Subquery(category_name), F("description_text"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0017_product_current_price"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="description_hash",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="description_html",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="description_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(populate_rendered_description, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.19 on 2026-10-18 08:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0018_product_description_rendered"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="file",
+            name="url",
+            field=models.URLField(
+                blank=True, default="", editable=False, max_length=500, verbose_name="URL"
+            ),
+        ),
+        migrations.AddField(
+            model_name="file",
+            name="variants",
+            field=models.JSONField(
+                blank=True, default=dict, editable=False, verbose_name="Variants"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.19 on 2026-10-18 08:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0019_file_urls"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="file",
+            options={"ordering": ["id"]},
+        ),
+    ]
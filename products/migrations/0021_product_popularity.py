@@ -0,0 +1,62 @@
+# Generated by Django 4.2.19 on 2026-10-18 09:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_popularity(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductPopularity = apps.get_model("products", "ProductPopularity")
+    ProductPopularity.objects.bulk_create(
+        ProductPopularity(product_id=product_id)
+        for product_id in Product.objects.values_list("id", flat=True).iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0020_file_ordering"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductPopularity",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="popularity",
+                        serialize=False,
+                        to="products.product",
+                    ),
+                ),
+                ("score", models.FloatField(default=0, verbose_name="Score")),
+                ("quantity", models.PositiveIntegerField(default=0, verbose_name="Units Sold")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "Product Popularity",
+            },
+        ),
+        migrations.RunPython(create_popularity, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name="order",
+            name="popularity_recorded_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(("popularity_recorded_at__isnull", True)),
+                fields=["id"],
+                name="products_order_unrecorded_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productpopularity",
+            index=models.Index(fields=["score", "product"], name="products_popularity_score_idx"),
+        ),
+    ]
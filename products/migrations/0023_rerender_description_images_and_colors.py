@@ -0,0 +1,44 @@
+from django.db import migrations
+from django.db.models import Q
+
+from products.utils.description import hash_description, render_description
+
+
+def rerender_descriptions(apps, schema_editor):
+    # Embedded images and colors were dropped by the first rendering
+    Product = apps.get_model("products", "Product")
+    rows = (
+        Product.objects.filter(
+            Q(description__contains="data:image") | Q(description__contains="style")
+        )
+        .values_list("id", "description")
+        .iterator(chunk_size=500)
+    )
+    batch = []
+    for product_id, json_string in rows:
+        html, text = render_description(json_string)
+        batch.append(
+            Product(
+                id=product_id,
+                description_html=html,
+                description_text=text,
+                description_hash=hash_description(json_string),
+            )
+        )
+        if len(batch) >= 500:
+            Product.objects.bulk_update(
+                batch, ["description_html", "description_text", "description_hash"]
+            )
+            batch = []
+    Product.objects.bulk_update(batch, ["description_html", "description_text", "description_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0022_product_co_purchase"),
+    ]
+
+    operations = [
+        migrations.RunPython(rerender_descriptions, migrations.RunPython.noop),
+    ]
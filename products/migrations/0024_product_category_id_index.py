@@ -0,0 +1,17 @@
+# Generated by Django 4.2.19 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0023_rerender_description_images_and_colors"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["category", "-id"], name="products_product_cat_id_idx"),
+        ),
+    ]
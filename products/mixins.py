@@ -1,3 +1,16 @@
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from products.cache import (
+    CATALOG_CACHE_TIMEOUT,
+    build_catalog_cache_key,
+    build_etag,
+    record_cache_hit,
+    record_cache_miss,
+)
 from products.utils.orders import get_current_draft_order
 
 
@@ -8,3 +21,137 @@ class CartInitiationMixin:
 
     def initiate_cart(self, request):
         self.cart = get_current_draft_order(request)
+
+
+class CatalogCacheKeyMixin:
+    def get_catalog_cache_key(self, request, kwargs):
+        return build_catalog_cache_key(
+            request, self.basename, self.action, kwargs, self.depends_on_popularity(request)
+        )
+
+    def depends_on_popularity(self, request):
+        """Whether the response follows the product popularity, keyed by its version too."""
+        return False
+
+
+class CatalogCacheMixin(CatalogCacheKeyMixin):
+    """
+    Caches the response data of `list` and `retrieve` under the current catalog
+    version, so any catalog change invalidates every entry at once.
+    Set `catalog_cache_enabled = False` on a view to opt out.
+    """
+
+    catalog_cache_enabled = True
+    catalog_cache_timeout = CATALOG_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(request, super().retrieve, *args, **kwargs)
+
+    def get_cached_response(self, request, handler, *args, **kwargs):
+        if not self.catalog_cache_enabled:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_catalog_cache_key(request, kwargs)
+        data = cache.get(key)
+        if data is not None:
+            record_cache_hit()
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        record_cache_miss()
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, self.catalog_cache_timeout)
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers conditional GET requests (`If-None-Match` / `If-Modified-Since`) with
+    a 304 before anything is serialized. Views provide the validators through
+    `get_conditional_validators`, which must be cheaper than building the response.
+    """
+
+    conditional_actions = ("list", "retrieve")
+
+    def list(self, request, *args, **kwargs):
+        if "list" not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self.get_conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if "retrieve" not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.get_conditional_response(request, super().retrieve, *args, **kwargs)
+
+    def get_conditional_validators(self, request, *args, **kwargs):
+        """Returns an `(etag, last_modified)` tuple, either of them may be None."""
+        return None, None
+
+    def get_conditional_response(self, request, handler, *args, **kwargs):
+        etag, last_modified = self.get_conditional_validators(request, *args, **kwargs)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            # Handlers may write (e.g. refreshed cart totals), send the current validators
+            etag, last_modified = self.get_conditional_validators(request, *args, **kwargs)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+        if etag:
+            response["ETag"] = etag
+        if timestamp:
+            response["Last-Modified"] = http_date(timestamp)
+        # The representation depends on the negotiated renderer
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+
+class CatalogConditionalGetMixin(ConditionalGetMixin, CatalogCacheKeyMixin):
+    """
+    Conditional GET for read-only catalog views: the ETag is derived from the
+    catalog version and the request, so a revalidation does not hit the database.
+    No Last-Modified is sent, the `updated_at` of the rows misses changes made
+    elsewhere (e.g. discounts repricing products, products shown in categories).
+    """
+
+    def get_conditional_validators(self, request, *args, **kwargs):
+        key = self.get_catalog_cache_key(request, kwargs)
+        # Each negotiated representation gets its own ETag
+        return build_etag(key, request.accepted_media_type), None
+
+
+class ValuesListMixin:
+    """
+    Serves `list` from `.values()` rows with `values_serializer_class`, which
+    produces the same output as the view's serializer without instantiating its
+    fields per row. `values_columns` are extra columns read by the paginator.
+    Set `values_serializer_class = None` to fall back to the serializer.
+    """
+
+    values_serializer_class = None
+    values_columns = ()
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        values_serializer = self.get_values_serializer()
+        queryset = values_serializer.get_values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.serialize(page))
+        return Response(values_serializer.serialize(queryset))
+
+    def get_values_serializer(self):
+        values_serializer = self.values_serializer_class(
+            self.get_serializer_class()(context=self.get_serializer_context())
+        )
+        for column in self.values_columns:
+            values_serializer.add_column(column)
+        return values_serializer
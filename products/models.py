@@ -1,14 +1,24 @@
 import uuid
+from decimal import ROUND_HALF_UP, Decimal
 
 from cloudinary.models import CloudinaryField
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.files.uploadedfile import UploadedFile
 from django.core.validators import MinValueValidator
 from django.db import models
 from django_quill.fields import QuillField
 from djmoney.models.fields import MoneyField
 
-from products.managers import ProductManager
-from products.utils.slugify import unique_slugify
+from products.managers import PRICE_FIELDS, DiscountQuerySet, ProductManager
+from products.utils.description import hash_description, render_description
+from products.utils.files import build_file_urls
+from products.utils.search import build_search_vector
+from products.utils.slugify import save_with_unique_slug
+
+# Columns rendered from the Quill `description` when it changes
+DESCRIPTION_FIELDS = {"description_html", "description_text", "description_hash"}
 
 
 class Product(models.Model):
@@ -31,6 +41,13 @@ class Product(models.Model):
         related_name="products",
     )
     description = QuillField("Description", blank=True, null=True)
+    description_html = models.TextField(blank=True, default="", editable=False)
+    description_text = models.TextField(blank=True, default="", editable=False)
+    description_hash = models.CharField(max_length=64, blank=True, default="", editable=False)
+    current_price = models.DecimalField(
+        "Current Price", max_digits=19, decimal_places=4, default=0, editable=False
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -38,20 +55,108 @@ class Product(models.Model):
         return self.name
 
     def save(self, **kwargs):
-        unique_slugify(self, self.name)
-        super(Product, self).save(**kwargs)
+        update_fields = kwargs.get("update_fields")
+        description_loaded = "description" not in self.get_deferred_fields()
+        if description_loaded and (update_fields is None or "description" in update_fields):
+            self.render_description()
+        self.search_vector = self.get_search_vector()
+        if update_fields is not None:
+            update_fields = {*update_fields, "search_vector"}
+            if "description" in update_fields:
+                update_fields |= DESCRIPTION_FIELDS
+            if not PRICE_FIELDS.isdisjoint(update_fields):
+                update_fields.add("current_price")
+            kwargs["update_fields"] = update_fields
+        self.current_price = self.get_current_price()
+        save_with_unique_slug([self], [self.name], lambda: super(Product, self).save(**kwargs))
+
+    def render_description(self):
+        """
+        Renders the Quill description into the stored HTML and plain text, which
+        are read instead of parsing the Quill JSON on every serialization.
+        """
+        json_string = self.description.json_string
+        description_hash = hash_description(json_string)
+        if description_hash != self.description_hash:
+            self.description_html, self.description_text = render_description(json_string)
+            self.description_hash = description_hash
+
+    def get_search_vector(self):
+        category_name = self.category.name if self.category else ""
+        return build_search_vector(self.name, category_name, self.description_text)
+
+    def get_current_price(self):
+        return self.get_discount_price().quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP)
 
     def get_discount_price(self):
         if self.discount and self.discount.active:
-            discount_amount = self.price.amount * (self.discount.percent / 100)
+            discount_amount = self.price.amount * (Decimal(str(self.discount.percent)) / 100)
             return self.price.amount - discount_amount
         return self.price.amount
 
     class Meta:
         ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["name", "id"], name="products_product_name_id_idx"),
+            models.Index(fields=["current_price", "id"], name="products_product_price_id_idx"),
+            models.Index(fields=["category", "-id"], name="products_product_cat_id_idx"),
+            GinIndex(fields=["search_vector"], name="products_product_search_gin"),
+            GinIndex(
+                fields=["name"], opclasses=["gin_trgm_ops"], name="products_product_name_trgm"
+            ),
+        ]
+
+
+class ProductPopularity(models.Model):
+    """
+    Units sold of a product, and the same units weighted by a forward decay (see
+    `products.utils.popularity`). Maintained incrementally from the items of
+    orders leaving draft, every product has a row.
+    """
+
+    product = models.OneToOneField(
+        "Product", on_delete=models.CASCADE, primary_key=True, related_name="popularity"
+    )
+    score = models.FloatField("Score", default=0)
+    quantity = models.PositiveIntegerField("Units Sold", default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Product Popularity"
+        indexes = [
+            models.Index(fields=["score", "product"], name="products_popularity_score_idx"),
+        ]
+
+    def __str__(self):
+        return f"Popularity of {self.product_id}"
+
+
+class ProductCoPurchase(models.Model):
+    """
+    Number of orders containing both `product` and `other`. Each pair is stored
+    both ways, so the products bought with a product are one indexed read.
+    """
+
+    product = models.ForeignKey("Product", on_delete=models.CASCADE, related_name="co_purchases")
+    other = models.ForeignKey("Product", on_delete=models.CASCADE, related_name="+")
+    count = models.PositiveIntegerField("Orders", default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "other"], name="products_copurchase_product_other_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["product", "-count", "other"], name="products_copurchase_top_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} bought with {self.other_id} ({self.count})"
 
 
 class Discount(models.Model):
+    objects = DiscountQuerySet.as_manager()
     name = models.CharField("Name", max_length=250)
     percent = models.DecimalField("Percentage", max_digits=5, decimal_places=2)
     active = models.BooleanField("Active", default=True)
@@ -62,14 +167,40 @@ class Discount(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, **kwargs):
+        super(Discount, self).save(**kwargs)
+        self.products.all().refresh_current_price()
+
 
 class File(models.Model):
     product = models.ForeignKey("Product", on_delete=models.CASCADE, related_name="files")
     name = models.CharField("Name", max_length=250, blank=True, null=True)
     file = CloudinaryField("file")
+    url = models.URLField("URL", max_length=500, blank=True, default="", editable=False)
+    variants = models.JSONField("Variants", blank=True, default=dict, editable=False)
+
+    def save(self, **kwargs):
+        file_field = self._meta.get_field("file")
+        if isinstance(self.file, UploadedFile):
+            # Upload now rather than during the save, the URLs need the uploaded resource
+            file_field.pre_save(self, self._state.adding)
+        self.set_urls()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "file" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "url", "variants"}
+        super(File, self).save(**kwargs)
+
+    class Meta:
+        # Keeps the order of a product's images stable across queries
+        ordering = ["id"]
+
+    def set_urls(self):
+        """Stores the delivery URL and the variant URLs of the Cloudinary resource."""
+        self.url, self.variants = build_file_urls(self._meta.get_field("file").to_python(self.file))
 
     def get_url(self):
-        return self.file.build_url()
+        # Rows saved before the URLs were stored fall back to building it
+        return self.url or self.file.build_url()
 
 
 class Category(models.Model):
@@ -81,9 +212,32 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["name"], opclasses=["gin_trgm_ops"], name="products_category_name_trgm"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Name as stored, missing when deferred
+        instance._stored_name = instance.__dict__.get("name")
+        return instance
+
     def save(self, **kwargs):
-        unique_slugify(self, self.name)
-        super(Category, self).save(**kwargs)
+        update_fields = kwargs.get("update_fields")
+        # The search vectors of the products include the category name
+        renamed = (
+            not self._state.adding
+            and (update_fields is None or "name" in update_fields)
+            and self.name != getattr(self, "_stored_name", None)
+        )
+        save_with_unique_slug([self], [self.name], lambda: super(Category, self).save(**kwargs))
+        if renamed:
+            self.products.all().refresh_search_vector()
+        self._stored_name = self.name
 
 
 class Order(models.Model):
@@ -107,9 +261,22 @@ class Order(models.Model):
     order_date = models.DateTimeField(auto_now_add=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     status = models.CharField(max_length=50, choices=OrderStatus.choices, default=OrderStatus.DRAFT)
+    # When the items were added to the product popularity, null until then
+    popularity_recorded_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # When the items were added to the co-purchases, null until then
+    co_purchases_recorded_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(popularity_recorded_at__isnull=True),
+                name="products_order_unrecorded_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} ({self.get_status_display()})"
 
@@ -121,8 +288,11 @@ class Order(models.Model):
 
     def set_total_amount(self):
         total = sum(item.set_subtotal() for item in self.items.all())
-        self.total_amount = total
-        self.save()
+        total = Decimal(total).quantize(Decimal("0.01"), ROUND_HALF_UP)
+        # Only write when the total moved, `updated_at` is used to validate cached carts
+        if total != self.total_amount:
+            self.total_amount = total
+            self.save()
         return self.total_amount
 
 
@@ -176,8 +346,11 @@ class OrderItems(models.Model):
         return f"{self.quantity} x {self.product}"
 
     def set_subtotal(self):
-        self.subtotal = self.product.get_discount_price() * self.quantity
-        self.save()
+        subtotal = self.product.get_discount_price() * self.quantity
+        subtotal = subtotal.quantize(Decimal("0.01"), ROUND_HALF_UP)
+        if subtotal != self.subtotal:
+            self.subtotal = subtotal
+            self.save()
         return self.subtotal
 
     class Meta:
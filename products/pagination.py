@@ -0,0 +1,170 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ProductCursorPagination(BasePagination):
+    """
+    Keyset pagination driven by the `ordering` choices of the view's FilterSet.
+
+    Every page is fetched with a `WHERE (field, id) > (value, id)` style condition
+    on the last row of the previous page instead of an OFFSET, so deep pages cost
+    the same as the first one. `id` is always used as a tiebreaker to keep the
+    ordering stable when several rows share the same value.
+
+    The total count is opt-in (`?with_count=true`) since it requires a COUNT(*).
+    """
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    count_query_param = "with_count"
+    tiebreaker = "id"
+    default_ordering = ("id", True)
+    relevance_ordering = ("search_rank", True)
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request)
+        position, last_id, reverse = cursor if cursor else (None, None, False)
+
+        self.count = queryset.count() if self.count_requested(request) else None
+
+        descending = self.descending != reverse
+        queryset = queryset.order_by(*self.get_order_by(self.field, descending))
+        if cursor:
+            queryset = queryset.filter(self.get_keyset_filter(descending, position, last_id))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        self.next_cursor = self.encode_cursor(results[-1], False) if has_next and results else None
+        self.previous_cursor = (
+            self.encode_cursor(results[0], True) if has_previous and results else None
+        )
+        return results
+
+    def get_paginated_response(self, data):
+        response_data = OrderedDict()
+        if self.count is not None:
+            response_data["count"] = self.count
+        response_data["next"] = self.get_next_link()
+        response_data["previous"] = self.get_previous_link()
+        response_data["results"] = data
+        return Response(response_data)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def count_requested(self, request):
+        value = request.query_params.get(self.count_query_param, "")
+        return value.lower() in ("1", "true", "yes")
+
+    def get_ordering_fields(self, view):
+        """
+        Returns the `{param: field_name}` mapping exposed by the `ordering` filter
+        of the view's FilterSet, so pagination follows the same choices.
+        """
+        filterset_class = getattr(view, "filterset_class", None)
+        if filterset_class is None:
+            return {}
+        ordering_filter = filterset_class.base_filters.get(self.ordering_query_param)
+        if ordering_filter is None:
+            return {}
+        return dict(ordering_filter.param_map)
+
+    def get_ordering(self, request, queryset, view):
+        allowed = self.get_ordering_fields(view)
+        params = request.query_params.get(self.ordering_query_param, "")
+        for param in params.split(","):
+            param = param.strip()
+            name = param.lstrip("-")
+            if name in allowed:
+                return allowed[name], param.startswith("-")
+        if self.relevance_ordering[0] in queryset.query.annotations:
+            return self.relevance_ordering
+        return self.default_ordering
+
+    def get_order_by(self, field, descending):
+        prefix = "-" if descending else ""
+        if field == self.tiebreaker:
+            return [f"{prefix}{self.tiebreaker}"]
+        return [f"{prefix}{field}", f"{prefix}{self.tiebreaker}"]
+
+    def get_keyset_filter(self, descending, position, last_id):
+        lookup = "lt" if descending else "gt"
+        tiebreaker_filter = Q(**{f"{self.tiebreaker}__{lookup}": last_id})
+        if self.field == self.tiebreaker:
+            return tiebreaker_filter
+        return Q(**{f"{self.field}__{lookup}": position}) | (
+            Q(**{self.field: position}) & tiebreaker_filter
+        )
+
+    def get_position(self, obj, field):
+        if isinstance(obj, dict):
+            return obj[field]
+        for attr in field.split("__"):
+            obj = getattr(obj, attr)
+        return obj
+
+    def encode_cursor(self, obj, reverse):
+        position = self.get_position(obj, self.field)
+        payload = {
+            "p": None if position is None else str(position),
+            "i": self.get_position(obj, self.tiebreaker),
+            "r": int(reverse),
+        }
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            return payload["p"], int(payload["i"]), bool(payload["r"])
+        except (binascii.Error, KeyError, TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        return self.next_cursor
+
+    def get_previous_link(self):
+        return self.previous_cursor
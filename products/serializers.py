@@ -1,6 +1,7 @@
 import stripe
 from django.conf import settings
 from rest_framework import serializers
+from rest_framework.utils.urls import replace_query_param
 
 from products.models import (
     Category,
@@ -12,10 +13,15 @@ from products.models import (
     Payment,
     Product,
 )
+from products.utils.fieldsets import get_sparse_field_names
 from products.utils.orders import set_order_to_processing
+from products.utils.urls import LOOKUP_PLACEHOLDER, fill_url_template
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
+# Number of products embedded in each category
+PRODUCT_PREVIEW_SIZE = 4
+
 
 class DiscountSerializer(serializers.ModelSerializer):
     class Meta:
@@ -24,14 +30,11 @@ class DiscountSerializer(serializers.ModelSerializer):
 
 
 class FileSerializer(serializers.ModelSerializer):
-    url = serializers.SerializerMethodField()
+    url = serializers.CharField(source="get_url", read_only=True)
 
     class Meta:
         model = File
-        fields = ["url"]
-
-    def get_url(self, obj):
-        return obj.get_url()
+        fields = ["url", "variants"]
 
 
 class CategoryProductSerializer(serializers.HyperlinkedModelSerializer):
@@ -44,7 +47,29 @@ class CategoryProductSerializer(serializers.HyperlinkedModelSerializer):
         fields = ["url", "slug", "id", "name"]
 
 
-class ProductSerializer(serializers.HyperlinkedModelSerializer):
+class SparseFieldsetsMixin:
+    """
+    Restricts the fields of the top-level serializer to those selected with the
+    `?fields=` / `?omit=` query params. Nested serializers always emit every field.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if request is None or not self.is_top_level():
+            return fields
+        query_params = getattr(request, "query_params", request.GET)
+        names = get_sparse_field_names(query_params, fields)
+        return {name: fields[name] for name in names}
+
+    def is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+
+class ProductSerializer(SparseFieldsetsMixin, serializers.HyperlinkedModelSerializer):
     url = serializers.HyperlinkedIdentityField(
         view_name="products:product-detail", lookup_field="slug"
     )
@@ -52,10 +77,6 @@ class ProductSerializer(serializers.HyperlinkedModelSerializer):
     discount = DiscountSerializer()
     current_price = serializers.ReadOnlyField()
     files = FileSerializer(many=True)
-    description_html = serializers.SerializerMethodField()
-
-    def get_description_html(self, instance: Product):
-        return str(instance.description.html)
 
     class Meta:
         model = Product
@@ -75,15 +96,64 @@ class ProductSerializer(serializers.HyperlinkedModelSerializer):
         ]
 
 
+class ProductSuggestionSerializer(serializers.ModelSerializer):
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ["slug", "name", "thumbnail"]
+
+    def get_thumbnail(self, obj):
+        files = obj.files.all()
+        if not files:
+            return None
+        thumbnail = files[0].variants.get("thumbnail")
+        return thumbnail["url"] if thumbnail else files[0].get_url()
+
+
+class ProductCardSerializer(serializers.HyperlinkedModelSerializer):
+    """The few fields a product card needs, for previews embedded in other resources."""
+
+    url = serializers.HyperlinkedIdentityField(
+        view_name="products:product-detail", lookup_field="slug"
+    )
+    current_price = serializers.ReadOnlyField()
+    files = FileSerializer(many=True)
+
+    class Meta:
+        model = Product
+        fields = ["url", "slug", "id", "name", "current_price", "files"]
+
+
+class CategoryProductsURLField(serializers.HyperlinkedIdentityField):
+    """Link to the paginated, filterable product list restricted to the category."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("view_name", "products:product-list")
+        kwargs.setdefault("lookup_field", "slug")
+        super().__init__(**kwargs)
+
+    def get_url_template(self, request, format):
+        url = self.reverse(self.view_name, request=request, format=format)
+        return replace_query_param(url, "category", LOOKUP_PLACEHOLDER)
+
+    def get_url(self, obj, view_name, request, format):
+        template = self.get_url_template(request, format)
+        return fill_url_template(template, getattr(obj, self.lookup_field))
+
+
 class CategorySerializer(serializers.HyperlinkedModelSerializer):
     url = serializers.HyperlinkedIdentityField(
         view_name="products:category-detail", lookup_field="slug"
     )
-    products = ProductSerializer(many=True, read_only=True)
+    product_count = serializers.IntegerField(read_only=True)
+    # Latest products only, the full list is served by `products_url`
+    products = ProductCardSerializer(many=True, read_only=True, source="preview_products")
+    products_url = CategoryProductsURLField()
 
     class Meta:
         model = Category
-        fields = ["url", "slug", "id", "name", "products"]
+        fields = ["url", "slug", "id", "name", "product_count", "products", "products_url"]
 
 
 class CartItemsSerializer(serializers.ModelSerializer):
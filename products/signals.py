@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from products.cache import bump_catalog_version
+from products.models import Category, Discount, File, Order, OrderItems, Product, ProductPopularity
+from products.tasks import record_order_co_purchases_task
+
+
+@receiver(pre_delete, sender=Discount)
+def remember_discounted_products(sender, instance: Discount, **kwargs):
+    """
+    Deleting a discount sets `Product.discount` to NULL with a bulk update, keep
+    the affected products to refresh their stored `current_price` afterwards.
+    """
+    instance._discounted_product_ids = list(instance.products.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Discount)
+def refresh_discounted_products(sender, instance: Discount, **kwargs):
+    product_ids = getattr(instance, "_discounted_product_ids", [])
+    if product_ids:
+        Product.objects.filter(id__in=product_ids).refresh_current_price()
+
+
+@receiver(post_save, sender=Product)
+def create_product_popularity(sender, instance: Product, created, raw=False, **kwargs):
+    """Every product has a popularity row, the popularity ordering joins on it."""
+    if created and not raw:
+        ProductPopularity.objects.get_or_create(product=instance)
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Discount)
+@receiver([post_save, post_delete], sender=File)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """Catalog changes move the cached catalog responses to a new version."""
+    bump_catalog_version()
+
+
+@receiver([post_save, post_delete], sender=OrderItems)
+def touch_order(sender, instance: OrderItems, **kwargs):
+    """Item changes move the order's `updated_at`, which validates cached carts."""
+    Order.objects.filter(pk=instance.order_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Order)
+def schedule_co_purchases(sender, instance: Order, raw=False, **kwargs):
+    """Orders leaving draft add their product pairs to the co-purchases once committed."""
+    if raw or instance.co_purchases_recorded_at is not None:
+        return
+    if instance.status in (Order.OrderStatus.DRAFT, Order.OrderStatus.CANCELED):
+        return
+    order_id = instance.pk
+    transaction.on_commit(lambda: record_order_co_purchases_task.delay(order_id))
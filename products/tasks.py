@@ -1,13 +1,27 @@
 import logging
 
 from celery import shared_task
+from django.conf import settings
 from django.core.cache import cache
 from django.core.management import call_command
+from django.db import DatabaseError
 from django.utils import timezone
 
+from ai.models import PendingIndexUpdate
+from products.utils.co_purchases import record_order_co_purchases
+from products.utils.locks import advisory_lock
+from products.utils.popularity import create_missing_popularity, record_order_popularity
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Held while the product index is rebuilt or updated, both write the same files
+PRODUCT_INDEX_LOCK_NAME = "product_index"
+# Delay before an update waiting for the index lock is queued again
+PRODUCT_INDEX_LOCK_RETRY_DELAY = 30
+# Set while a batched update of the product index is scheduled
+PRODUCT_INDEX_UPDATE_SCHEDULED_KEY = "product_index:update_scheduled"
+
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=300)  # 5 minutes
 def rebuild_product_index_task(self, reason: str):
@@ -17,34 +31,99 @@ def rebuild_product_index_task(self, reason: str):
     """
     logger.info("Starting product index rebuild task. Reason: %s", reason)
 
-    # Check if rebuild is already in progress
-    if cache.get("rebuild_index_scheduled"):
-        logger.warning("Another rebuild is in progress. Retrying in 5 minutes. Reason: %s", reason)
-        raise self.retry(
-            exc=Exception("Another rebuild is in progress"), countdown=300  # Retry in 5 minutes
-        )
+    # Taken unless a rebuild or an update holds it, in any worker process
+    with advisory_lock(PRODUCT_INDEX_LOCK_NAME) as acquired:
+        if not acquired:
+            logger.warning(
+                "Another rebuild is in progress. Retrying in 5 minutes. Reason: %s", reason
+            )
+            raise self.retry(
+                exc=Exception("Another rebuild is in progress"), countdown=300  # Retry in 5 minutes
+            )
+        logger.info("Product index lock taken. Reason: %s", reason)
+
+        try:
+            # Perform the rebuild
+            call_command("rebuild_product_index")
+            logger.info("Product index rebuild completed successfully. Reason: %s", reason)
+
+            # Log the rebuild reason with timestamp
+            timestamp = timezone.now().isoformat()
+            cache.set("last_rebuild_reason", f"{timestamp}: {reason}", timeout=86400)  # 24 hours
+            logger.info("Rebuild reason logged: %s: %s", timestamp, reason)
+
+        except Exception as e:
+            logger.error("Error during product index rebuild: %s. Reason: %s", str(e), reason)
+            raise self.retry(exc=e)
+
+
+def schedule_product_index_update(reason: str):
+    """
+    Schedules the update applying the pending product index updates in
+    `VECTOR_INDEX_UPDATE_DELAY` seconds, unless one is scheduled already: each
+    update publishes and shares the whole index, changes are batched.
+    """
+    delay = settings.VECTOR_INDEX_UPDATE_DELAY
+    if cache.add(PRODUCT_INDEX_UPDATE_SCHEDULED_KEY, reason, timeout=delay):
+        update_product_index_task.apply_async((reason,), countdown=delay)
+
+
+@shared_task(bind=True, max_retries=10, default_retry_delay=60)
+def update_product_index_task(self, reason: str):
+    """
+    Celery task replacing the vectors of the products with pending updates in
+    the product index, instead of embedding the whole catalog again. While a
+    rebuild or another update writes the index, the update is queued again, as
+    a new task, for as long as it takes: retries are left for errors. Pending
+    updates are only deleted once applied.
+    """
+    logger.info("Starting product index update. Reason: %s", reason)
+
+    with advisory_lock(PRODUCT_INDEX_LOCK_NAME) as acquired:
+        if not acquired:
+            logger.info(
+                "The product index is being written. Queued again in %ss. Reason: %s",
+                PRODUCT_INDEX_LOCK_RETRY_DELAY,
+                reason,
+            )
+            update_product_index_task.apply_async(
+                (reason,), countdown=PRODUCT_INDEX_LOCK_RETRY_DELAY
+            )
+            return
+
+        try:
+            call_command("update_product_index")
+            logger.info("Product index update completed successfully. Reason: %s", reason)
+        except Exception as e:
+            logger.error("Error during product index update: %s. Reason: %s", str(e), reason)
+            raise self.retry(exc=e)
+
+    # Changes recorded while the update ran, after it was scheduled
+    if PendingIndexUpdate.objects.exists():
+        schedule_product_index_update(reason)
+
+
+@shared_task
+def update_product_popularity_task():
+    """
+    Periodic task adding the orders that left draft since the last run to the
+    product popularity. Runs are incremental and safe to overlap.
+    """
+    create_missing_popularity()
+    recorded = record_order_popularity()
+    logger.info("Product popularity updated from %s orders", recorded)
+    return recorded
+
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def record_order_co_purchases_task(self, order_id):
+    """
+    Adds the product pairs of an order that left draft to the co-purchases.
+    Concurrent orders may deadlock on shared pairs, the transaction is rolled
+    back and the task retried.
+    """
     try:
-        # Set rebuild in progress flag
-        cache.set("rebuild_index_scheduled", True, timeout=300)  # 5 minutes timeout
-        logger.info("Rebuild in progress flag set. Reason: %s", reason)
-
-        # Perform the rebuild
-        call_command("rebuild_product_index")
-        logger.info("Product index rebuild completed successfully. Reason: %s", reason)
-
-        # Log the rebuild reason with timestamp
-        timestamp = timezone.now().isoformat()
-        cache.set("last_rebuild_reason", f"{timestamp}: {reason}", timeout=86400)  # 24 hours
-        logger.info("Rebuild reason logged: %s: %s", timestamp, reason)
-
-    except Exception as e:
-        # Clear the rebuild flag on error
-        cache.delete("rebuild_index_scheduled")
-        logger.error("Error during product index rebuild: %s. Reason: %s", str(e), reason)
+        return record_order_co_purchases(order_id)
+    except DatabaseError as e:
+        logger.warning("Recording the co-purchases of order %s failed: %s", order_id, e)
         raise self.retry(exc=e)
-
-    finally:
-        # Always clear the rebuild flag when done
-        cache.delete("rebuild_index_scheduled")
-        logger.info("Rebuild in progress flag cleared. Reason: %s", reason)
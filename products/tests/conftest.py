@@ -1,6 +1,7 @@
 from contextlib import contextmanager
 from unittest.mock import MagicMock, patch
 
+import cloudinary
 import pytest
 from django.contrib.auth.models import User
 from django.urls import reverse
@@ -9,6 +10,12 @@ from djmoney.money import Money
 from products.tests.factories import DiscountFactory, ProductFactory
 
 
+@pytest.fixture(autouse=True)
+def cloudinary_cloud_name(monkeypatch):
+    # Building delivery URLs requires a cloud name, even though nothing is uploaded
+    monkeypatch.setattr(cloudinary.config(), "cloud_name", "test-cloud")
+
+
 @pytest.fixture
 def product():
     return ProductFactory()
@@ -6,7 +6,7 @@ from djmoney.money import Money
 from factory.django import DjangoModelFactory
 from faker import Faker
 
-from products.models import Category, Discount, Order, OrderAddress, OrderItems, Product
+from products.models import Category, Discount, File, Order, OrderAddress, OrderItems, Product
 
 fake = Faker()
 
@@ -42,6 +42,15 @@ class ProductFactory(DjangoModelFactory):
     category = factory.SubFactory(CategoryFactory)
 
 
+class FileFactory(DjangoModelFactory):
+    class Meta:
+        model = File
+
+    product = factory.SubFactory(ProductFactory)
+    name = factory.Sequence(lambda n: f"File {n}")
+    file = factory.Sequence(lambda n: f"products/file_{n}")
+
+
 class CartFactory(DjangoModelFactory):
     class Meta:
         model = Order
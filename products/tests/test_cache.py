@@ -0,0 +1,73 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from djmoney.money import Money
+from rest_framework import status
+
+from products.cache import get_catalog_version
+from products.models import Product
+from products.tests.factories import CategoryFactory, ProductFactory
+from products.views import ProductViewSet
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+    def test_list_is_served_from_cache(self, api_client, products):
+        url = reverse("products:product-list")
+        first = api_client.get(url)
+        second = api_client.get(url)
+        assert first["X-Cache"] == "MISS"
+        assert second["X-Cache"] == "HIT"
+        assert second.data == first.data
+
+    def test_query_params_are_normalized(self, api_client, products):
+        url = reverse("products:product-list")
+        api_client.get(url, {"ordering": "name", "page_size": 2})
+        response = api_client.get(url + "?page_size=2&search=&ordering=name")
+        assert response["X-Cache"] == "HIT"
+
+    def test_catalog_changes_bump_the_version(self, api_client, product):
+        url = reverse("products:product-detail", kwargs={"slug": product.slug})
+        api_client.get(url)
+        version = get_catalog_version()
+
+        product.price = Money(12, "USD")
+        product.save()
+        assert get_catalog_version() != version
+
+        response = api_client.get(url)
+        assert response["X-Cache"] == "MISS"
+        assert float(response.data["price"]) == 12
+
+    def test_bulk_updates_bump_the_version(self, api_client, products):
+        url = reverse("products:category-list")
+        CategoryFactory()
+        api_client.get(url)
+        version = get_catalog_version()
+        Product.objects.update(name="Bulk renamed")
+        assert get_catalog_version() != version
+
+    def test_view_opt_out(self, api_client, products, monkeypatch):
+        monkeypatch.setattr(ProductViewSet, "catalog_cache_enabled", False)
+        url = reverse("products:product-list")
+        api_client.get(url)
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert "X-Cache" not in response
+
+    def test_cache_stats(self, api_client):
+        ProductFactory()
+        url = reverse("products:product-list")
+        api_client.get(url)
+        api_client.get(url)
+
+        stats_url = reverse("admin_products:catalog-cache")
+        assert api_client.get(stats_url).status_code == status.HTTP_403_FORBIDDEN
+
+        admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+        api_client.force_authenticate(admin)
+        response = api_client.get(stats_url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["hits"] == 1
+        assert response.data["misses"] == 1
+        assert response.data["hit_rate"] == 0.5
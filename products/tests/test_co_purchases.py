@@ -0,0 +1,96 @@
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from products.models import Order, ProductCoPurchase
+from products.tests.factories import CartFactory, CartItemsFactory, FileFactory, ProductFactory
+from products.utils.co_purchases import record_order_co_purchases
+from products.utils.orders import set_order_to_processing
+
+
+def place_order(*products, status=Order.OrderStatus.PROCESSING):
+    order = CartFactory(status=Order.OrderStatus.DRAFT)
+    for product in products:
+        CartItemsFactory(order=order, product=product)
+    Order.objects.filter(pk=order.pk).update(status=status)
+    return order
+
+
+def get_count(product, other):
+    return ProductCoPurchase.objects.get(product=product, other=other).count
+
+
+@pytest.mark.django_db
+class TestRecordOrderCoPurchases:
+    def test_counts_pairs_both_ways_once(self):
+        kettle, cup, plate = ProductFactory.create_batch(3)
+        first = place_order(kettle, cup, plate)
+        second = place_order(kettle, cup)
+        assert record_order_co_purchases(first.id)
+        assert record_order_co_purchases(second.id)
+        assert not record_order_co_purchases(second.id)
+
+        assert get_count(kettle, cup) == get_count(cup, kettle) == 2
+        assert get_count(cup, plate) == get_count(plate, kettle) == 1
+        assert ProductCoPurchase.objects.count() == 6
+
+    def test_skips_draft_and_canceled_orders(self):
+        kettle, cup = ProductFactory.create_batch(2)
+        draft = place_order(kettle, cup, status=Order.OrderStatus.DRAFT)
+        canceled = place_order(kettle, cup, status=Order.OrderStatus.CANCELED)
+        assert not record_order_co_purchases(draft.id)
+        assert not record_order_co_purchases(canceled.id)
+        assert not ProductCoPurchase.objects.exists()
+
+    def test_scheduled_when_the_order_reaches_processing(self, django_capture_on_commit_callbacks):
+        order = place_order(ProductFactory(), status=Order.OrderStatus.DRAFT)
+        with patch("products.signals.record_order_co_purchases_task") as task:
+            with django_capture_on_commit_callbacks(execute=True):
+                order.save()
+            task.delay.assert_not_called()
+            with django_capture_on_commit_callbacks(execute=True):
+                set_order_to_processing(order)
+        task.delay.assert_called_once_with(order.id)
+
+    def test_command_records_past_orders(self):
+        kettle, cup = ProductFactory.create_batch(2)
+        place_order(kettle, cup)
+        place_order(kettle, cup, status=Order.OrderStatus.DELIVERED)
+        out = StringIO()
+        call_command("record_co_purchases", batch_size=1, stdout=out)
+        assert "2 orders" in out.getvalue()
+        assert get_count(cup, kettle) == 2
+
+
+@pytest.mark.django_db
+class TestBoughtTogether:
+    def test_top_products(self, api_client):
+        kettle, cup, plate, spoon = ProductFactory.create_batch(4)
+        FileFactory(product=cup)
+        for order in [
+            place_order(kettle, cup, plate),
+            place_order(kettle, cup),
+            place_order(kettle, spoon, cup),
+            place_order(cup, plate),
+        ]:
+            record_order_co_purchases(order.id)
+
+        url = reverse("products:product-bought-together", kwargs={"slug": kettle.slug})
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url, {"limit": 2})
+        assert response.status_code == status.HTTP_200_OK
+        assert [item["id"] for item in response.data] == [cup.id, plate.id]
+        assert set(response.data[0]) == {"url", "slug", "id", "name", "current_price", "files"}
+        assert len(response.data[0]["files"]) == 1
+        # The product id, the co-purchases with their products, the files
+        assert len(context.captured_queries) == 3
+
+    def test_unknown_product(self, api_client):
+        url = reverse("products:product-bought-together", kwargs={"slug": "missing"})
+        assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
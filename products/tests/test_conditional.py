@@ -0,0 +1,111 @@
+import time
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from djmoney.money import Money
+from rest_framework import status
+
+from products.tests.factories import DiscountFactory, ProductFactory
+
+
+@pytest.mark.django_db
+class TestCatalogConditionalGet:
+    def test_matching_etag_returns_not_modified(self, api_client, products):
+        url = reverse("products:product-list")
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"]
+        assert "Last-Modified" not in response
+        assert "Accept" in response["Vary"]
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not response.content
+        assert len(context.captured_queries) == 0
+
+    def test_if_modified_since_is_ignored(self, api_client, product):
+        url = reverse("products:product-detail", kwargs={"slug": product.slug})
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_discount_change_changes_the_etag(self, api_client, product):
+        discount = DiscountFactory(percent=Decimal("10"))
+        product.discount = discount
+        product.save()
+        url = reverse("products:product-detail", kwargs={"slug": product.slug})
+        response = api_client.get(url)
+        etag, price = response["ETag"], response.data["current_price"]
+
+        # Products are repriced without touching their `updated_at`
+        discount.percent = Decimal("50")
+        discount.save()
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["current_price"] != price
+
+    def test_etag_changes_with_the_catalog(self, api_client, product):
+        url = reverse("products:product-detail", kwargs={"slug": product.slug})
+        etag = api_client.get(url)["ETag"]
+
+        product.price = Money(12, "USD")
+        product.save()
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_etag_depends_on_query_params(self, api_client, products):
+        url = reverse("products:product-list")
+        etag = api_client.get(url)["ETag"]
+        response = api_client.get(url, {"ordering": "name"}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_missing_product_is_not_validated(self, api_client):
+        url = reverse("products:product-detail", kwargs={"slug": "missing"})
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert "ETag" not in response
+
+
+@pytest.mark.django_db
+class TestCartConditionalGet:
+    def test_unchanged_cart_returns_not_modified(self, api_client, add_products_to_cart):
+        url = reverse("products:cart-current")
+        etag = api_client.get(url)["ETag"]
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_adding_an_item_changes_the_etag(self, api_client, add_products_to_cart):
+        url = reverse("products:cart-current")
+        etag = api_client.get(url)["ETag"]
+
+        product = ProductFactory()
+        api_client.post(reverse("products:cartitems-list"), {"product": product.id, "quantity": 1})
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["items"]) == 3
+
+        items_url = reverse("products:cartitems-list")
+        items_etag = api_client.get(items_url)["ETag"]
+        response = api_client.get(items_url, HTTP_IF_NONE_MATCH=items_etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_price_change_changes_the_etag(self, api_client, add_products_to_cart):
+        url = reverse("products:cart-current")
+        response = api_client.get(url)
+        etag, total = response["ETag"], response.data["total_amount"]
+
+        product = add_products_to_cart[0]
+        product.price = Money(999, "USD")
+        product.save()
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["total_amount"] != total
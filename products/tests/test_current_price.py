@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from djmoney.money import Money
+
+from products.models import Discount, Product
+from products.tests.factories import DiscountFactory, ProductFactory
+
+
+def stored_price(product):
+    return Product.objects.values_list("current_price", flat=True).get(pk=product.pk)
+
+
+@pytest.mark.django_db
+class TestCurrentPrice:
+    def test_saved_with_discount(self):
+        product = ProductFactory(price=Money(50, "USD"), discount=DiscountFactory(percent=10))
+        assert stored_price(product) == Decimal("45")
+
+    def test_follows_product_price_and_discount(self):
+        product = ProductFactory(price=Money(50, "USD"), discount=DiscountFactory(percent=10))
+        product.price = Money(80, "USD")
+        product.save(update_fields=["price"])
+        assert stored_price(product) == Decimal("72")
+
+        Product.objects.filter(pk=product.pk).update(discount=None)
+        assert stored_price(product) == Decimal("80")
+
+    def test_follows_discount_changes(self):
+        discount = DiscountFactory(percent=10)
+        product = ProductFactory(price=Money(50, "USD"), discount=discount)
+
+        discount.percent = 20
+        discount.save()
+        assert stored_price(product) == Decimal("40")
+
+        Discount.objects.filter(pk=discount.pk).update(active=False)
+        assert stored_price(product) == Decimal("50")
+
+        Discount.objects.filter(pk=discount.pk).update(active=True, percent=50)
+        assert stored_price(product) == Decimal("25")
+
+        discount.delete()
+        assert stored_price(product) == Decimal("50")
+
+    def test_verification_mode(self):
+        product = ProductFactory(price=Money(50, "USD"), discount=DiscountFactory(percent=10))
+        assert not Product.objects.all().with_stale_current_price().exists()
+
+        Product.objects.filter(pk=product.pk).update(current_price=Decimal("1"))
+        assert list(Product.objects.all().with_stale_current_price()) == [product]
+
+        call_command("verify_current_prices", fix=True)
+        assert stored_price(product) == Decimal("45")
@@ -0,0 +1,96 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from products.models import Category, Product
+from products.tests.factories import ProductFactory
+from products.utils.description import render_description
+
+
+def quill(html):
+    return json.dumps({"delta": "", "html": html})
+
+
+class TestRenderDescription:
+    def test_keeps_quill_markup(self):
+        html, text = render_description(
+            quill('<p class="ql-align-center">A <strong>bold</strong> <em>claim</em></p>')
+        )
+        assert html == '<p class="ql-align-center">A <strong>bold</strong> <em>claim</em></p>'
+        assert text == "A bold claim"
+
+    def test_drops_unsafe_markup(self):
+        html, text = render_description(
+            quill(
+                '<p onclick="steal()">Hi<script>alert(1)</script></p>'
+                '<a href="javascript:alert(1)">link</a><iframe src="x"></iframe>'
+            )
+        )
+        assert html == "<p>Hi</p><a>link</a>"
+        assert text == "Hi\nlink"
+
+    def test_keeps_embedded_images_and_colors(self):
+        html, _ = render_description(
+            quill(
+                '<p><img src="data:image/png;base64,AAA=">'
+                '<span style="color: rgb(230, 0, 0); position: fixed;">red</span>'
+                '<span style="color: url(javascript:x)">x</span>'
+                '<img src="data:image/svg+xml;base64,AAA="></p>'
+            )
+        )
+        assert html == (
+            '<p><img src="data:image/png;base64,AAA=">'
+            '<span style="color: rgb(230, 0, 0);">red</span><span>x</span><img></p>'
+        )
+
+    def test_balances_and_escapes(self):
+        html, text = render_description(quill("<p><strong>1 &lt; 2 & 3</p>"))
+        assert html == "<p><strong>1 &lt; 2 &amp; 3</strong></p>"
+        assert text == "1 < 2 & 3"
+
+    def test_invalid_json(self):
+        assert render_description("not json") == ("", "")
+        assert render_description(None) == ("", "")
+
+
+@pytest.mark.django_db
+class TestStoredDescription:
+    def test_rendered_on_save(self):
+        product = ProductFactory(description=quill("<p>First</p><p>Second</p>"))
+        assert product.description_html == "<p>First</p><p>Second</p>"
+        assert product.description_text == "First\nSecond"
+        assert product.description_hash
+
+        product.description = quill("<p>Changed</p>")
+        product.save(update_fields=["description"])
+        product.refresh_from_db()
+        assert product.description_text == "Changed"
+
+    def test_api_reads_the_stored_html(self, api_client):
+        product = ProductFactory(description=quill("<p>Hello<script>x</script></p>"))
+        url = reverse("products:product-detail", kwargs={"slug": product.slug})
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["description_html"] == "<p>Hello</p>"
+
+    def test_category_rename_refreshes_search_vectors(self, api_client):
+        product = ProductFactory(description=quill("<p>Copper kettle</p>"))
+        product.category.name = "Kitchenware"
+        product.category.save()
+
+        assert list(Product.objects.all().search("kitchenware")) == [product]
+        assert list(Product.objects.all().search("copper")) == [product]
+
+    def test_category_save_without_rename_keeps_search_vectors(self):
+        product = ProductFactory()
+        category = Category.objects.get(pk=product.category_id)
+        with patch.object(type(Product.objects.all()), "refresh_search_vector") as refresh:
+            category.save()
+            category.save(update_fields=["updated_at"])
+            refresh.assert_not_called()
+            category.name = "Kitchenware"
+            category.save()
+        refresh.assert_called_once_with()
@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.tests.factories import CategoryFactory, FileFactory, ProductFactory
+from products.views import ProductViewSet
+
+
+@pytest.fixture
+def catalog():
+    category = CategoryFactory(name="Kitchen")
+    for product in ProductFactory.create_batch(3, category=category):
+        FileFactory(product=product)
+    ProductFactory.create_batch(2, category=None, discount=None)
+    return category
+
+
+def read_content(response):
+    assert response.streaming
+    return b"".join(response.streaming_content).decode()
+
+
+async def aget_content(client, url, params):
+    response = await client.get(url, params)
+    assert response.is_async
+    return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+
+@pytest.fixture
+def admin():
+    return User.objects.create_superuser("admin", "admin@example.com", "password")
+
+
+@pytest.mark.django_db
+class TestProductExport:
+    url = reverse("products:product-export")
+
+    @pytest.fixture(autouse=True)
+    def authenticate(self, api_client, admin):
+        api_client.force_authenticate(admin)
+
+    def test_admins_only(self, api_client):
+        api_client.force_authenticate(None)
+        assert api_client.get(self.url).status_code == 403
+
+    def test_ndjson_matches_the_product_list(self, api_client, monkeypatch, catalog):
+        monkeypatch.setattr(ProductViewSet, "export_chunk_size", 2)
+        response = api_client.get(self.url)
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert response["Content-Disposition"] == 'attachment; filename="products.ndjson"'
+        lines = [json.loads(line) for line in read_content(response).splitlines()]
+
+        listed = api_client.get(reverse("products:product-list"))
+        assert lines == json.loads(listed.content)["results"]
+
+    def test_csv(self, api_client, catalog):
+        response = api_client.get(self.url, {"output": "csv"})
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+        rows = list(csv.DictReader(io.StringIO(read_content(response))))
+        assert len(rows) == 5
+        assert "category.name" in rows[0] and "discount.percent" in rows[0]
+        # Latest products first, like the product list
+        assert rows[0]["category.name"] == ""
+        assert rows[-1]["category.name"] == "Kitchen"
+        assert json.loads(rows[-1]["files"])[0]["url"]
+
+    def test_csv_of_an_empty_catalog(self, api_client):
+        response = api_client.get(self.url, {"output": "csv", "fields": "slug,name"})
+        assert read_content(response) == "slug,name\n"
+
+    def test_invalid_output(self, api_client):
+        response = api_client.get(self.url, {"output": "xml"})
+        assert response.status_code == 400
+
+    def test_filters_and_sparse_fields(self, api_client, catalog):
+        params = {"category": catalog.slug, "fields": "slug,name", "output": "csv"}
+        response = api_client.get(self.url, params)
+        lines = read_content(response).splitlines()
+        assert lines[0] == "slug,name"
+        assert len(lines) == 4
+
+    def test_queries_per_chunk(self, api_client, monkeypatch, catalog):
+        monkeypatch.setattr(ProductViewSet, "export_chunk_size", 2)
+        response = api_client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            read_content(response)
+        # The product rows, then the files of each of the 3 chunks
+        assert len(context.captured_queries) == 4
+
+    def test_async_content_under_asgi(self, admin, monkeypatch, catalog):
+        monkeypatch.setattr(ProductViewSet, "export_chunk_size", 2)
+        client = AsyncClient()
+        client.force_login(admin)
+        content = async_to_sync(aget_content)(client, self.url, {"output": "csv"})
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert len(rows) == 5
+
+    def test_invalid_filter(self, api_client):
+        response = api_client.get(self.url, {"current_price_min": "cheap"})
+        assert response.status_code == 400
+        assert "current_price" in json.loads(response.content)
+
+
+@pytest.mark.django_db
+class TestExportProductsCommand:
+    def test_stdout(self, catalog):
+        stdout = StringIO()
+        call_command("export_products", filter=["fields=slug"], stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        assert len(lines) == 5
+        assert set(json.loads(lines[0])) == {"slug"}
+
+    def test_file(self, catalog, tmp_path):
+        path = tmp_path / "products.csv"
+        call_command(
+            "export_products",
+            format="csv",
+            file=str(path),
+            base_url="https://shop.example.com",
+            stdout=StringIO(),
+        )
+        rows = list(csv.DictReader(path.open()))
+        assert len(rows) == 5
+        assert rows[0]["url"].startswith("https://shop.example.com/api/products/")
+
+    def test_invalid_filter(self):
+        with pytest.raises(CommandError):
+            call_command("export_products", filter=["category"], stdout=StringIO())
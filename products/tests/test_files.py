@@ -0,0 +1,34 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from products.models import File
+from products.tests.factories import FileFactory, ProductFactory
+
+
+@pytest.mark.django_db
+class TestFileUrls:
+    def test_urls_are_stored_on_save(self):
+        file = File.objects.get(pk=FileFactory().pk)
+        assert file.url == file.file.build_url()
+        assert set(file.variants) == {"thumbnail", "card", "full"}
+        assert "w_150" in file.variants["thumbnail"]["url"]
+        assert file.variants["card"]["width"] == 480
+
+    def test_api_emits_stored_urls(self, api_client):
+        product = ProductFactory()
+        file = FileFactory(product=product)
+        url = reverse("products:product-detail", kwargs={"slug": product.slug})
+        response = api_client.get(url)
+        assert response.data["files"] == [{"url": file.url, "variants": file.variants}]
+
+    def test_backfill_command(self):
+        files = FileFactory.create_batch(3)
+        File.objects.update(url="", variants={})
+
+        call_command("backfill_file_urls", batch_size=2)
+
+        for file in files:
+            stored = File.objects.get(pk=file.pk)
+            assert stored.url == file.url
+            assert stored.variants == file.variants
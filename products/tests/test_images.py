@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+
+from products.models import File, Product
+from products.utils import images
+from products.utils.images import ImageIngestor, hash_url
+
+
+class FakeUploader:
+    """Stand-in for the Cloudinary upload, failing the first `failures[url]` attempts."""
+
+    def __init__(self, failures=None, delay=0):
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, url, key):
+        with self.lock:
+            self.calls.append(url)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            with self.lock:
+                if self.failures.get(url, 0) > 0:
+                    self.failures[url] -= 1
+                    raise ConnectionError("connection reset")
+            return f"imports/{key[:40]}"
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def make_ingestor(upload, **kwargs):
+    kwargs.setdefault("sleep", lambda delay: None)
+    return ImageIngestor(upload=upload, **kwargs)
+
+
+class TestImageIngestor:
+    def test_uploads_each_url_once(self):
+        upload = FakeUploader()
+        ingestor = make_ingestor(upload)
+        urls = ["https://img.test/1.jpg", "https://img.test/2.jpg", "https://img.test/1.jpg"]
+        assert ingestor.ingest(urls) == 2
+        assert ingestor.ingest(urls) == 0
+        assert sorted(upload.calls) == sorted(set(urls))
+        assert ingestor.get(urls[0]) == f"imports/{hash_url(urls[0])[:40]}"
+        assert ingestor.get("https://img.test/3.jpg") is None
+
+    def test_bounded_concurrency(self):
+        upload = FakeUploader(delay=0.02)
+        ingestor = make_ingestor(upload, max_workers=3)
+        ingestor.ingest(f"https://img.test/{i}.jpg" for i in range(12))
+        assert len(upload.calls) == 12
+        assert 1 < upload.max_running <= 3
+
+    def test_retries_with_backoff(self):
+        url = "https://img.test/flaky.jpg"
+        delays = []
+        ingestor = make_ingestor(
+            FakeUploader(failures={url: 2}), retries=3, backoff=0.5, sleep=delays.append
+        )
+        assert ingestor.ingest([url]) == 1
+        assert delays == [0.5, 1.0]
+        assert ingestor.get(url)
+
+    def test_gives_up(self):
+        url = "https://img.test/broken.jpg"
+        upload = FakeUploader(failures={url: 10})
+        ingestor = make_ingestor(upload, retries=2)
+        assert ingestor.ingest([url]) == 0
+        assert len(upload.calls) == 3
+        assert ingestor.get(url) is None
+        assert ingestor.failed == [url]
+
+    def test_resumes_from_checkpoint(self, tmp_path):
+        checkpoint = tmp_path / "images.json"
+        urls = [f"https://img.test/{i}.jpg" for i in range(5)]
+        broken = "https://img.test/broken.jpg"
+        first = make_ingestor(
+            FakeUploader(failures={broken: 10}),
+            checkpoint_path=str(checkpoint),
+            checkpoint_interval=2,
+            retries=0,
+        )
+        first.ingest([*urls, broken])
+        assert len(json.loads(checkpoint.read_text())) == 5
+
+        upload = FakeUploader()
+        second = make_ingestor(upload, checkpoint_path=str(checkpoint))
+        assert second.ingest([*urls, broken]) == 1
+        assert upload.calls == [broken]
+        assert all(second.get(url) for url in urls)
+
+
+@pytest.mark.django_db
+def test_import_command_uploads_each_image_once(monkeypatch, tmp_path):
+    upload = FakeUploader()
+    monkeypatch.setattr(images, "upload_image", upload)
+    checkpoint = tmp_path / "images.json"
+    options = {"checkpoint": str(checkpoint), "batch_size": 7, "stdout": StringIO()}
+    with patch("products.utils.ingest.rebuild_product_index_task") as task:
+        call_command("add_products_from_dummyjson", **options)
+    task.delay.assert_called_once()
+
+    with open("products/management/commands/utils/add_products_from_dummyjson/data.json") as f:
+        data = json.load(f)["products"]
+    urls = {url for item in data for url in item["images"]}
+    assert sorted(upload.calls) == sorted(urls)
+    assert Product.objects.count() == len({item["title"] for item in data})
+    assert File.objects.count() == sum(len(item["images"]) for item in data)
+
+    # A second run neither duplicates products nor uploads again
+    with patch("products.utils.ingest.rebuild_product_index_task"):
+        call_command("add_products_from_dummyjson", **options)
+    assert len(upload.calls) == len(urls)
+    assert File.objects.count() == sum(len(item["images"]) for item in data)
@@ -0,0 +1,127 @@
+import io
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from djmoney.money import Money
+
+from products.management.commands.utils.add_products_from_dummyjson.productMap import (
+    ProductMapSerializer,
+)
+from products.models import Category, Discount, File, Product
+from products.tests.factories import CategoryFactory, DiscountFactory, ProductFactory
+from products.tests.test_images import FakeUploader, make_ingestor
+from products.utils.ingest import ingest_products, iter_json_array
+
+
+def make_item(title, category="kitchen", percent=10.0, images=1, price=20.0):
+    return {
+        "title": title,
+        "description": f"<p>{title} description</p>",
+        "category": category,
+        "images": [f"https://img.test/{title.replace(' ', '-')}/{i}.jpg" for i in range(images)],
+        "price": price,
+        "discountPercentage": percent,
+    }
+
+
+def ingest(items, batch_size=100):
+    ingestor = make_ingestor(FakeUploader())
+    with patch("products.utils.ingest.rebuild_product_index_task") as task:
+        report = ingest_products(items, ProductMapSerializer, ingestor, batch_size)
+    return report, task
+
+
+class TestIterJsonArray:
+    @pytest.mark.parametrize("read_size", [1, 7, 4096])
+    def test_top_level_array(self, read_size):
+        items = [{"id": 1, "name": "a [b], {c}"}, {"id": 2, "tags": []}, 12345, "x"]
+        file = io.StringIO(json.dumps(items, indent=2))
+        assert list(iter_json_array(file, read_size=read_size)) == items
+
+    @pytest.mark.parametrize("read_size", [1, 5, 4096])
+    def test_array_under_key(self, read_size):
+        document = {"products": [{"id": 1}, {"id": 2}], "total": 2}
+        file = io.StringIO(json.dumps(document))
+        assert list(iter_json_array(file, "products", read_size)) == [{"id": 1}, {"id": 2}]
+
+    def test_empty_array(self):
+        assert list(iter_json_array(io.StringIO(" [ ] "))) == []
+
+    @pytest.mark.parametrize("content", ['{"id": 1}', '[{"id": 1} {"id": 2}]', '[{"id": '])
+    def test_invalid(self, content):
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO(content), read_size=3))
+
+
+@pytest.mark.django_db
+class TestIngestProducts:
+    def test_creates_products(self):
+        kitchen = CategoryFactory(name="Kitchen", slug="kitchen")
+        discount = DiscountFactory(percent=Decimal("10.00"))
+        items = [
+            make_item("Kettle", images=2),
+            make_item("Phone", category="smartphones", percent=12.5),
+            make_item("Cup", percent=0),
+        ]
+        report, task = ingest(items)
+
+        assert (report.read, report.created, report.skipped) == (3, 3, 0)
+        assert report.rows_per_second > 0
+        kettle = Product.objects.get(name="Kettle")
+        assert kettle.slug == "kettle"
+        assert kettle.category == kitchen
+        assert kettle.discount == discount
+        assert kettle.price == Money(20, "USD")
+        assert kettle.current_price == Decimal("18.0000")
+        assert kettle.description_html == "<p>Kettle description</p>"
+        assert kettle.files.count() == 2
+        assert kettle.files.first().url
+        assert Product.objects.all().search("kettle").get() == kettle
+
+        phone = Product.objects.get(name="Phone")
+        assert phone.category.slug == "smartphones"
+        assert phone.category.name == "Smartphones"
+        assert phone.discount.percent == Decimal("12.50")
+        assert phone.discount.name == "12.5 %"
+        assert Product.objects.get(name="Cup").discount is None
+        task.delay.assert_called_once_with("Bulk import of 3 products")
+
+    def test_skips_invalid_and_existing_names(self):
+        ProductFactory(name="Kettle")
+        items = [
+            make_item("Kettle"),
+            make_item("Cup"),
+            make_item("Cup"),
+            {"title": "Broken"},
+            make_item("Plate"),
+        ]
+        report, _ = ingest(items, batch_size=2)
+        assert (report.read, report.created, report.skipped) == (5, 2, 3)
+        assert sorted(Product.objects.values_list("name", flat=True)) == ["Cup", "Kettle", "Plate"]
+
+    def test_shared_categories_and_discounts_are_created_once(self):
+        items = [make_item(f"Product {i}", category=f"category-{i % 2}") for i in range(6)]
+        ingest(items, batch_size=4)
+        assert Category.objects.count() == 2
+        assert Discount.objects.count() == 1
+        assert File.objects.count() == 6
+
+    def test_nothing_to_refresh(self):
+        report, task = ingest([{"title": "Broken"}])
+        assert report.created == 0
+        task.delay.assert_not_called()
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        def count_queries(prefix, size):
+            items = [make_item(f"{prefix} {i}", images=2) for i in range(size)]
+            with CaptureQueriesContext(connection) as context:
+                ingest(items, batch_size=size)
+            return len(context.captured_queries)
+
+        # Creates the category and the discount
+        ingest([make_item("First")])
+        assert count_queries("Small", 2) == count_queries("Large", 20)
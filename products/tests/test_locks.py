@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+import pytest
+from django.db import connections
+
+from ai.models import PendingIndexUpdate
+from products.tasks import (
+    PRODUCT_INDEX_LOCK_NAME,
+    schedule_product_index_update,
+    update_product_index_task,
+)
+from products.utils.locks import advisory_lock, get_advisory_lock_key
+
+
+@pytest.fixture
+def other_session():
+    """A second database session, like another worker process."""
+    connection = connections.create_connection("default")
+    yield connection
+    connection.close()
+
+
+def take_lock(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [get_advisory_lock_key(name)])
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestAdvisoryLock:
+    def test_excludes_other_sessions(self, other_session):
+        with advisory_lock("index") as acquired:
+            assert acquired
+            assert not take_lock(other_session, "index")
+            assert take_lock(other_session, "other")
+        assert take_lock(other_session, "index")
+
+        with advisory_lock("index") as acquired:
+            assert not acquired
+
+
+@pytest.mark.django_db
+class TestUpdateProductIndexTask:
+    def test_queued_again_while_the_index_is_written(self, other_session):
+        assert take_lock(other_session, PRODUCT_INDEX_LOCK_NAME)
+        with patch("products.tasks.call_command") as command, patch.object(
+            update_product_index_task, "apply_async"
+        ) as apply_async:
+            update_product_index_task("Product changed")
+        command.assert_not_called()
+        apply_async.assert_called_once_with(("Product changed",), countdown=30)
+
+    def test_updates_the_index(self):
+        with patch("products.tasks.call_command") as command:
+            update_product_index_task("Product changed")
+        command.assert_called_once_with("update_product_index")
+
+    def test_one_update_scheduled_at_a_time(self, settings):
+        settings.VECTOR_INDEX_UPDATE_DELAY = 300
+        with patch.object(update_product_index_task, "apply_async") as apply_async:
+            schedule_product_index_update("Product changed")
+            schedule_product_index_update("Other product changed")
+        apply_async.assert_called_once_with(("Product changed",), countdown=300)
+
+    def test_changes_recorded_meanwhile_are_scheduled(self):
+        PendingIndexUpdate.objects.create(product_id=1)
+        with patch("products.tasks.call_command"), patch(
+            "products.tasks.schedule_product_index_update"
+        ) as schedule:
+            update_product_index_task("Product changed")
+        schedule.assert_called_once_with("Product changed")
@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from products.cache import get_catalog_version
+from products.models import Order, ProductPopularity
+from products.tasks import update_product_popularity_task
+from products.tests.factories import CartFactory, CartItemsFactory, ProductFactory
+from products.utils.popularity import (
+    POPULARITY_HALF_LIFE,
+    create_missing_popularity,
+    decay_weight,
+    decayed_score,
+    record_order_popularity,
+)
+
+
+def place_order(items, status=Order.OrderStatus.PROCESSING, at=None):
+    order = CartFactory(status=status)
+    for product, quantity in items:
+        CartItemsFactory(order=order, product=product, quantity=quantity)
+    # Items touch the order, its `updated_at` is set last
+    Order.objects.filter(pk=order.pk).update(updated_at=at or timezone.now())
+    return order
+
+
+def get_popularity(product):
+    return ProductPopularity.objects.get(product=product)
+
+
+class TestDecay:
+    def test_weight_doubles_every_half_life(self):
+        now = timezone.now()
+        assert decay_weight(now + POPULARITY_HALF_LIFE) == pytest.approx(2 * decay_weight(now))
+
+    def test_decayed_score(self):
+        now = timezone.now()
+        score = 3 * decay_weight(now - POPULARITY_HALF_LIFE)
+        assert decayed_score(score, now) == pytest.approx(1.5)
+
+
+@pytest.mark.django_db
+class TestRecordOrderPopularity:
+    def test_products_get_a_popularity_row(self):
+        product = ProductFactory()
+        assert get_popularity(product).quantity == 0
+
+    def test_adds_orders_once(self):
+        kettle, cup = ProductFactory(), ProductFactory()
+        place_order([(kettle, 2), (cup, 1)])
+        place_order([(kettle, 3)])
+        assert record_order_popularity(batch_size=1) == 2
+        assert record_order_popularity() == 0
+        assert get_popularity(kettle).quantity == 5
+        assert get_popularity(cup).quantity == 1
+        assert Order.objects.filter(popularity_recorded_at__isnull=True).count() == 0
+
+    def test_skips_draft_and_canceled_orders(self):
+        product = ProductFactory()
+        draft = place_order([(product, 4)], status=Order.OrderStatus.DRAFT)
+        place_order([(product, 2)], status=Order.OrderStatus.CANCELED)
+        assert record_order_popularity() == 0
+
+        # Recorded once it leaves draft
+        Order.objects.filter(pk=draft.pk).update(status=Order.OrderStatus.PROCESSING)
+        assert record_order_popularity() == 1
+        assert get_popularity(product).quantity == 4
+
+    def test_recent_sales_weigh_more(self):
+        now = timezone.now()
+        old, recent = ProductFactory(), ProductFactory()
+        place_order([(old, 3)], at=now - 2 * POPULARITY_HALF_LIFE)
+        place_order([(recent, 1)], at=now - timedelta(days=1))
+        record_order_popularity()
+        assert get_popularity(recent).score > get_popularity(old).score
+        assert decayed_score(get_popularity(old).score, now) == pytest.approx(0.75)
+
+    def test_task_creates_missing_rows(self):
+        product = ProductFactory()
+        ProductPopularity.objects.all().delete()
+        place_order([(product, 2)])
+        assert update_product_popularity_task() == 1
+        assert get_popularity(product).quantity == 2
+        assert create_missing_popularity() == 0
+
+
+@pytest.mark.django_db
+class TestPopularityViews:
+    @pytest.fixture
+    def ranked(self):
+        products = ProductFactory.create_batch(5)
+        for quantity, product in enumerate(products[:4], start=1):
+            place_order([(product, quantity)])
+        record_order_popularity()
+        # Best sellers first, the product without sales last
+        return [*reversed(products[:4]), products[4]]
+
+    def test_ordering_by_popularity(self, api_client, ranked):
+        url = reverse("products:product-list") + "?ordering=-popularity&page_size=2"
+        returned = []
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            returned += [item["id"] for item in response.data["results"]]
+            url = response.data["next"]
+        assert returned == [product.id for product in ranked]
+
+    def test_bestsellers(self, api_client, ranked):
+        url = reverse("products:product-bestsellers")
+        response = api_client.get(url, {"limit": 3})
+        assert response.status_code == status.HTTP_200_OK
+        assert [item["id"] for item in response.data] == [product.id for product in ranked[:3]]
+        assert set(response.data[0]) == {"url", "slug", "id", "name", "current_price", "files"}
+
+        # Products without sales are not bestsellers
+        response = api_client.get(url, {"limit": 50})
+        assert len(response.data) == 4
+
+    def test_new_sales_only_invalidate_popularity_responses(
+        self, api_client, ranked, django_capture_on_commit_callbacks
+    ):
+        bestsellers_url = reverse("products:product-bestsellers")
+        list_url = reverse("products:product-list")
+        api_client.get(bestsellers_url, {"limit": 1})
+        api_client.get(list_url)
+        api_client.get(list_url, {"ordering": "-popularity"})
+        version = get_catalog_version()
+
+        place_order([(ranked[-1], 100)])
+        with django_capture_on_commit_callbacks(execute=True):
+            record_order_popularity()
+
+        assert get_catalog_version() == version
+        assert api_client.get(list_url)["X-Cache"] == "HIT"
+        response = api_client.get(list_url, {"ordering": "-popularity"})
+        assert response["X-Cache"] == "MISS"
+        assert response.data["results"][0]["id"] == ranked[-1].id
+        response = api_client.get(bestsellers_url, {"limit": 1})
+        assert [item["id"] for item in response.data] == [ranked[-1].id]
@@ -0,0 +1,98 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+
+from products.models import Product
+from products.tests.factories import ProductFactory
+from products.utils import slugify
+from products.utils.slugify import bulk_unique_slugify, save_with_unique_slug, unique_slugify
+
+
+@pytest.mark.django_db
+class TestUniqueSlugify:
+    def test_one_query_whatever_the_collisions(self):
+        for _ in range(6):
+            ProductFactory(name="Kettle")
+        product = Product(name="Kettle")
+        with CaptureQueriesContext(connection) as context:
+            unique_slugify(product, product.name)
+        assert len(context.captured_queries) == 1
+        assert product.slug == "kettle-7"
+
+    def test_fetches_only_the_candidates(self):
+        for name in ["Case", "Case", "Case study", "Cases", "Case 2 go"]:
+            ProductFactory(name=name)
+        condition = slugify._candidates_condition("case", 89, "slug", "-")
+        taken = Product.objects.filter(condition).values_list("slug", flat=True)
+        assert sorted(taken) == ["case", "case-2"]
+
+        product = Product(name="Case")
+        unique_slugify(product, product.name)
+        assert product.slug == "case-3"
+
+    def test_keeps_the_slug_of_the_instance(self):
+        product = ProductFactory(name="Kettle")
+        ProductFactory(name="Kettle")
+        product.save()
+        assert product.slug == "kettle"
+
+    def test_long_values(self):
+        name = "a" * 120
+        assert ProductFactory(name=name).slug == "a" * 100
+        product = Product(name=name)
+        unique_slugify(product, name)
+        assert product.slug == "a" * 98 + "-2"
+
+
+@pytest.mark.django_db
+class TestBulkUniqueSlugify:
+    def test_same_slugs_as_one_by_one(self):
+        ProductFactory(name="Kettle")
+        ProductFactory(name="Kettle")
+        products = [Product(name=name) for name in ["Kettle", "Kettle", "Cup", "!!"]]
+        with CaptureQueriesContext(connection) as context:
+            bulk_unique_slugify(products, [product.name for product in products])
+        assert len(context.captured_queries) == 1
+        assert [product.slug for product in products] == ["kettle-3", "kettle-4", "cup", "-2"]
+
+
+@pytest.mark.django_db
+class TestSaveWithUniqueSlug:
+    def test_retries_when_a_concurrent_save_took_the_slug(self, monkeypatch):
+        other = ProductFactory(name="Other")
+        allocate = slugify.bulk_unique_slugify
+        calls = []
+
+        def allocate_then_race(instances, values, *args):
+            allocate(instances, values, *args)
+            if not calls:
+                # Another request saves the same slug between the lookup and the insert
+                Product.objects.filter(pk=other.pk).update(slug=instances[0].slug)
+            calls.append(instances[0].slug)
+
+        monkeypatch.setattr(slugify, "bulk_unique_slugify", allocate_then_race)
+        product = ProductFactory(name="Kettle", category=None, discount=None)
+        assert calls == ["kettle", "kettle-2"]
+        assert product.slug == "kettle-2"
+
+    def test_other_integrity_errors_are_raised(self):
+        product = Product(name="Kettle")
+
+        def save():
+            raise IntegrityError("null value in column")
+
+        with pytest.raises(IntegrityError):
+            save_with_unique_slug([product], [product.name], save)
+
+
+@pytest.mark.django_db
+def test_slugify_products_command():
+    ProductFactory.create_batch(3, name="Kettle")
+    ProductFactory(name="Cup")
+    Product.objects.filter(name="Kettle").update(slug=None)
+    call_command("slugify_products", batch_size=2, stdout=StringIO())
+    slugs = sorted(Product.objects.values_list("slug", flat=True))
+    assert slugs == ["cup", "kettle", "kettle-2", "kettle-3"]
@@ -0,0 +1,96 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.urls import reverse
+from djmoney.money import Money
+from rest_framework import serializers
+
+from products.models import File, Product
+from products.tests.factories import CategoryFactory, FileFactory, ProductFactory
+from products.values_serializers import ValuesSerializer
+from products.views import CategoryViewSet, ProductViewSet
+
+
+@pytest.fixture
+def catalog():
+    category = CategoryFactory(name="Kitchen")
+    description = json.dumps({"delta": "", "html": "<p>Copper <em>kettle</em> &amp; cups</p>"})
+    kettle = ProductFactory(name="Kettle", category=category, description=description)
+    FileFactory.create_batch(2, product=kettle)
+    ProductFactory(name="Plain", category=None, discount=None, price=Money("9.99", "USD"))
+    ProductFactory.create_batch(3, category=category)
+    # A file saved before the URLs were stored
+    File.objects.filter(pk=FileFactory().pk).update(url="", variants={})
+
+
+def get_both(api_client, monkeypatch, viewset, url, params=None):
+    """Responses of the fast path and of the DRF serializer for the same request."""
+    monkeypatch.setattr(viewset, "catalog_cache_enabled", False)
+    fast = api_client.get(url, params)
+    monkeypatch.setattr(viewset, "values_serializer_class", None)
+    slow = api_client.get(url, params)
+    return fast, slow
+
+
+@pytest.mark.django_db
+class TestValuesSerializers:
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {},
+            {"ordering": "-current_price", "page_size": 3},
+            {"search": "kettle"},
+            {"fields": "slug,name,files,current_price"},
+            {"omit": "category,discount"},
+        ],
+    )
+    def test_product_list_is_byte_identical(self, api_client, monkeypatch, catalog, params):
+        url = reverse("products:product-list")
+        fast, slow = get_both(api_client, monkeypatch, ProductViewSet, url, params)
+        assert fast.status_code == slow.status_code == 200
+        assert fast.content == slow.content
+
+    def test_next_page_is_byte_identical(self, api_client, monkeypatch, catalog):
+        url = reverse("products:product-list")
+        first = api_client.get(url, {"ordering": "name", "page_size": 2})
+        fast, slow = get_both(api_client, monkeypatch, ProductViewSet, first.data["next"])
+        assert fast.content == slow.content
+
+    def test_category_list_is_byte_identical(self, api_client, monkeypatch, catalog):
+        url = reverse("products:category-list")
+        fast, slow = get_both(api_client, monkeypatch, CategoryViewSet, url)
+        assert fast.status_code == slow.status_code == 200
+        assert fast.content == slow.content
+
+    def test_benchmark_command(self, catalog):
+        stdout = StringIO()
+        call_command("benchmark_serializers", repeat=1, stdout=stdout)
+        assert "products:" in stdout.getvalue()
+        assert "categories:" in stdout.getvalue()
+
+
+def test_nested_lists_below_the_top_level_are_rejected():
+    class FileSerializer(serializers.ModelSerializer):
+        class Meta:
+            model = File
+            fields = ["id"]
+
+    class ProductSerializer(serializers.ModelSerializer):
+        files = FileSerializer(many=True)
+
+        class Meta:
+            model = Product
+            fields = ["id", "files"]
+
+    class FileWithProductSerializer(serializers.ModelSerializer):
+        product = ProductSerializer()
+
+        class Meta:
+            model = File
+            fields = ["id", "product"]
+
+    with pytest.raises(ImproperlyConfigured, match="product__files"):
+        ValuesSerializer(FileWithProductSerializer())
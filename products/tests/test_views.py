@@ -1,10 +1,23 @@
+import json
+
 import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from djmoney.money import Money
 from rest_framework import status
 
-from products.models import Order
-from products.tests.factories import CategoryFactory, ProductFactory
+from products.models import Order, Product
+from products.serializers import PRODUCT_PREVIEW_SIZE
+from products.tests.factories import CategoryFactory, DiscountFactory, FileFactory, ProductFactory
+
+
+def count_queries(api_client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    return len(context.captured_queries)
 
 
 @pytest.mark.django_db
@@ -14,10 +27,11 @@ class TestProductViewSet:
         url = reverse("products:product-list")
         response = api_client.get(url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == len(products)
-        returned_names = {item["name"] for item in response.data}
+        assert len(response.data["results"]) == len(products)
+        returned_names = {item["name"] for item in response.data["results"]}
         expected_names = {product.name for product in products}
         assert returned_names == expected_names
+        assert "count" not in response.data
 
     def test_retrieve_product(self, api_client, product):
         url = reverse("products:product-detail", kwargs={"slug": product.slug})
@@ -34,8 +48,155 @@ class TestProductViewSet:
         url = reverse("products:product-list") + "?search=Unique"
         response = api_client.get(url)
         assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 1
+        assert response.data["results"][0]["name"] == "Unique Product"
+
+    def test_search_products_by_category_and_description(self, api_client):
+        category = CategoryFactory(name="Kitchen")
+        description = json.dumps(
+            {"delta": "", "html": "<p>A <strong>stainless</strong> steel kettle</p>"}
+        )
+        kettle = ProductFactory(name="Kettle", category=category, description=description)
+        ProductFactory.create_batch(2)
+        url = reverse("products:product-list")
+
+        response = api_client.get(url, {"search": "kitchen"})
+        assert [item["id"] for item in response.data["results"]] == [kettle.id]
+
+        response = api_client.get(url, {"search": "stainless"})
+        assert [item["id"] for item in response.data["results"]] == [kettle.id]
+
+        # HTML markup is not part of the search document
+        response = api_client.get(url, {"search": "strong"})
+        assert response.data["results"] == []
+
+    def test_search_products_ranks_name_matches_first(self, api_client):
+        description = json.dumps({"delta": "", "html": "<p>Works with any lamp</p>"})
+        bulb = ProductFactory(name="Light bulb", description=description)
+        lamp = ProductFactory(name="Desk lamp")
+        url = reverse("products:product-list")
+        response = api_client.get(url, {"search": "lamp"})
+        assert [item["id"] for item in response.data["results"]] == [lamp.id, bulb.id]
+
+    @pytest.mark.parametrize("ordering", ["name", "-name", "current_price", "-current_price"])
+    def test_cursor_pagination_follows_ordering(self, api_client, ordering):
+        ProductFactory.create_batch(5, name="Same Name")
+        ProductFactory.create_batch(2)
+        expected = [
+            product.id
+            for product in Product.objects.order_by(
+                ordering, "-id" if ordering.startswith("-") else "id"
+            )
+        ]
+
+        url = reverse("products:product-list") + f"?ordering={ordering}&page_size=2"
+        returned = []
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            returned += [item["id"] for item in response.data["results"]]
+            url = response.data["next"]
+        assert returned == expected
+
+    def test_cursor_pagination_previous_page(self, api_client, products):
+        url = reverse("products:product-list") + "?page_size=1"
+        first_page = api_client.get(url).data
+        second_page = api_client.get(first_page["next"]).data
+        assert first_page["previous"] is None
+        previous_page = api_client.get(second_page["previous"]).data
+        assert previous_page["results"] == first_page["results"]
+
+    def test_cursor_pagination_with_count(self, api_client, products):
+        url = reverse("products:product-list") + "?page_size=1&with_count=true"
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == len(products)
+        assert len(response.data["results"]) == 1
+
+    def test_invalid_cursor(self, api_client):
+        url = reverse("products:product-list") + "?cursor=not-a-cursor"
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_list_products_query_count_is_constant(self, api_client):
+        url = reverse("products:product-list")
+        for product in ProductFactory.create_batch(2):
+            FileFactory.create_batch(2, product=product)
+        queries_for_two = count_queries(api_client, url)
+
+        for product in ProductFactory.create_batch(4):
+            FileFactory.create_batch(2, product=product)
+        queries_for_six = count_queries(api_client, url)
+
+        assert queries_for_six == queries_for_two
+
+    def test_retrieve_product_query_count(self, api_client, product):
+        FileFactory.create_batch(3, product=product)
+        url = reverse("products:product-detail", kwargs={"slug": product.slug})
+        # Product with its relations, and its files
+        assert count_queries(api_client, url) == 2
+
+    def test_sparse_fieldsets(self, api_client, products):
+        url = reverse("products:product-list")
+        response = api_client.get(url, {"fields": "slug,name,current_price"})
+        for item in response.data["results"]:
+            assert set(item) == {"slug", "name", "current_price"}
+
+        response = api_client.get(url, {"omit": "files,description_html"})
+        assert "files" not in response.data["results"][0]
+        assert "description_html" not in response.data["results"][0]
+        assert "category" in response.data["results"][0]
+
+    def test_sparse_fieldsets_skip_queries(self, api_client):
+        for product in ProductFactory.create_batch(3):
+            FileFactory(product=product)
+        url = reverse("products:product-list")
+        queries_for_all = count_queries(api_client, url)
+        with CaptureQueriesContext(connection) as context:
+            api_client.get(url, {"omit": "files,description_html"})
+        # No prefetch of the files, and the HTML column is not loaded
+        assert len(context.captured_queries) == queries_for_all - 1
+        assert not any("description_html" in query["sql"] for query in context.captured_queries)
+
+    def test_nested_products_ignore_sparse_fieldsets(self, api_client, product):
+        url = reverse("products:category-detail", kwargs={"slug": product.category.slug})
+        response = api_client.get(url, {"fields": "name"})
+        assert "files" in response.data["products"][0]
+
+    def test_suggest_products_tolerates_typos(self, api_client):
+        headphones = ProductFactory(name="Wireless Headphones")
+        FileFactory(product=headphones)
+        ProductFactory(name="Coffee Mug")
+        url = reverse("products:product-suggest")
+        response = api_client.get(url, {"q": "headphnes"})
+        assert response.status_code == status.HTTP_200_OK
         assert len(response.data) == 1
-        assert response.data[0]["name"] == "Unique Product"
+        assert response.data[0]["slug"] == headphones.slug
+        assert set(response.data[0]) == {"slug", "name", "thumbnail"}
+        assert response.data[0]["thumbnail"]
+
+    def test_suggest_products_matches_category_and_limit(self, api_client):
+        category = CategoryFactory(name="Laptops")
+        ProductFactory.create_batch(3, category=category)
+        url = reverse("products:product-suggest")
+        response = api_client.get(url, {"q": "laptop", "limit": 2})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 2
+
+    def test_suggest_products_tops_up_with_latest_category_products(self, api_client):
+        stand = ProductFactory(name="Laptop Stand")
+        laptops = ProductFactory.create_batch(4, category=CategoryFactory(name="Laptops"))
+        url = reverse("products:product-suggest")
+        response = api_client.get(url, {"q": "laptop", "limit": 3})
+        assert response.status_code == status.HTTP_200_OK
+        slugs = [item["slug"] for item in response.data]
+        assert slugs == [stand.slug, laptops[3].slug, laptops[2].slug]
+
+    def test_suggest_products_requires_query(self, api_client, products):
+        url = reverse("products:product-suggest")
+        response = api_client.get(url, {"q": "a"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == []
 
     def test_product_not_found(self, api_client):
         url = reverse("products:product-detail", kwargs={"slug": "non-existent-slug"})
@@ -60,6 +221,41 @@ class TestCategoryViewSet:
         assert response.status_code == status.HTTP_200_OK
         assert response.data["name"] == category.name
 
+    def test_categories_embed_a_product_preview(self, api_client):
+        category = CategoryFactory()
+        products = ProductFactory.create_batch(PRODUCT_PREVIEW_SIZE + 2, category=category)
+        CategoryFactory()
+        response = api_client.get(reverse("products:category-list"))
+        data = {item["slug"]: item for item in response.data}[category.slug]
+        assert data["product_count"] == len(products)
+        # The latest products, like the default product ordering
+        assert [item["id"] for item in data["products"]] == [
+            product.id for product in reversed(products[-PRODUCT_PREVIEW_SIZE:])
+        ]
+        assert set(data["products"][0]) == {"url", "slug", "id", "name", "current_price", "files"}
+
+        response = api_client.get(data["products_url"])
+        assert len(response.data["results"]) == len(products)
+
+    def test_category_detail_is_bounded(self, api_client):
+        category = CategoryFactory()
+        ProductFactory.create_batch(PRODUCT_PREVIEW_SIZE + 1, category=category)
+        url = reverse("products:category-detail", kwargs={"slug": category.slug})
+        response = api_client.get(url)
+        assert response.data["product_count"] == PRODUCT_PREVIEW_SIZE + 1
+        assert len(response.data["products"]) == PRODUCT_PREVIEW_SIZE
+        assert response.data["products_url"].endswith(f"/api/products/?category={category.slug}")
+
+    def test_list_categories_query_count_is_constant(self, api_client):
+        url = reverse("products:category-list")
+        for category in CategoryFactory.create_batch(2):
+            FileFactory(product=ProductFactory(category=category))
+        queries_for_two = count_queries(api_client, url)
+        for category in CategoryFactory.create_batch(4):
+            FileFactory(product=ProductFactory(category=category))
+        cache.clear()
+        assert count_queries(api_client, url) == queries_for_two
+
 
 @pytest.mark.django_db
 class TestCartViewSet:
@@ -254,3 +450,49 @@ class TestCartViewSet:
         assert new_cart_total_amount == Money(
             0, "USD"
         ), "New cart total amount should be zero after checkout"
+
+
+@pytest.mark.django_db
+class TestProductFacets:
+    def test_facets(self, api_client):
+        kitchen = CategoryFactory(name="Kitchen")
+        garden = CategoryFactory(name="Garden")
+        ProductFactory(category=kitchen, price=Money(10, "USD"), discount=None)
+        ProductFactory(category=kitchen, price=Money(60, "USD"), discount=None)
+        discount = DiscountFactory(percent=20)
+        ProductFactory(category=garden, price=Money(100, "USD"), discount=discount)
+
+        response = api_client.get(reverse("products:product-facets"))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["categories"] == [
+            {"slug": kitchen.slug, "name": "Kitchen", "count": 2},
+            {"slug": garden.slug, "name": "Garden", "count": 1},
+        ]
+        assert response.data["price"]["min"] == "10.00"
+        assert response.data["price"]["max"] == "80.00"
+        price_buckets = response.data["price"]["buckets"]
+        price_counts = {bucket["min"]: bucket["count"] for bucket in price_buckets}
+        assert price_counts == {0: 1, 25: 0, 50: 2, 100: 0, 250: 0, 500: 0}
+        discount_counts = [bucket["count"] for bucket in response.data["discount"]["buckets"]]
+        assert discount_counts == [0, 1, 0, 0]
+
+    def test_facets_follow_filters(self, api_client):
+        kitchen = CategoryFactory(name="Kitchen")
+        garden = CategoryFactory(name="Garden")
+        ProductFactory(category=kitchen, price=Money(10, "USD"), discount=None)
+        ProductFactory(category=garden, price=Money(300, "USD"), discount=None)
+        url = reverse("products:product-facets")
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url, {"category": kitchen.slug})
+        assert len(context.captured_queries) == 2
+        # The category facet ignores the category filter, the others follow it
+        assert [row["count"] for row in response.data["categories"]] == [1, 1]
+        assert sum(bucket["count"] for bucket in response.data["price"]["buckets"]) == 1
+
+        response = api_client.get(url, {"current_price_min": "100"})
+        assert [row["slug"] for row in response.data["categories"]] == [garden.slug]
+
+    def test_invalid_filter(self, api_client):
+        response = api_client.get(reverse("products:product-facets"), {"current_price_min": "x"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,69 @@
+from itertools import permutations
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from products.models import Order, OrderItems, ProductCoPurchase
+
+# Products returned by the "bought together" lookups
+CO_PURCHASE_DEFAULT_LIMIT = 8
+CO_PURCHASE_MAX_LIMIT = 20
+# Orders claimed per query by `record_pending_co_purchases()`
+CO_PURCHASE_BATCH_SIZE = 500
+
+
+def get_unrecorded_orders():
+    """Orders past draft whose items are not in the co-purchases yet."""
+    return Order.objects.filter(co_purchases_recorded_at__isnull=True).exclude(
+        status__in=[Order.OrderStatus.DRAFT, Order.OrderStatus.CANCELED]
+    )
+
+
+def record_order_co_purchases(order_id):
+    """
+    Adds the product pairs of the order to the co-purchases, once: the order is
+    claimed by stamping `co_purchases_recorded_at` in the same transaction, so
+    repeated or concurrent calls for the same order are no-ops. Returns whether
+    the order was recorded.
+    """
+    with transaction.atomic():
+        claimed = (
+            get_unrecorded_orders()
+            .filter(id=order_id)
+            .update(co_purchases_recorded_at=timezone.now())
+        )
+        if not claimed:
+            return False
+        product_ids = OrderItems.objects.filter(order_id=order_id).values_list(
+            "product_id", flat=True
+        )
+        add_co_purchases(set(product_ids))
+    return True
+
+
+def record_pending_co_purchases(batch_size=CO_PURCHASE_BATCH_SIZE):
+    """Records every order that was not, e.g. placed before the co-purchases existed."""
+    recorded = 0
+    while order_ids := list(
+        get_unrecorded_orders().order_by("id").values_list("id", flat=True)[:batch_size]
+    ):
+        recorded += sum(record_order_co_purchases(order_id) for order_id in order_ids)
+    return recorded
+
+
+def add_co_purchases(product_ids):
+    """Counts one more order for every ordered pair of `product_ids`."""
+    product_ids = sorted(product_ids)
+    if len(product_ids) < 2:
+        return
+    ProductCoPurchase.objects.bulk_create(
+        [
+            ProductCoPurchase(product_id=product_id, other_id=other_id)
+            for product_id, other_id in permutations(product_ids, 2)
+        ],
+        ignore_conflicts=True,
+    )
+    ProductCoPurchase.objects.filter(product_id__in=product_ids, other_id__in=product_ids).update(
+        count=F("count") + 1
+    )
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import re
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+# Markup produced by the Quill editor, everything else is dropped
+ALLOWED_TAGS = {
+    "a",
+    "blockquote",
+    "br",
+    "code",
+    "em",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "img",
+    "li",
+    "ol",
+    "p",
+    "pre",
+    "s",
+    "span",
+    "strong",
+    "sub",
+    "sup",
+    "u",
+    "ul",
+}
+ALLOWED_ATTRIBUTES = {
+    "a": {"href", "target", "rel"},
+    "img": {"src", "alt"},
+}
+GLOBAL_ATTRIBUTES = {"class", "style"}
+URL_ATTRIBUTES = {"href", "src"}
+ALLOWED_URL_SCHEMES = {"", "http", "https", "mailto"}
+# Images embedded by Quill's default image handler
+IMAGE_DATA_URL = re.compile(r"data:image/(png|jpeg|gif|webp);base64,[A-Za-z0-9+/=\s]*", re.I)
+# Inline styles Quill emits for the color formats, with plain color values only
+ALLOWED_STYLES = {"color", "background-color"}
+STYLE_VALUE = re.compile(r"#[0-9a-f]{3,8}|rgba?\([0-9.,%\s]+\)|[a-z]+", re.I)
+VOID_TAGS = {"br", "img"}
+# Tags whose content is not text and is dropped along with the tag
+SKIPPED_TAGS = {"script", "style", "iframe", "object", "template"}
+# Tags separating lines in the plain-text rendering
+BLOCK_TAGS = {"blockquote", "br", "h1", "h2", "h3", "h4", "h5", "h6", "li", "p", "pre"}
+
+
+class DescriptionRenderer(HTMLParser):
+    """
+    Single pass over the description HTML producing both an allowlist-sanitized
+    copy of the markup and its plain text.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.open_tags = []
+        self.skipped = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipped += 1
+            return
+        if self.skipped:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        if tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_ATTRIBUTES.get(tag, set()) | GLOBAL_ATTRIBUTES
+        rendered = []
+        for name, value in attrs:
+            if name in allowed and value is not None:
+                value = self.clean_attribute(tag, name, value)
+                if value:
+                    rendered.append(f' {name}="{escape(value, quote=True)}"')
+        rendered = "".join(rendered)
+        self.html.append(f"<{tag}{rendered}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and tag in self.open_tags:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skipped = max(self.skipped - 1, 0)
+            return
+        if self.skipped or tag not in self.open_tags:
+            return
+        # Close the tags left open inside this one to keep the markup balanced
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.html.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+
+    def handle_data(self, data):
+        if self.skipped:
+            return
+        self.html.append(escape(data, quote=False))
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.html.append(f"</{self.open_tags.pop()}>")
+
+    @staticmethod
+    def clean_attribute(tag, name, value):
+        """The value to keep for the attribute, None when it is unsafe."""
+        if name == "style":
+            return clean_style(value)
+        if name not in URL_ATTRIBUTES:
+            return value
+        if tag == "img" and IMAGE_DATA_URL.fullmatch(value.strip()):
+            return value.strip()
+        if urlparse(value.strip()).scheme.lower() in ALLOWED_URL_SCHEMES:
+            return value
+        return None
+
+    def get_html(self):
+        return "".join(self.html)
+
+    def get_text(self):
+        lines = (" ".join(line.split()) for line in "".join(self.text).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def clean_style(style):
+    """Keeps the allowed declarations of an inline style, None when there is none."""
+    declarations = []
+    for declaration in style.split(";"):
+        prop, _, value = declaration.partition(":")
+        prop, value = prop.strip().lower(), value.strip()
+        if prop in ALLOWED_STYLES and STYLE_VALUE.fullmatch(value):
+            declarations.append(f"{prop}: {value};")
+    return " ".join(declarations) or None
+
+
+def hash_description(json_string):
+    return hashlib.sha256((json_string or "").encode("utf-8")).hexdigest()
+
+
+def render_description(json_string):
+    """
+    Renders a Quill JSON description into `(html, text)`: the sanitized HTML and
+    its plain text. Invalid JSON renders as an empty description.
+    """
+    try:
+        html = json.loads(json_string or "{}").get("html") or ""
+    except (json.JSONDecodeError, AttributeError):
+        html = ""
+    renderer = DescriptionRenderer()
+    renderer.feed(html)
+    renderer.close()
+    return renderer.get_html(), renderer.get_text()
@@ -0,0 +1,103 @@
+import csv
+import io
+from itertools import islice
+
+import orjson
+from asgiref.sync import sync_to_async
+from rest_framework import serializers
+
+from core.renderers import ORJSONRenderer, encode_default
+
+# Rows fetched from the server-side cursor, and serialized, at a time
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def iter_chunks(queryset, values_serializer, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Representations of the rows of `queryset`, in lists of at most `chunk_size`.
+    Rows are read through `QuerySet.iterator()`, so only one chunk is in memory.
+    """
+    rows = values_serializer.get_values(queryset).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield values_serializer.serialize(chunk)
+
+
+def get_csv_columns(serializer, prefix=""):
+    """CSV header of `serializer`, with the fields of nested objects flattened."""
+    columns = []
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.BaseSerializer) and not isinstance(
+            field, serializers.ListSerializer
+        ):
+            columns.extend(get_csv_columns(field, f"{prefix}{name}."))
+        else:
+            columns.append(f"{prefix}{name}")
+    return columns
+
+
+def flatten(data, prefix=""):
+    """One level dict of a representation: `parent.child` keys, lists as JSON text."""
+    row = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            row.update(flatten(value, f"{name}."))
+        elif isinstance(value, list):
+            row[name] = orjson.dumps(value, default=encode_default).decode()
+        else:
+            row[name] = value
+    return row
+
+
+def iter_ndjson(chunks):
+    options = ORJSONRenderer.options | orjson.OPT_APPEND_NEWLINE
+    for chunk in chunks:
+        yield b"".join(orjson.dumps(data, default=encode_default, option=options) for data in chunk)
+
+
+def pop_buffer(buffer):
+    content = buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    return content
+
+
+def iter_csv(chunks, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, columns, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    yield pop_buffer(buffer)
+    for chunk in chunks:
+        writer.writerows(flatten(data) for data in chunk)
+        yield pop_buffer(buffer)
+
+
+def iter_export(queryset, serializer, values_serializer, output, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Encoded `ndjson` or `csv` export of `queryset` with `serializer`'s fields,
+    one bytestring per chunk. Rows are built by `values_serializer`.
+    """
+    chunks = iter_chunks(queryset, values_serializer, chunk_size)
+    if output == "csv":
+        return iter_csv(chunks, get_csv_columns(serializer))
+    return iter_ndjson(chunks)
+
+
+async def aiter_content(content):
+    """
+    Async iterator over the chunks of `content`, for ASGI servers, which would
+    otherwise read a sync iterator whole before sending it. Chunks are built in
+    the request's sync thread, where the server-side cursor is open.
+    """
+    content = iter(content)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await next_chunk(content, None)) is not None:
+        yield chunk
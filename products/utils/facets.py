@@ -0,0 +1,109 @@
+from decimal import Decimal
+
+from django.db.models import Count, Max, Min, Q
+
+# Half-open `[min, max)` ranges, `None` leaves the range unbounded
+PRICE_BUCKETS = [(0, 25), (25, 50), (50, 100), (100, 250), (250, 500), (500, None)]
+DISCOUNT_BUCKETS = [(0, 10), (10, 25), (25, 50), (50, None)]
+
+
+def apply_filters(filterset, queryset, exclude=()):
+    """
+    Applies the validated filters of `filterset` to `queryset`, skipping those in
+    `exclude`, so a facet counts the values its own filter would otherwise hide.
+    """
+    for name, value in filterset.form.cleaned_data.items():
+        if name in exclude or name == "ordering":
+            continue
+        queryset = filterset.filters[name].filter(queryset, value)
+    return queryset
+
+
+def range_q(field, value):
+    """The `Q` object matching a `RangeFilter` value (a slice) on `field`."""
+    q = Q()
+    if value is None:
+        return q
+    if value.start is not None:
+        q &= Q(**{f"{field}__gte": value.start})
+    if value.stop is not None:
+        q &= Q(**{f"{field}__lte": value.stop})
+    return q
+
+
+def bucket_q(field, lower, upper):
+    q = Q(**{f"{field}__gte": lower})
+    if upper is not None:
+        q &= Q(**{f"{field}__lt": upper})
+    return q
+
+
+def build_facets(filterset):
+    """
+    Category counts, price histogram and discount histogram of the products
+    matching `filterset`, in two queries: a grouped count per category and one
+    pass of conditional aggregates for the price and discount buckets.
+    """
+    queryset = filterset.queryset
+    cleaned_data = filterset.form.cleaned_data
+    categories = (
+        apply_filters(filterset, queryset, exclude=["category"])
+        .filter(category__isnull=False)
+        .order_by()
+        .values("category__slug", "category__name")
+        .annotate(count=Count("id"))
+        .order_by("-count", "category__name")
+    )
+
+    price_q = range_q("current_price", cleaned_data.get("current_price"))
+    discount_q = Q()
+    if cleaned_data.get("discount"):
+        discount_q = Q(discount__active=True) & range_q(
+            "discount__percent", cleaned_data["discount"]
+        )
+    aggregates = {
+        "price_min": Min("current_price", filter=discount_q),
+        "price_max": Max("current_price", filter=discount_q),
+    }
+    for index, (lower, upper) in enumerate(PRICE_BUCKETS):
+        aggregates[f"price_{index}"] = Count(
+            "id", filter=discount_q & bucket_q("current_price", lower, upper)
+        )
+    for index, (lower, upper) in enumerate(DISCOUNT_BUCKETS):
+        aggregates[f"discount_{index}"] = Count(
+            "id",
+            filter=price_q & Q(discount__active=True) & bucket_q("discount__percent", lower, upper),
+        )
+    totals = (
+        apply_filters(filterset, queryset, exclude=["current_price", "discount"])
+        .order_by()
+        .aggregate(**aggregates)
+    )
+
+    return {
+        "categories": [
+            {"slug": row["category__slug"], "name": row["category__name"], "count": row["count"]}
+            for row in categories
+        ],
+        "price": {
+            "min": format_amount(totals["price_min"]),
+            "max": format_amount(totals["price_max"]),
+            "buckets": build_buckets(PRICE_BUCKETS, totals, "price"),
+        },
+        "discount": {
+            "buckets": build_buckets(DISCOUNT_BUCKETS, totals, "discount"),
+        },
+    }
+
+
+def build_buckets(buckets, totals, prefix):
+    return [
+        {"min": lower, "max": upper, "count": totals[f"{prefix}_{index}"]}
+        for index, (lower, upper) in enumerate(buckets)
+    ]
+
+
+def format_amount(value):
+    if value is None:
+        return None
+    return str(Decimal(value).quantize(Decimal("0.01")))
@@ -0,0 +1,21 @@
+FIELDS_QUERY_PARAM = "fields"
+OMIT_QUERY_PARAM = "omit"
+
+
+def parse_field_list(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def get_sparse_field_names(query_params, available):
+    """
+    Names of the `available` fields selected by `?fields=` (an allowlist) and
+    `?omit=` (a denylist), in their declared order. Unknown names are ignored.
+    """
+    names = list(available)
+    if query_params.get(FIELDS_QUERY_PARAM):
+        requested = set(parse_field_list(query_params[FIELDS_QUERY_PARAM]))
+        names = [name for name in names if name in requested]
+    if query_params.get(OMIT_QUERY_PARAM):
+        omitted = set(parse_field_list(query_params[OMIT_QUERY_PARAM]))
+        names = [name for name in names if name not in omitted]
+    return names
@@ -0,0 +1,24 @@
+# Transformations served for every product image, used to build `srcset`
+FILE_VARIANTS = {
+    "thumbnail": {"width": 150, "height": 150, "crop": "fill"},
+    "card": {"width": 480, "crop": "limit"},
+    "full": {"width": 1200, "crop": "limit"},
+}
+VARIANT_OPTIONS = {"quality": "auto", "fetch_format": "auto"}
+
+
+def build_file_urls(resource):
+    """
+    Builds the delivery URL of a Cloudinary resource and the URLs of its
+    `FILE_VARIANTS`, returned as `(url, variants)`.
+    """
+    if not resource:
+        return "", {}
+    variants = {
+        name: {
+            "url": resource.build_url(**options, **VARIANT_OPTIONS),
+            "width": options["width"],
+        }
+        for name, options in FILE_VARIANTS.items()
+    }
+    return resource.build_url(), variants
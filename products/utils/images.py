@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import cloudinary.uploader
+
+logger = logging.getLogger(__name__)
+
+# Folder of the images uploaded from a source URL
+IMPORT_FOLDER = "imports"
+
+
+def hash_url(url):
+    return hashlib.sha256(url.strip().encode("utf-8")).hexdigest()
+
+
+def upload_image(url, key):
+    """
+    Uploads the image at `url` to Cloudinary and returns its public id. The id
+    derives from the URL hash, so uploading the same source again is a no-op.
+    """
+    response = cloudinary.uploader.upload(
+        url, public_id=key[:40], folder=IMPORT_FOLDER, overwrite=False
+    )
+    return response["public_id"]
+
+
+class ImageIngestor:
+    """
+    Uploads remote images with a bounded thread pool.
+
+    Uploads are keyed by the hash of the source URL, so each source image is
+    uploaded once per ingestor, and failed attempts are retried with an
+    exponential backoff. With a `checkpoint_path`, the hash table is persisted
+    as JSON while uploading and reloaded on start, so an interrupted import
+    resumes without uploading the same images again.
+    """
+
+    def __init__(
+        self,
+        upload=None,
+        max_workers=8,
+        retries=3,
+        backoff=1.0,
+        checkpoint_path=None,
+        checkpoint_interval=50,
+        sleep=time.sleep,
+    ):
+        self.upload = upload or upload_image
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.sleep = sleep
+        self.public_ids = self.load_checkpoint()
+        self.failed = []
+
+    def get(self, url):
+        """Public id of the image uploaded from `url`, None when it failed or was not ingested."""
+        return self.public_ids.get(hash_url(url))
+
+    def ingest(self, urls):
+        """Uploads the images of `urls` not uploaded yet, returns the number of uploads."""
+        pending = {}
+        for url in urls:
+            key = hash_url(url)
+            if key not in self.public_ids:
+                pending.setdefault(key, url)
+        if not pending:
+            return 0
+
+        uploaded = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(self.upload_with_retry, url, key): (key, url)
+                    for key, url in pending.items()
+                }
+                for future in as_completed(futures):
+                    key, url = futures[future]
+                    public_id = future.result()
+                    if public_id is None:
+                        self.failed.append(url)
+                        continue
+                    self.public_ids[key] = public_id
+                    uploaded += 1
+                    if uploaded % self.checkpoint_interval == 0:
+                        self.save_checkpoint()
+        finally:
+            if uploaded:
+                self.save_checkpoint()
+        return uploaded
+
+    def upload_with_retry(self, url, key):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.upload(url, key)
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.warning(
+                        "Giving up on image %s after %s attempts: %s", url, attempt + 1, e
+                    )
+                    return None
+                delay = self.backoff * 2**attempt
+                logger.info("Upload of %s failed (%s), retrying in %.1fs", url, e, delay)
+                self.sleep(delay)
+
+    def load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as checkpoint:
+            return json.load(checkpoint)
+
+    def save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        # Written aside then renamed, a crash never leaves a truncated checkpoint
+        temporary_path = f"{self.checkpoint_path}.tmp"
+        with open(temporary_path, "w") as checkpoint:
+            json.dump(self.public_ids, checkpoint)
+        os.replace(temporary_path, self.checkpoint_path)
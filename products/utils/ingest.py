@@ -0,0 +1,245 @@
+import json
+import time
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from djmoney.money import Money
+
+from products.cache import bump_catalog_version
+from products.models import Category, Discount, File, Product, ProductPopularity
+from products.tasks import rebuild_product_index_task
+from products.utils.slugify import save_with_unique_slug
+
+# Products validated and written together, their images uploaded concurrently
+IMPORT_BATCH_SIZE = 500
+# Characters read from the feed at a time
+JSON_READ_SIZE = 1 << 16
+
+
+def iter_json_array(file, key=None, read_size=JSON_READ_SIZE):
+    """
+    Yields the items of the JSON array making up `file`, or found under `key` of
+    its top-level object. Items are decoded one at a time with `raw_decode`, so
+    the document is never loaded whole. The first occurrence of the quoted `key`
+    is taken for the array's, which holds for the feeds imported here.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+
+    def read():
+        nonlocal buffer, position, eof
+        data = file.read(read_size)
+        eof = not data
+        # Drop what was already decoded, only the current item stays in memory
+        buffer, position = buffer[position:] + data, 0
+        return not eof
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or not read():
+                return buffer[position : position + 1]
+
+    def expect(character):
+        nonlocal position
+        if skip_whitespace() != character:
+            raise ValueError(f"Expected {character!r} at character {position} of the read window")
+        position += 1
+
+    if key is not None:
+        token = json.dumps(key)
+        while (index := buffer.find(token, position)) == -1:
+            if not read():
+                raise ValueError(f"{token} not found")
+        position = index + len(token)
+        expect(":")
+    expect("[")
+
+    first = True
+    while True:
+        character = skip_whitespace()
+        if character == "]":
+            return
+        if not first:
+            expect(",")
+            skip_whitespace()
+        first = False
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not read():
+                    raise
+                continue
+            # A number or literal may go on in the next read
+            if end < len(buffer) or eof:
+                break
+            read()
+        position = end
+        yield item
+
+
+class IngestReport:
+    def __init__(self):
+        self.read = 0
+        self.created = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def skipped(self):
+        return self.read - self.created
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def __str__(self):
+        return (
+            f"{self.created} products created, {self.skipped} skipped, {self.read} rows "
+            f"in {self.elapsed:.1f}s ({self.rows_per_second:.0f} rows/s)"
+        )
+
+
+def ingest_products(items, serializer_class, image_ingestor, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Creates products from the raw `items` with `serializer_class`, a product map
+    serializer providing `name_field` and `to_ingest_item()`.
+
+    Each batch is validated with the existing names looked up at once, the images
+    of the valid items are uploaded concurrently by `image_ingestor`, then the
+    categories and discounts are resolved with one query each and the rows are
+    written with `bulk_create`. `bulk_create` skips the model signals, so the
+    popularity rows are created along, and the catalog version and the product
+    index are refreshed once at the end.
+    """
+    report = IngestReport()
+    items = iter(items)
+    while batch := list(islice(items, batch_size)):
+        report.read += len(batch)
+        report.created += ingest_batch(batch, serializer_class, image_ingestor)
+    if report.created:
+        bump_catalog_version()
+        rebuild_product_index_task.delay(f"Bulk import of {report.created} products")
+    report.finish()
+    return report
+
+
+def ingest_batch(batch, serializer_class, image_ingestor):
+    items = validate_batch(batch, serializer_class)
+    if not items:
+        return 0
+    image_ingestor.ingest(url for item in items for url in item["image_urls"])
+
+    with transaction.atomic():
+        categories = resolve_categories([item["category"] for item in items if item["category"]])
+        discounts = resolve_discounts([item["discount"] for item in items if item["discount"]])
+        products = []
+        for item in items:
+            product = Product(
+                name=item["name"],
+                description=json.dumps({"delta": "", "html": item["description_html"]}),
+                price=Money(item["price"], "USD"),
+                category=item["category"] and categories[get_category_key(item["category"])],
+                discount=item["discount"] and discounts[item["discount"]["percent"]],
+            )
+            # What `Product.save()` derives, done here since `bulk_create` does not call it
+            product.render_description()
+            product.search_vector = product.get_search_vector()
+            product.current_price = product.get_current_price()
+            products.append(product)
+        save_with_unique_slug(
+            products,
+            [product.name for product in products],
+            lambda: Product.objects.bulk_create(products),
+        )
+        ProductPopularity.objects.bulk_create(
+            ProductPopularity(product=product) for product in products
+        )
+
+        files = []
+        for product, item in zip(products, items):
+            for url in item["image_urls"]:
+                public_id = image_ingestor.get(url)
+                if public_id:
+                    file = File(product=product, file=public_id)
+                    file.set_urls()
+                    files.append(file)
+        File.objects.bulk_create(files)
+    return len(products)
+
+
+def validate_batch(batch, serializer_class):
+    """Ingest items of the valid rows of `batch`, without the names already taken."""
+    names = {
+        data[serializer_class.name_field].strip()
+        for data in batch
+        if isinstance(data, dict) and isinstance(data.get(serializer_class.name_field), str)
+    }
+    existing_names = set(Product.objects.filter(name__in=names).values_list("name", flat=True))
+    context = {"existing_names": existing_names}
+    items = []
+    for data in batch:
+        serializer = serializer_class(data=data, context=context)
+        if serializer.is_valid():
+            item = serializer.to_ingest_item(serializer.validated_data)
+            # Later rows of the feed with the same name are skipped
+            existing_names.add(item["name"])
+            items.append(item)
+    return items
+
+
+def get_category_key(category):
+    if category.get("slug"):
+        return ("slug", category["slug"])
+    return ("name", category["name"])
+
+
+def resolve_categories(specs):
+    """
+    Categories by key of the `{"name", "slug"?}` specs, looked up by slug when
+    given, by name otherwise. Missing ones are created.
+    """
+    slugs = [spec["slug"] for spec in specs if spec.get("slug")]
+    names = [spec["name"] for spec in specs if not spec.get("slug")]
+    categories = {}
+    for category in Category.objects.filter(Q(slug__in=slugs) | Q(name__in=names)).order_by("id"):
+        categories.setdefault(("slug", category.slug), category)
+        categories.setdefault(("name", category.name), category)
+
+    missing = {}
+    for spec in specs:
+        key = get_category_key(spec)
+        if key not in categories:
+            missing.setdefault(key, Category(name=spec["name"]))
+    new_categories = list(missing.values())
+    if new_categories:
+        save_with_unique_slug(
+            new_categories,
+            [category.name for category in new_categories],
+            lambda: Category.objects.bulk_create(new_categories),
+        )
+    categories.update(missing)
+    return categories
+
+
+def resolve_discounts(specs):
+    """Discounts by percent of the `{"percent", "name", "active"}` specs, created if missing."""
+    discounts = {}
+    percents = {spec["percent"] for spec in specs}
+    for discount in Discount.objects.filter(percent__in=percents).order_by("id"):
+        discounts.setdefault(discount.percent, discount)
+
+    missing = {}
+    for spec in specs:
+        if spec["percent"] not in discounts:
+            missing.setdefault(spec["percent"], Discount(**spec))
+    Discount.objects.bulk_create(missing.values())
+    discounts.update(missing)
+    return discounts
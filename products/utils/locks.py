@@ -0,0 +1,29 @@
+import hashlib
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+def get_advisory_lock_key(name):
+    """Signed 64-bit key of the lock `name`, as Postgres advisory locks take."""
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+@contextmanager
+def advisory_lock(name):
+    """
+    Tries to take the session-level Postgres advisory lock `name`, without
+    waiting, and yields whether it was taken. Unlike a cache key, the lock is
+    shared by every process using the database, never expires while it is
+    held, and is released by the database if the process dies.
+    """
+    key = get_advisory_lock_key(name)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [key])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
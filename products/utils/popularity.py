@@ -0,0 +1,98 @@
+import math
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Exp, Extract
+from django.utils import timezone
+
+from products.cache import bump_popularity_version
+from products.models import Order, OrderItems, Product, ProductPopularity
+
+POPULARITY_HALF_LIFE = timedelta(days=30)
+# Weights grow by 2 every half-life from here, a float lasts ~80 years of 30 days half-lives
+POPULARITY_LANDMARK = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+DECAY_RATE = math.log(2) / POPULARITY_HALF_LIFE.total_seconds()
+# Orders added to the popularity per transaction
+POPULARITY_BATCH_SIZE = 500
+
+
+def decay_weight(at):
+    """
+    Weight of a unit sold at `at`: `exp(λ (at - L))`, `L` being a fixed landmark
+    and `λ` following from the half-life (forward decay). Recent sales weigh
+    exponentially more, yet stored scores never have to be decayed again: every
+    score would be divided by the same `exp(λ (now - L))`, which keeps their
+    order, so new sales are simply added and scores are sorted by an index.
+    """
+    return math.exp(DECAY_RATE * (at - POPULARITY_LANDMARK).total_seconds())
+
+
+def decay_weight_expression(field):
+    """`decay_weight()` of the datetime `field`, computed by the database."""
+    seconds = Extract(field, "epoch") - Value(POPULARITY_LANDMARK.timestamp())
+    return Exp(Value(DECAY_RATE) * seconds, output_field=FloatField())
+
+
+def decayed_score(score, now):
+    """Stored `score` in units sold as of `now`, for display."""
+    return score / decay_weight(now)
+
+
+def create_missing_popularity():
+    """Creates the empty popularity rows of the products without one."""
+    product_ids = Product.objects.filter(popularity__isnull=True).values_list("id", flat=True)
+    return len(
+        ProductPopularity.objects.bulk_create(
+            [ProductPopularity(product_id=product_id) for product_id in product_ids],
+            ignore_conflicts=True,
+        )
+    )
+
+
+def record_order_popularity(batch_size=POPULARITY_BATCH_SIZE):
+    """
+    Adds the items of the orders that left draft since the last run to the
+    product popularity, each unit weighted by the order's `updated_at`. Orders
+    canceled before being recorded are skipped. Returns the number of orders.
+    """
+    recorded = 0
+    while True:
+        with transaction.atomic():
+            order_ids = list(
+                Order.objects.select_for_update(skip_locked=True)
+                .filter(popularity_recorded_at__isnull=True)
+                .exclude(status__in=[Order.OrderStatus.DRAFT, Order.OrderStatus.CANCELED])
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not order_ids:
+                break
+            add_order_items(order_ids)
+            Order.objects.filter(id__in=order_ids).update(popularity_recorded_at=timezone.now())
+            recorded += len(order_ids)
+    if recorded:
+        # Only the cached bestsellers and popularity orderings moved
+        bump_popularity_version()
+    return recorded
+
+
+def add_order_items(order_ids):
+    """Adds the items of `order_ids` with one UPDATE of the popularity rows they touch."""
+    items = OrderItems.objects.filter(order_id__in=order_ids)
+    product_ids = list(items.values_list("product_id", flat=True).distinct())
+    ProductPopularity.objects.bulk_create(
+        [ProductPopularity(product_id=product_id) for product_id in product_ids],
+        ignore_conflicts=True,
+    )
+    sold = items.filter(product_id=OuterRef("product_id")).values("product_id")
+    quantity = sold.annotate(total=Sum("quantity")).values("total")
+    score = sold.annotate(
+        total=Sum(F("quantity") * decay_weight_expression("order__updated_at"))
+    ).values("total")
+    ProductPopularity.objects.filter(product_id__in=product_ids).update(
+        quantity=F("quantity") + Coalesce(Subquery(quantity), 0),
+        score=F("score") + Coalesce(Subquery(score), 0.0),
+        updated_at=timezone.now(),
+    )
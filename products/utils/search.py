@@ -0,0 +1,33 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, FloatField, TextField, Value
+from django.db.models.functions import Cast, Coalesce
+
+SEARCH_CONFIG = "english"
+
+
+def build_search_vector(name, category_name, description):
+    """
+    Builds the weighted search document of a product: the name weighs the most,
+    then the category name, then the plain-text description. Each part is either
+    a value or an expression, the latter to rebuild vectors with `update()`.
+    """
+    return (
+        SearchVector(as_text(name), weight="A", config=SEARCH_CONFIG)
+        + SearchVector(as_text(category_name), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(as_text(description), weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def as_text(value):
+    if hasattr(value, "resolve_expression"):
+        return Coalesce(value, Value(""), output_field=TextField())
+    return Value(value or "")
+
+
+def build_search_query(value):
+    return SearchQuery(value, search_type="websearch", config=SEARCH_CONFIG)
+
+
+def build_search_rank(query):
+    # ts_rank returns a `real`, cast it so the value survives a round trip through cursors
+    return Cast(SearchRank(F("search_vector"), query), FloatField())
@@ -1,7 +1,16 @@
 import re
+from functools import reduce
+from operator import or_
 
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.template.defaultfilters import slugify
 
+# Longest "-<n>" suffix accounted for when matching the taken slugs of a base
+MAX_SUFFIX_LENGTH = 11
+# Slug allocations retried when a concurrent save took one of the slugs
+SLUG_RETRIES = 3
+
 
 def unique_slugify(instance, value, slug_field_name="slug", queryset=None, slug_separator="-"):
     """
@@ -12,39 +21,109 @@ def unique_slugify(instance, value, slug_field_name="slug", queryset=None, slug_
 
     ``queryset`` usually doesn't need to be explicitly provided - it'll default
     to using the ``.all()`` queryset from the model's default manager.
+
+    The taken candidates are fetched with one query and the first free one
+    (``slug``, then ``slug-2``, ``slug-3``...) is picked in memory. Saves racing
+    for the same slug are settled by the unique constraint, see
+    ``save_with_unique_slug``.
     """
-    slug_field = instance._meta.get_field(slug_field_name)
+    bulk_unique_slugify([instance], [value], slug_field_name, queryset, slug_separator)
+
 
-    slug = getattr(instance, slug_field.attname)
+def bulk_unique_slugify(
+    instances, values, slug_field_name="slug", queryset=None, slug_separator="-"
+):
+    """
+    Stores a unique slug of each of ``values`` on the matching instance, the
+    slugs ``unique_slugify`` would pick for them one after the other, with a
+    single query for the slugs already taken.
+    """
+    if not instances:
+        return
+    model = instances[0].__class__
+    slug_field = model._meta.get_field(slug_field_name)
     slug_len = slug_field.max_length
 
-    # Sort out the initial slug, limiting its length if necessary.
-    slug = slugify(value)
-    if slug_len:
-        slug = slug[:slug_len]
-    slug = _slug_strip(slug, slug_separator)
-    original_slug = slug
+    # Sort out the initial slugs, limiting their length if necessary.
+    originals = []
+    for value in values:
+        slug = slugify(value)
+        if slug_len:
+            slug = slug[:slug_len]
+        originals.append(_slug_strip(slug, slug_separator))
 
-    # Create the queryset if one wasn't explicitly provided and exclude the
-    # current instance from the queryset.
+    # Every candidate starts with its initial slug, minus room for the suffix.
+    prefix_len = max(slug_len - MAX_SUFFIX_LENGTH, 0) if slug_len else None
     if queryset is None:
-        queryset = instance.__class__._default_manager.all()
-    if instance.pk:
-        queryset = queryset.exclude(pk=instance.pk)
+        queryset = model._default_manager.all()
+    pks = [instance.pk for instance in instances if instance.pk]
+    if pks:
+        queryset = queryset.exclude(pk__in=pks)
+    condition = reduce(
+        or_,
+        (
+            _candidates_condition(original, prefix_len, slug_field_name, slug_separator)
+            for original in set(originals)
+        ),
+    )
+    taken = set(queryset.filter(condition).values_list(slug_field_name, flat=True))
 
-    # Find a unique slug. If one matches, at '-2' to the end and try again
+    # Find a unique slug. If one is taken, add '-2' to the end and try again
     # (then '-3', etc).
-    next = 2
-    while not slug or queryset.filter(**{slug_field_name: slug}):
+    for instance, original_slug in zip(instances, originals):
         slug = original_slug
-        end = "%s%s" % (slug_separator, next)
-        if slug_len and len(slug) + len(end) > slug_len:
-            slug = slug[: slug_len - len(end)]
-            slug = _slug_strip(slug, slug_separator)
-        slug = "%s%s" % (slug, end)
-        next += 1
-
-    setattr(instance, slug_field.attname, slug)
+        next = 2
+        while not slug or slug in taken:
+            slug = _suffix_slug(original_slug, next, slug_len, slug_separator)
+            next += 1
+        taken.add(slug)
+        setattr(instance, slug_field.attname, slug)
+
+
+def save_with_unique_slug(instances, values, save, slug_field_name="slug", retries=SLUG_RETRIES):
+    """
+    Allocates the slugs of ``instances`` then calls ``save``. When a concurrent
+    save took one of the slugs in between, the unique constraint rejects the
+    write and the slugs are allocated again, up to ``retries`` times.
+    """
+    for attempt in range(retries + 1):
+        bulk_unique_slugify(instances, values, slug_field_name)
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            if attempt == retries or not _slugs_taken(instances, slug_field_name):
+                raise
+
+
+def _slugs_taken(instances, slug_field_name):
+    model = instances[0].__class__
+    slugs = [getattr(instance, slug_field_name) for instance in instances]
+    queryset = model._default_manager.filter(**{f"{slug_field_name}__in": slugs})
+    pks = [instance.pk for instance in instances if instance.pk]
+    if pks:
+        queryset = queryset.exclude(pk__in=pks)
+    return queryset.exists()
+
+
+def _candidates_condition(original, prefix_len, slug_field_name, separator):
+    """
+    Matches the slugs ``original`` could get: itself or itself with a number
+    suffix. Long slugs are truncated to make room for the suffix, so for them
+    the slugs starting with the part always kept are matched instead.
+    """
+    if prefix_len is not None and len(original) > prefix_len:
+        return Q(**{f"{slug_field_name}__startswith": original[:prefix_len]})
+    suffixed = rf"^{re.escape(original)}{re.escape(separator)}[0-9]+$"
+    return Q(**{slug_field_name: original}) | Q(**{f"{slug_field_name}__regex": suffixed})
+
+
+def _suffix_slug(slug, number, slug_len, separator):
+    end = "%s%s" % (separator, number)
+    if slug_len and len(slug) + len(end) > slug_len:
+        slug = slug[: slug_len - len(end)]
+        slug = _slug_strip(slug, separator)
+    return "%s%s" % (slug, end)
 
 
 def _slug_strip(value, separator="-"):
@@ -0,0 +1,13 @@
+from urllib.parse import quote
+
+from django.utils.http import RFC3986_SUBDELIMS
+
+LOOKUP_PLACEHOLDER = "__lookup__"
+
+
+def fill_url_template(template, value):
+    """
+    Replaces the lookup placeholder of a URL reversed once per request, quoted
+    like `django.urls.reverse()` quotes the URL arguments.
+    """
+    return template.replace(LOOKUP_PLACEHOLDER, quote(str(value), safe=RFC3986_SUBDELIMS + "/~:@"))
@@ -1,43 +1,283 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Prefetch
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django_filters.utils import translate_validation
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from products.cache import build_etag, get_catalog_cache_stats, get_catalog_version
 from products.filters import ProductFilter
-from products.mixins import CartInitiationMixin
-from products.models import Category, Order, OrderAddress, OrderItems, Product
+from products.mixins import (
+    CartInitiationMixin,
+    CatalogCacheMixin,
+    CatalogConditionalGetMixin,
+    ConditionalGetMixin,
+    ValuesListMixin,
+)
+from products.models import (
+    Category,
+    File,
+    Order,
+    OrderAddress,
+    OrderItems,
+    Product,
+    ProductCoPurchase,
+)
+from products.pagination import ProductCursorPagination
 from products.serializers import (
+    PRODUCT_PREVIEW_SIZE,
     CartAddressSerializer,
     CartItemsSerializer,
     CartSerializer,
     CategorySerializer,
+    ProductCardSerializer,
     ProductSerializer,
+    ProductSuggestionSerializer,
+)
+from products.utils.co_purchases import CO_PURCHASE_DEFAULT_LIMIT, CO_PURCHASE_MAX_LIMIT
+from products.utils.export import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_CONTENT_TYPES,
+    aiter_content,
+    iter_export,
 )
+from products.utils.facets import build_facets
+from products.utils.fieldsets import get_sparse_field_names
 from products.utils.orders import (
     get_existing_or_new_order_address,
     get_existing_or_new_order_item,
     set_order_to_processing,
 )
+from products.values_serializers import CategoryValuesSerializer, ProductValuesSerializer
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Product.objects.all()
+class ProductViewSet(
+    CatalogConditionalGetMixin, CatalogCacheMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet
+):
+    # The raw Quill JSON is rendered into `description_html` at save time
+    queryset = (
+        Product.objects.select_related("category", "discount")
+        .prefetch_related("files")
+        .defer("description", "description_text", "search_vector")
+    )
     serializer_class = ProductSerializer
-    filter_class = ProductFilter
+    values_serializer_class = ProductValuesSerializer
+    # Read by the cursor pagination from the rows
+    values_columns = ("id", "name", "current_price")
+    # Work behind each serializer field, skipped when `?fields=` / `?omit=` excludes it
+    field_select_related = {"category": "category", "discount": "discount"}
+    field_prefetch_related = {"files": "files"}
+    field_columns = {"description_html": "description_html"}
+    filterset_class = ProductFilter
+    pagination_class = ProductCursorPagination
     lookup_field = "slug"
     permission_classes = [permissions.AllowAny]
+    suggest_min_length = 2
+    suggest_default_limit = 8
+    suggest_max_limit = 20
+    export_chunk_size = EXPORT_CHUNK_SIZE
+    bestsellers_default_limit = 10
+    bestsellers_max_limit = 50
+    bought_together_default_limit = CO_PURCHASE_DEFAULT_LIMIT
+    bought_together_max_limit = CO_PURCHASE_MAX_LIMIT
+
+    def get_queryset(self):
+        if self.action not in ("list", "retrieve", "export"):
+            return super().get_queryset()
+        fields = set(
+            get_sparse_field_names(self.request.query_params, self.serializer_class.Meta.fields)
+        )
+        queryset = Product.objects.defer("description", "description_text", "search_vector")
+        select_related = [
+            relation for field, relation in self.field_select_related.items() if field in fields
+        ]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        prefetch_related = [
+            relation for field, relation in self.field_prefetch_related.items() if field in fields
+        ]
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        deferred = [column for field, column in self.field_columns.items() if field not in fields]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        return queryset
 
+    def depends_on_popularity(self, request):
+        if self.action == "bestsellers":
+            return True
+        ordering = request.query_params.get("ordering", "").split(",")
+        return any(param.strip().lstrip("-") == "popularity" for param in ordering)
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Category.objects.prefetch_related("products").all()
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """
+        Category counts and price / discount histograms of the products matching
+        the `ProductFilter` params. Each facet ignores its own filter.
+        """
+        return self.get_cached_response(request, self.get_facets_response)
+
+    def get_facets_response(self, request):
+        filterset = self.filterset_class(
+            request.query_params, queryset=Product.objects.all(), request=request
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return Response(build_facets(filterset))
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Every product matching the filters as NDJSON, or CSV with `?output=csv`,
+        streamed chunk by chunk so memory stays flat whatever the catalog size.
+        Admins only: the whole catalog is read through an open server-side cursor.
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_CONTENT_TYPES:
+            raise ValidationError({"output": [f"Choose one of {', '.join(EXPORT_CONTENT_TYPES)}."]})
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        content = iter_export(
+            queryset,
+            serializer,
+            self.values_serializer_class(serializer),
+            output,
+            self.export_chunk_size,
+        )
+        if isinstance(request._request, ASGIRequest):
+            content = aiter_content(content)
+        response = StreamingHttpResponse(content, content_type=EXPORT_CONTENT_TYPES[output])
+        response["Content-Disposition"] = f'attachment; filename="products.{output}"'
+        return response
+
+    @action(detail=False, methods=["get"])
+    def bestsellers(self, request):
+        """
+        Cards of the `limit` products with the best time-decayed sales, read from
+        the precomputed popularity through its score index.
+        """
+        return self.get_cached_response(request, self.get_bestsellers_response)
+
+    def get_bestsellers_response(self, request):
+        limit = self.get_limit(request, self.bestsellers_default_limit, self.bestsellers_max_limit)
+        products = (
+            Product.objects.filter(popularity__score__gt=0)
+            .only("slug", "name", "current_price")
+            .order_by("-popularity__score", "-id")
+            .prefetch_related(Prefetch("files", queryset=File.objects.order_by("id")))[:limit]
+        )
+        serializer = ProductCardSerializer(
+            products, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @action(detail=True, methods=["get"])
+    def bought_together(self, request, slug=None):
+        """
+        Cards of the products most often ordered with this one, read from the
+        precomputed co-purchases through their `(product, count)` index. Counts
+        follow the orders without moving the catalog version, so the cached
+        responses catch up within the catalog cache timeout.
+        """
+        return self.get_cached_response(request, self.get_bought_together_response, slug=slug)
+
+    def get_bought_together_response(self, request, slug):
+        limit = self.get_limit(
+            request, self.bought_together_default_limit, self.bought_together_max_limit
+        )
+        product = get_object_or_404(Product.objects.only("id"), slug=slug)
+        co_purchases = (
+            ProductCoPurchase.objects.filter(product=product)
+            .select_related("other")
+            .only("other__slug", "other__name", "other__current_price")
+            .prefetch_related(Prefetch("other__files", queryset=File.objects.order_by("id")))
+            .order_by("-count", "other_id")[:limit]
+        )
+        serializer = ProductCardSerializer(
+            [co_purchase.other for co_purchase in co_purchases],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def suggest(self, request):
+        """
+        Lightweight typeahead for the search box: slug, name and thumbnail of the
+        best matches for `q`, at most `limit` of them.
+        """
+        query = request.query_params.get("q", "").strip()
+        if len(query) < self.suggest_min_length:
+            return Response([])
+        limit = self.get_limit(request, self.suggest_default_limit, self.suggest_max_limit)
+        products = (
+            Product.objects.all()
+            .suggest(query, limit)
+            .only("slug", "name")
+            .prefetch_related(Prefetch("files", queryset=File.objects.order_by("id")))
+        )
+        serializer = ProductSuggestionSerializer(products, many=True)
+        return Response(serializer.data)
+
+    def get_limit(self, request, default, maximum):
+        """The `?limit=` param, `default` when missing or invalid, between 1 and `maximum`."""
+        try:
+            limit = int(request.query_params.get("limit", default))
+        except ValueError:
+            limit = default
+        return max(1, min(limit, maximum))
+
+
+class CategoryViewSet(
+    CatalogConditionalGetMixin, CatalogCacheMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet
+):
+    queryset = Category.objects.annotate(product_count=Count("products")).prefetch_related(
+        Prefetch(
+            "products",
+            queryset=Product.objects.only(
+                "slug", "name", "current_price", "category"
+            ).prefetch_related("files")[:PRODUCT_PREVIEW_SIZE],
+            to_attr="preview_products",
+        )
+    )
     serializer_class = CategorySerializer
+    values_serializer_class = CategoryValuesSerializer
     lookup_field = "slug"
     permission_classes = [permissions.AllowAny]
 
 
-class CartViewSet(CartInitiationMixin, viewsets.ModelViewSet):
+class CatalogCacheStatsView(APIView):
+    """Hit/miss counters and current version of the catalog response cache."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_catalog_cache_stats())
+
+
+class CartConditionalGetMixin(ConditionalGetMixin):
+    """
+    Carts are validated by their `updated_at`, touched on every item change, and
+    the catalog version, since the totals follow product prices and discounts.
+    """
+
+    def get_conditional_validators(self, request, *args, **kwargs):
+        cart = self.cart
+        etag = build_etag(
+            cart.pk, cart.updated_at, get_catalog_version(), request.accepted_media_type
+        )
+        return etag, None
+
+
+class CartViewSet(CartInitiationMixin, CartConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = CartSerializer
+    conditional_actions = ()
 
     def get_queryset(self):
         return (
@@ -48,6 +288,9 @@ class CartViewSet(CartInitiationMixin, viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def current(self, request):
+        return self.get_conditional_response(request, self.get_current_response)
+
+    def get_current_response(self, request):
         cart = self.cart
         cart.set_total_amount()
         serializer = self.get_serializer(cart)
@@ -73,9 +316,10 @@ class CartViewSet(CartInitiationMixin, viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CartItemsViewSet(CartInitiationMixin, viewsets.ModelViewSet):
+class CartItemsViewSet(CartInitiationMixin, CartConditionalGetMixin, viewsets.ModelViewSet):
     queryset = OrderItems.objects.all()
     serializer_class = CartItemsSerializer
+    conditional_actions = ("list",)
 
     def get_queryset(self):
         return OrderItems.objects.filter(order=self.cart)
@@ -63,6 +63,7 @@ INSTALLED_APPS = [
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.messages",
+    "django.contrib.postgres",
     "django.contrib.sessions",
     "django.contrib.sites",
     "django.contrib.staticfiles",
@@ -141,6 +142,16 @@ CHANNEL_LAYERS = {
 
 WSGI_APPLICATION = "shop_back.wsgi.application"
 
+# Cache
+# Shared by every process, so catalog version bumps from workers and commands reach them all.
+# Tests use a local memory cache instead, see conftest.py
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    }
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
@@ -255,8 +266,10 @@ SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
 
 REST_FRAMEWORK = {
+    # Picked from the Accept header, JSON being the default
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "core.renderers.ORJSONRenderer",
+        "core.renderers.MessagePackRenderer",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
@@ -286,6 +299,13 @@ STRIPE_SECRET_KEY = env.str("STRIPE_SECRET_KEY", default="")
 STRIPE_PUBLISHABLE_KEY = env.str("STRIPE_PUBLISHABLE_KEY", default="")
 
 OPENAI_API_KEY = env.str("OPENAI_API_KEY", default="")
+# Store the built vector indexes are shared through, so every node serves the latest one:
+# "redis://host:6379/1" or "file:///shared/vector_indexes", empty to only use local builds
+# Redis stores each version as one value, limited to 512 MB: use a directory for larger indexes
+VECTOR_INDEX_STORE_URL = env.str("VECTOR_INDEX_STORE_URL", default="")
+# Product changes are applied to the vector index, then published and shared, in batches at
+# most this many seconds apart
+VECTOR_INDEX_UPDATE_DELAY = env.int("VECTOR_INDEX_UPDATE_DELAY", default=300)
 
 # Celery Configuration
 CELERY_BROKER_URL = REDIS_URL